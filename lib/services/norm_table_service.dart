@@ -0,0 +1,125 @@
+import 'dart:convert';
+import 'package:flutter/services.dart';
+import '../utils/app_logger.dart';
+
+/// Percentile norms for the summary scales, built by tools/norm_tables.py.
+///
+/// The asset stores, per stratum ('all', 'locale=ru', ...) and scale, the
+/// scale score at each percentile of `probabilities`. [percentile] finds a
+/// score with a binary search and interpolates between the neighbouring
+/// percentiles, so a lookup is O(log n) in the table size.
+///
+/// The asset is optional: without it (or with an unsupported format)
+/// [load] returns false and every lookup returns null.
+class NormTableService {
+  // Singleton pattern
+  static final NormTableService _instance = NormTableService._internal();
+  factory NormTableService() => _instance;
+  NormTableService._internal();
+
+  static const String assetPath = 'assets/norms/norm_tables.json';
+  static const String format = 'norm_tables';
+  static const int formatVersion = 1;
+  static const String overallStratum = 'all';
+
+  List<double> _probabilities = const [];
+  Map<String, Map<String, List<double>>> _strata = const {};
+  String? _normsVersion;
+  Future<bool>? _loading;
+
+  bool get isLoaded => _strata.isNotEmpty;
+
+  /// Content hash of the loaded tables (changes whenever the norms are rebuilt)
+  String? get normsVersion => _normsVersion;
+
+  /// Load the asset once; concurrent callers share the same future
+  Future<bool> load() => _loading ??= _loadAsset();
+
+  Future<bool> _loadAsset() async {
+    try {
+      final jsonString = await rootBundle.loadString(assetPath);
+      loadJson(jsonDecode(jsonString) as Map<String, dynamic>);
+      appLogger.i('Loaded norm tables $_normsVersion (${_strata.length} strata)');
+      return true;
+    } catch (e) {
+      appLogger.w('Norm tables not available: $e');
+      return false;
+    }
+  }
+
+  /// Replace the tables with a decoded norms JSON
+  void loadJson(Map<String, dynamic> json) {
+    if (json['format'] != format || json['version'] != formatVersion) {
+      throw FormatException('Unsupported norm tables: ${json['format']} v${json['version']}');
+    }
+    _probabilities = (json['probabilities'] as List).map((p) => (p as num).toDouble()).toList();
+    _strata = (json['strata'] as Map<String, dynamic>).map(
+      (stratum, scales) => MapEntry(
+        stratum,
+        (scales as Map<String, dynamic>).map(
+          (scaleId, table) => MapEntry(
+            scaleId,
+            ((table as Map<String, dynamic>)['values'] as List).map((v) => (v as num).toDouble()).toList(),
+          ),
+        ),
+      ),
+    );
+    _normsVersion = json['norms_version'] as String?;
+  }
+
+  /// Quantiles of a scale; strata without enough data fall back to 'all'
+  List<double>? _values(String scaleId, String stratum) {
+    return _strata[stratum]?[scaleId] ?? _strata[overallStratum]?[scaleId];
+  }
+
+  bool hasNorms(String scaleId, {String stratum = overallStratum}) => _values(scaleId, stratum) != null;
+
+  /// Share of the norm population (0-100) scoring below [score], null without norms
+  double? percentile(String scaleId, double score, {String stratum = overallStratum}) {
+    final values = _values(scaleId, stratum);
+    if (values == null || values.isEmpty) return null;
+
+    final low = _lowerBound(values, score);
+    final high = _upperBound(values, score);
+    if (high == 0) return _probabilities.first;
+    if (low == values.length) return _probabilities.last;
+    if (low < high) {
+      // The score is a quantile shared by several percentiles: take the middle of the run
+      return (_probabilities[low] + _probabilities[high - 1]) / 2;
+    }
+    final below = values[low - 1];
+    final above = values[low];
+    final fraction = (score - below) / (above - below);
+    return _probabilities[low - 1] + fraction * (_probabilities[low] - _probabilities[low - 1]);
+  }
+
+  /// First index whose value is >= [score]
+  static int _lowerBound(List<double> values, double score) {
+    var low = 0;
+    var high = values.length;
+    while (low < high) {
+      final middle = (low + high) >> 1;
+      if (values[middle] < score) {
+        low = middle + 1;
+      } else {
+        high = middle;
+      }
+    }
+    return low;
+  }
+
+  /// First index whose value is > [score]
+  static int _upperBound(List<double> values, double score) {
+    var low = 0;
+    var high = values.length;
+    while (low < high) {
+      final middle = (low + high) >> 1;
+      if (values[middle] <= score) {
+        low = middle + 1;
+      } else {
+        high = middle;
+      }
+    }
+    return low;
+  }
+}
@@ -278,6 +278,13 @@ class TestLoaderService {
         answers: answers,
         factorId: questionMap['factor'] as String?,
         isReversed: questionMap['is_reversed'] as bool? ?? false,
+        axisWeights: questionMap['axis_weights'] != null
+            ? (questionMap['axis_weights'] as Map<String, dynamic>)
+                .map((axis, weight) => MapEntry(axis, (weight as num).toDouble()))
+            : null,
+        bipolarPole: questionMap['bipolar_pole'] as String?,
+        bipolarDimension: questionMap['bipolar_dimension'] as String?,
+        targetScale: questionMap['target_scale'] as String?,
       );
     }).toList();
 
@@ -306,6 +313,8 @@ class TestLoaderService {
       type: type,
       factorIds: factorIds,
       disclaimer: disclaimer,
+      isBipolar: json['is_bipolar'] as bool? ?? false,
+      bipolarDimensions: (json['bipolar_dimensions'] as List?)?.map((d) => d.toString()).toList(),
     );
   }
 
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк задержек инструментов MCP сервера APA на записанных ответах.
+
+Вызывает APASearchServer.call_tool для четырех основных инструментов
+с заданным числом одновременных запросов и выводит задержки p50/p95/p99,
+пропускную способность и пиковое потребление памяти (RSS) процесса.
+
+По умолчанию сеть не используется (APA_HTTP_MODE=replay): ответы берутся
+из фикстур, записанных заранее тем же скриптом в режиме record.
+
+Использование:
+    # один раз записать ответы apa.org для набора запросов бенчмарка
+    python benchmarks/latency.py --mode record --requests 1 --concurrency 1
+
+    # офлайн-прогон
+    python benchmarks/latency.py --concurrency 1,8,32 --requests 200
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+TOOLS = ("search_apa_site", "get_apa_page_content", "search_apa_topics", "get_apa_psychology_tests_info")
+
+# Набор аргументов для каждого инструмента; запросы идут по кругу
+WORKLOAD: Dict[str, List[Dict[str, Any]]] = {
+    "search_apa_site": [
+        {"query": "personality assessment"},
+        {"query": "anxiety disorders"},
+        {"query": "depression screening"},
+        {"query": "psychological testing standards"},
+    ],
+    "get_apa_page_content": [
+        {"url": "https://www.apa.org/topics/anxiety"},
+        {"url": "https://www.apa.org/topics/stress"},
+        {"url": "https://www.apa.org/topics/personality"},
+        {"url": "https://www.apa.org/science/programs/testing/standards"},
+    ],
+    "search_apa_topics": [
+        {"topic": "testing and assessment", "query": "validity"},
+        {"topic": "clinical psychology"},
+        {"topic": "mental health", "query": "screening"},
+    ],
+    "get_apa_psychology_tests_info": [
+        {"test_type": "personality"},
+        {"test_type": "intelligence"},
+        {"test_type": "depression"},
+        {"test_type": "anxiety"},
+    ],
+}
+
+
+# Инструменты не бросают исключений, ошибки (в том числе частичные) видны только в тексте ответа
+ERROR_MARKERS = ("Ошибка при", "Ошибки запросов:")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Перцентиль по методу ближайшего ранга"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Пиковый RSS текущего процесса в МБ (None, если узнать нельзя)"""
+    try:
+        import resource
+    except ImportError:
+        # Windows: resource нет, пробуем psutil
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss в Linux - в КБ, в macOS - в байтах
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def run_tool(server, tool: str, requests: int, concurrency: int, warmup: bool) -> Dict[str, Any]:
+    """Прогон одного инструмента при заданной конкурентности"""
+    workload = WORKLOAD[tool]
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    async with server.APASearchServer() as apa:
+        if warmup:
+            for arguments in workload:
+                await apa.call_tool(tool, arguments)
+
+        async def one(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                result = await apa.call_tool(tool, workload[i % len(workload)])
+                latencies.append(time.perf_counter() - started)
+                text = result[0].text if result else ""
+                if any(marker in text for marker in ERROR_MARKERS):
+                    errors.append(text)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+        coalesced = apa.coalesce_stats["coalesced"]
+
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "tool": tool,
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "p50_ms": percentile(latencies_ms, 50),
+        "p95_ms": percentile(latencies_ms, 95),
+        "p99_ms": percentile(latencies_ms, 99),
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "coalesced": coalesced,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Задержки инструментов MCP сервера APA")
+    parser.add_argument("--mode", choices=("replay", "record", "live"), default="replay",
+                        help="Источник ответов (APA_HTTP_MODE)")
+    parser.add_argument("--fixtures-dir", help="Каталог фикстур (APA_FIXTURES_DIR)")
+    parser.add_argument("--replay-latency-scale", type=float, default=0.0,
+                        help="Доля записанной задержки сервера при воспроизведении (1.0 - как при записи)")
+    parser.add_argument("--tools", default=",".join(TOOLS), help="Инструменты через запятую")
+    parser.add_argument("--concurrency", default="1,8", help="Уровни конкурентности через запятую")
+    parser.add_argument("--requests", type=int, default=50, help="Вызовов на инструмент и уровень")
+    parser.add_argument("--no-warmup", action="store_true", help="Не прогревать пул разбора перед замером")
+    parser.add_argument("--cache", action="store_true", help="Включить кэш ответов (по умолчанию выключен)")
+    parser.add_argument("--index", action="store_true", help="Включить локальный индекс (по умолчанию выключен)")
+    parser.add_argument("--json", help="Сохранить результаты в JSON файл")
+    args = parser.parse_args()
+
+    # Настройки сервера читаются при импорте, поэтому окружение задаем до него
+    os.environ["APA_HTTP_MODE"] = args.mode
+    os.environ["APA_REPLAY_LATENCY_SCALE"] = str(args.replay_latency_scale)
+    os.environ["APA_CACHE_ENABLED"] = "1" if args.cache else "0"
+    os.environ["APA_INDEX_ENABLED"] = "1" if args.index else "0"
+    if args.fixtures_dir:
+        os.environ["APA_FIXTURES_DIR"] = os.path.abspath(args.fixtures_dir)
+    server = importlib.import_module("server")
+
+    tools = [tool.strip() for tool in args.tools.split(",")]
+    levels = [int(level) for level in args.concurrency.split(",")]
+
+    print(f"Режим: {args.mode}, фикстуры: {server.FIXTURES_DIR}")
+    print(f"Разбор: {server.PARSE_EXECUTOR}/{server.HTML_PARSER}, кэш: {'вкл' if args.cache else 'выкл'}, "
+          f"вызовов на замер: {args.requests}")
+    print("-" * 100)
+    print(f"{'инструмент':<32}{'конк.':>6}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}"
+          f"{'запр/с':>10}{'ошибки':>8}{'объед.':>8}{'RSS, МБ':>10}")
+
+    results = []
+    for tool in tools:
+        if tool not in WORKLOAD:
+            print(f"Неизвестный инструмент: {tool}")
+            sys.exit(1)
+        for level in levels:
+            result = await run_tool(server, tool, args.requests, level, not args.no_warmup)
+            results.append(result)
+            rss = f"{result['peak_rss_mb']:.0f}" if result["peak_rss_mb"] is not None else "-"
+            print(f"{tool:<32}{level:>6}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+                  f"{result['p99_ms']:>10.1f}{result['throughput_rps']:>10.1f}{result['errors']:>8}"
+                  f"{result['coalesced']:>8}{rss:>10}")
+
+    failed = [result for result in results if result["errors"]]
+    if failed:
+        print(f"\n⚠️  Ошибки в {len(failed)} замерах, например: {failed[0]['first_error'][:200]}")
+        if args.mode == "replay":
+            print("Запишите недостающие ответы: python benchmarks/latency.py --mode record --requests 1 --concurrency 1")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"mode": args.mode, "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\nРезультаты сохранены в {args.json}")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
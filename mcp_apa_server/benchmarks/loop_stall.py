@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк задержек event loop при параллельном разборе больших страниц APA.
+
+Запускает N одновременных вызовов get_apa_page_content (сеть подменена
+httpx.MockTransport) и параллельно "пульс" - задачу, которая каждые
+несколько миллисекунд засыпает и измеряет, насколько позже она проснулась.
+Сравнивает разбор прямо в event loop (inline) с пулом потоков и процессов.
+
+Использование:
+    python benchmarks/loop_stall.py [--concurrency 8] [--paragraphs 4000]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("APA_CACHE_ENABLED", "0")
+
+import server  # noqa: E402
+from parsing import PARSE_MODES, ParseExecutor  # noqa: E402
+
+
+HEARTBEAT_INTERVAL = 0.005
+
+
+def build_large_page(paragraphs: int) -> str:
+    """Синтетическая страница со структурой статьи APA"""
+    body = []
+    for i in range(paragraphs):
+        if i % 20 == 0:
+            body.append(f"<h2>Section {i // 20}</h2>")
+        body.append(
+            f"<p class='article-text'>Paragraph {i}: psychological assessment "
+            f"<a href='/topics/{i}'>reliability</a> and <em>validity</em> of measures.</p>"
+        )
+        if i % 10 == 0:
+            body.append(f"<ul><li>Item {i}a</li><li>Item {i}b</li></ul>")
+    return (
+        "<html><head><script>var x = 1;</script><style>p {}</style></head><body>"
+        "<nav><a href='/'>Home</a></nav><header>APA</header>"
+        f"<main><h1>Large APA page</h1>{''.join(body)}</main>"
+        "<footer>footer</footer></body></html>"
+    )
+
+
+async def heartbeat(stalls: list, stop: asyncio.Event):
+    """Фиксирует, насколько позже запланированного просыпается event loop"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + HEARTBEAT_INTERVAL
+        await asyncio.sleep(HEARTBEAT_INTERVAL)
+        stalls.append(max(0.0, loop.time() - expected))
+
+
+async def run_mode(mode: str, html: str, concurrency: int, workers: int) -> dict:
+    """Прогон одного режима разбора"""
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, text=html))
+
+    async with server.APASearchServer() as apa:
+        await apa.http_client.aclose()
+        apa.http_client = httpx.AsyncClient(transport=transport)
+        apa.parse_executor.shutdown()
+        apa.parse_executor = ParseExecutor(mode, workers)
+
+        # Прогрев пула (для процессов - запуск воркеров)
+        await apa.call_tool("get_apa_page_content", {"url": "https://www.apa.org/warmup"})
+
+        stalls: list = []
+        stop = asyncio.Event()
+        pulse = asyncio.create_task(heartbeat(stalls, stop))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            apa.call_tool("get_apa_page_content", {"url": f"https://www.apa.org/page/{i}"})
+            for i in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+
+        stop.set()
+        await pulse
+
+    stalls_ms = sorted(s * 1000 for s in stalls) or [0.0]
+    return {
+        "mode": mode,
+        "elapsed_s": elapsed,
+        "max_stall_ms": stalls_ms[-1],
+        "p95_stall_ms": stalls_ms[int(len(stalls_ms) * 0.95) - 1] if len(stalls_ms) > 1 else stalls_ms[0],
+        "mean_stall_ms": statistics.mean(stalls_ms),
+        "ticks": len(stalls),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Задержки event loop при разборе HTML")
+    parser.add_argument("--concurrency", type=int, default=8, help="Одновременных запросов")
+    parser.add_argument("--paragraphs", type=int, default=4000, help="Размер синтетической страницы")
+    parser.add_argument("--workers", type=int, default=4, help="Размер пула")
+    parser.add_argument("--modes", default=",".join(PARSE_MODES), help="Режимы через запятую")
+    args = parser.parse_args()
+
+    html = build_large_page(args.paragraphs)
+    print(f"Парсер: {server.HTML_PARSER}, страница: {len(html) / 1024:.0f} КБ, "
+          f"одновременных запросов: {args.concurrency}")
+    print("-" * 72)
+    print(f"{'режим':<10}{'время, с':>10}{'макс. задержка, мс':>22}{'p95, мс':>12}{'среднее, мс':>14}")
+
+    for mode in args.modes.split(","):
+        result = await run_mode(mode.strip(), html, args.concurrency, args.workers)
+        print(f"{result['mode']:<10}{result['elapsed_s']:>10.2f}{result['max_stall_ms']:>22.1f}"
+              f"{result['p95_stall_ms']:>12.1f}{result['mean_stall_ms']:>14.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
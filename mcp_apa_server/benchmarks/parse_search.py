@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Микро-бенчмарк разбора страниц поиска APA на сохраненных HTML фикстурах.
+
+Для каждой фикстуры отдельно измеряет построение дерева BeautifulSoup
+и извлечение результатов: текущим планом правил (SEARCH_PLAN) и прежним
+способом - find_all с lambda-фильтрами по классам. Заодно
+проверяет, что оба способа извлекают одинаковые результаты.
+
+Использование:
+    python benchmarks/parse_search.py [--repeat 200] [--max-results 10] [fixtures/*.html]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parsing import extract_search_results, resolve_html_parser  # noqa: E402
+
+
+BASE_URL = "https://www.apa.org"
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def legacy_extract(soup: BeautifulSoup, max_results: int, base_url: str) -> List[Dict[str, str]]:
+    """Прежний способ извлечения (find_all + lambda), оставлен как точка отсчета"""
+    results = []
+    search_results = (
+        soup.find_all('div', class_=['search-result', 'result', 'search-item']) or
+        soup.find_all('article') or
+        soup.find_all('div', class_=lambda x: x and 'result' in x.lower())
+    )
+    for item in search_results[:max_results]:
+        title_tag = (
+            item.find('h2') or
+            item.find('h3') or
+            item.find('a', class_=lambda x: x and 'title' in str(x).lower())
+        )
+        title = title_tag.get_text(strip=True) if title_tag else "Без названия"
+        link_tag = item.find('a', href=True)
+        link = ""
+        if link_tag:
+            href = link_tag['href']
+            link = href if href.startswith('http') else urljoin(base_url, href)
+        description_tag = (
+            item.find('p') or
+            item.find('div', class_=lambda x: x and ('description' in str(x).lower() or 'summary' in str(x).lower()))
+        )
+        description = description_tag.get_text(strip=True) if description_tag else ""
+        if title and link:
+            results.append({
+                'title': title,
+                'link': link,
+                'description': description[:300] + "..." if len(description) > 300 else description
+            })
+    if not results:
+        for link_tag in soup.find_all('a', href=True)[:max_results]:
+            text = link_tag.get_text(strip=True)
+            href = link_tag['href']
+            if len(text) > 10 and not href.startswith('#'):
+                link = href if href.startswith('http') else urljoin(base_url, href)
+                results.append({'title': text, 'link': link, 'description': ''})
+    return results
+
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    """Среднее время одного вызова в миллисекундах"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора страниц поиска APA")
+    parser.add_argument("fixtures", nargs="*", help="HTML файлы (по умолчанию benchmarks/fixtures/*.html)")
+    parser.add_argument("--repeat", type=int, default=200, help="Повторов на фикстуру")
+    parser.add_argument("--max-results", type=int, default=10)
+    parser.add_argument("--parser", default="auto", help="auto, lxml или html.parser")
+    args = parser.parse_args()
+
+    html_parser = resolve_html_parser(args.parser)
+    fixtures = args.fixtures or sorted(glob.glob(os.path.join(FIXTURES_DIR, "*.html")))
+    if not fixtures:
+        print("Фикстуры не найдены")
+        sys.exit(1)
+
+    print(f"Парсер: {html_parser}, повторов: {args.repeat}")
+    print("-" * 84)
+    print(f"{'фикстура':<28}{'КБ':>6}{'дерево, мс':>13}{'план, мс':>11}{'lambda, мс':>13}{'ускорение':>11}{'совп.':>8}")
+
+    mismatches = 0
+    for path in fixtures:
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+
+        soup = BeautifulSoup(html, html_parser)
+        same = (extract_search_results(soup, args.max_results, BASE_URL) ==
+                legacy_extract(soup, args.max_results, BASE_URL))
+        mismatches += not same
+
+        build_ms = measure(lambda: BeautifulSoup(html, html_parser), max(1, args.repeat // 10))
+        plan_ms = measure(lambda: extract_search_results(soup, args.max_results, BASE_URL), args.repeat)
+        legacy_ms = measure(lambda: legacy_extract(soup, args.max_results, BASE_URL), args.repeat)
+
+        print(f"{os.path.basename(path):<28}{len(html) / 1024:>6.0f}{build_ms:>13.2f}{plan_ms:>11.3f}"
+              f"{legacy_ms:>13.3f}{legacy_ms / plan_ms:>10.1f}x{'да' if same else 'НЕТ':>8}")
+
+    if mismatches:
+        print(f"\n❌ Результаты различаются на {mismatches} фикстурах")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
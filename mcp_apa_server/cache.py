@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Двухуровневый кэш HTTP-ответов для MCP сервера APA Search:
+LRU в памяти + постоянное хранилище SQLite на диске
+"""
+
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+
+def normalize_url(url: str) -> str:
+    """Нормализация URL для использования в качестве ключа кэша"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    netloc = parts.netloc.lower()
+
+    # Убираем порт по умолчанию
+    default_port = {"https": ":443", "http": ":80"}.get(scheme)
+    if default_port and netloc.endswith(default_port):
+        netloc = netloc[:-len(default_port)]
+
+    path = parts.path or "/"
+
+    # Сортируем параметры запроса, фрагмент (#...) не влияет на ответ сервера
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+@dataclass
+class CacheEntry:
+    """Сохраненный ответ сервера"""
+    key: str
+    body: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    stored_at: float = 0.0
+    # Размер тела в байтах считается один раз: его читают циклы вытеснения
+    size: int = field(init=False)
+
+    def __post_init__(self):
+        self.size = len(self.body.encode("utf-8"))
+
+    @property
+    def can_revalidate(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+
+class ResponseCache:
+    """
+    Кэш ответов: горячие записи в памяти (LRU), все записи в SQLite.
+    Оба уровня ограничены по размеру, при переполнении вытесняются
+    давно не использованные записи.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str],
+        memory_max_entries: int = 256,
+        memory_max_bytes: int = 32 * 1024 * 1024,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+        access_flush_batch: int = 64,
+    ):
+        self.memory_max_entries = memory_max_entries
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.access_flush_batch = access_flush_batch
+
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._memory_bytes = 0
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_bytes = 0
+        # Время последнего чтения записей с диска, записывается в базу пачками
+        self._pending_access: Dict[str, float] = {}
+
+        self.counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stale": 0,
+            "revalidated": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+        }
+
+        if db_path:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path)
+            self._db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    body TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    stored_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+                """
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)"
+            )
+            self._db.commit()
+            self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def close(self):
+        """Закрытие базы данных"""
+        if self._db is not None:
+            self._flush_access()
+            self._db.commit()
+            self._db.close()
+            self._db = None
+
+    def lookup(self, key: str, ttl: float, count_miss: bool = True) -> Tuple[Optional[CacheEntry], bool]:
+        """
+        Поиск записи в кэше.
+        Возвращает (запись, свежая ли она); (None, False) при промахе.
+        count_miss=False - промах не учитывается (за ним последует поиск по другому ключу)
+        """
+        entry = self._memory_get(key)
+        if entry is not None:
+            self.counters["memory_hits"] += 1
+        else:
+            entry = self._disk_get(key)
+            if entry is None:
+                if count_miss:
+                    self.counters["misses"] += 1
+                return None, False
+            self.counters["disk_hits"] += 1
+            self._memory_put(entry)
+
+        fresh = (time.time() - entry.stored_at) < ttl
+        if not fresh:
+            self.counters["stale"] += 1
+        return entry, fresh
+
+    def store(self, entry: CacheEntry):
+        """Сохранение ответа на обоих уровнях"""
+        if not entry.stored_at:
+            entry.stored_at = time.time()
+        self.counters["stores"] += 1
+        self._memory_put(entry)
+        self._disk_put(entry)
+
+    def mark_revalidated(self, entry: CacheEntry):
+        """Сервер ответил 304 Not Modified - продлеваем срок жизни записи"""
+        self.counters["revalidated"] += 1
+        entry.stored_at = time.time()
+        self._memory_put(entry)
+        if self._db is not None:
+            self._pending_access.pop(entry.key, None)
+            self._db.execute(
+                "UPDATE responses SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (entry.stored_at, entry.stored_at, entry.key),
+            )
+            self._flush_access()
+            self._db.commit()
+
+    def clear(self):
+        """Полная очистка кэша"""
+        self._memory.clear()
+        self._memory_bytes = 0
+        self._pending_access.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._disk_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Счетчики попаданий/промахов и текущий размер кэша"""
+        disk_entries = 0
+        if self._db is not None:
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        total = hits + self.counters["misses"]
+
+        return {
+            **self.counters,
+            "hit_ratio": round(hits / total, 3) if total else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": disk_entries,
+            "disk_bytes": self._disk_bytes,
+        }
+
+    # --- Уровень 1: память ---
+
+    def _memory_get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+        return entry
+
+    def _memory_put(self, entry: CacheEntry):
+        old = self._memory.pop(entry.key, None)
+        if old is not None:
+            self._memory_bytes -= old.size
+
+        # Слишком большие ответы в памяти не держим
+        if entry.size > self.memory_max_bytes:
+            return
+
+        self._memory[entry.key] = entry
+        self._memory_bytes += entry.size
+
+        while (len(self._memory) > self.memory_max_entries or
+               self._memory_bytes > self.memory_max_bytes):
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.size
+            self.counters["memory_evictions"] += 1
+
+    # --- Уровень 2: SQLite ---
+
+    def _disk_get(self, key: str) -> Optional[CacheEntry]:
+        if self._db is None:
+            return None
+
+        row = self._db.execute(
+            "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        # accessed_at нужен только для вытеснения: обновляем пачкой, а не запросом на каждое попадание
+        self._pending_access[key] = time.time()
+        if len(self._pending_access) >= self.access_flush_batch:
+            self._flush_access()
+            self._db.commit()
+
+        body, etag, last_modified, stored_at = row
+        return CacheEntry(key=key, body=body, etag=etag, last_modified=last_modified, stored_at=stored_at)
+
+    def _disk_put(self, entry: CacheEntry):
+        if self._db is None:
+            return
+
+        old = self._db.execute("SELECT size FROM responses WHERE key = ?", (entry.key,)).fetchone()
+        if old is not None:
+            self._disk_bytes -= old[0]
+        self._pending_access.pop(entry.key, None)
+        self._db.execute(
+            """
+            INSERT OR REPLACE INTO responses
+                (key, body, etag, last_modified, stored_at, accessed_at, size)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (entry.key, entry.body, entry.etag, entry.last_modified,
+             entry.stored_at, time.time(), entry.size),
+        )
+
+        self._disk_bytes += entry.size
+
+        # Вытесняем давно не использованные записи, пока не уложимся в лимит
+        if self._disk_bytes > self.disk_max_bytes:
+            self._flush_access()
+            rows = self._db.execute(
+                "SELECT key, size FROM responses WHERE key != ? ORDER BY accessed_at ASC",
+                (entry.key,),
+            ).fetchall()
+            for old_key, size in rows:
+                if self._disk_bytes <= self.disk_max_bytes:
+                    break
+                self._db.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                self._disk_bytes -= size
+                self.counters["disk_evictions"] += 1
+
+        self._flush_access()
+        self._db.commit()
+
+    def _flush_access(self):
+        """Запись накопленных accessed_at (коммит делает вызывающий)"""
+        if not self._pending_access:
+            return
+        self._db.executemany(
+            "UPDATE responses SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in self._pending_access.items()],
+        )
+        self._pending_access.clear()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Локальный полнотекстовый индекс страниц APA (SQLite FTS5, ранжирование BM25).
+
+Страницы попадают в индекс при каждом вызове get_apa_page_content,
+поиск по индексу работает без сети.
+
+Использование из командной строки:
+    python local_index.py search "personality assessment"
+    python local_index.py rebuild
+    python local_index.py stats
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), ".cache", "index.sqlite3"
+)
+
+# Заголовок страницы важнее текста при ранжировании
+TITLE_WEIGHT = 5.0
+CONTENT_WEIGHT = 1.0
+
+
+class LocalIndex:
+    """Инвертированный индекс страниц APA на базе SQLite FTS5"""
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._db = sqlite3.connect(db_path)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY,
+                url TEXT NOT NULL UNIQUE,
+                title TEXT NOT NULL,
+                content TEXT NOT NULL,
+                indexed_at REAL NOT NULL
+            );
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+                title, content,
+                content='pages', content_rowid='id',
+                tokenize='porter unicode61'
+            );
+
+            -- Таблица FTS синхронизируется с pages триггерами
+            CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+                INSERT INTO pages_fts(rowid, title, content)
+                VALUES (new.id, new.title, new.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+                INSERT INTO pages_fts(pages_fts, rowid, title, content)
+                VALUES ('delete', old.id, old.title, old.content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+                INSERT INTO pages_fts(pages_fts, rowid, title, content)
+                VALUES ('delete', old.id, old.title, old.content);
+                INSERT INTO pages_fts(rowid, title, content)
+                VALUES (new.id, new.title, new.content);
+            END;
+            """
+        )
+        self._db.commit()
+
+    def close(self):
+        """Закрытие базы данных"""
+        self._db.close()
+
+    def upsert(self, url: str, title: str, content: str):
+        """Добавление страницы или обновление уже проиндексированной"""
+        self._db.execute(
+            """
+            INSERT INTO pages (url, title, content, indexed_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                title = excluded.title,
+                content = excluded.content,
+                indexed_at = excluded.indexed_at
+            WHERE pages.title != excluded.title OR pages.content != excluded.content
+            """,
+            (url, title, content, time.time()),
+        )
+        self._db.commit()
+
+    def remove(self, url: str):
+        """Удаление страницы из индекса"""
+        self._db.execute("DELETE FROM pages WHERE url = ?", (url,))
+        self._db.commit()
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Поиск по индексу, результаты упорядочены по BM25 (лучшие первыми)"""
+        match = self._match_expression(query)
+        if not match:
+            return []
+
+        rows = self._db.execute(
+            """
+            SELECT pages.url, pages.title, pages.indexed_at,
+                   snippet(pages_fts, 1, '**', '**', '…', 32),
+                   bm25(pages_fts, ?, ?) AS rank
+            FROM pages_fts
+            JOIN pages ON pages.id = pages_fts.rowid
+            WHERE pages_fts MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (TITLE_WEIGHT, CONTENT_WEIGHT, match, limit),
+        ).fetchall()
+
+        return [
+            {
+                'url': url,
+                'title': title,
+                'indexed_at': indexed_at,
+                'snippet': " ".join(snippet.split()),
+                # bm25() в SQLite отрицательный: чем меньше, тем релевантнее
+                'score': -rank,
+            }
+            for url, title, indexed_at, snippet, rank in rows
+        ]
+
+    def rebuild(self) -> int:
+        """Полная перестройка FTS индекса по таблице pages"""
+        self._db.execute("INSERT INTO pages_fts(pages_fts) VALUES ('rebuild')")
+        self._db.execute("INSERT INTO pages_fts(pages_fts) VALUES ('optimize')")
+        self._db.commit()
+        return self._db.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Количество страниц и время последнего обновления"""
+        count, last = self._db.execute("SELECT COUNT(*), MAX(indexed_at) FROM pages").fetchone()
+        return {"pages": count, "last_indexed_at": last}
+
+    @staticmethod
+    def _match_expression(query: str) -> Optional[str]:
+        """
+        Перевод произвольного запроса в выражение FTS5: каждое слово в кавычках,
+        слова объединены через OR (BM25 поднимает страницы, где совпало больше слов)
+        """
+        terms = re.findall(r"\w+", query.lower())
+        if not terms:
+            return None
+        return " OR ".join(f'"{term}"' for term in dict.fromkeys(terms))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальный индекс страниц APA")
+    parser.add_argument("--db", default=os.environ.get("APA_INDEX_PATH", DEFAULT_INDEX_PATH),
+                        help="Путь к базе индекса")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    search_parser = subparsers.add_parser("search", help="Поиск по индексу")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--limit", type=int, default=10)
+
+    subparsers.add_parser("rebuild", help="Перестроить полнотекстовый индекс")
+    subparsers.add_parser("stats", help="Статистика индекса")
+
+    args = parser.parse_args()
+    index = LocalIndex(args.db)
+
+    try:
+        if args.command == "search":
+            started = time.perf_counter()
+            results = index.search(args.query, args.limit)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            for i, result in enumerate(results, 1):
+                print(f"{i}. [{result['score']:.4g}] {result['title']}")
+                print(f"   {result['url']}")
+                print(f"   {result['snippet']}")
+            print(f"\nНайдено: {len(results)} ({elapsed_ms:.1f} мс)")
+        elif args.command == "rebuild":
+            started = time.perf_counter()
+            count = index.rebuild()
+            print(f"✓ Индекс перестроен: {count} страниц ({time.perf_counter() - started:.2f} с)")
+        elif args.command == "stats":
+            print(index.stats())
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except sqlite3.OperationalError as e:
+        print(f"❌ Ошибка SQLite: {e}")
+        sys.exit(1)
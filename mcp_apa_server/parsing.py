@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Разбор HTML страниц APA и пул исполнителей для разбора вне event loop
+"""
+
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, Tag
+
+
+PARSE_MODES = ("inline", "thread", "process")
+
+
+def resolve_html_parser(name: str = "auto") -> str:
+    """Выбор парсера для BeautifulSoup: lxml, если установлен, иначе html.parser"""
+    if name != "auto":
+        return name
+    try:
+        import lxml  # noqa: F401
+        return "lxml"
+    except ImportError:
+        return "html.parser"
+
+
+class TagRule:
+    """
+    Условие на тег, подготовленное заранее: имя тега, классы (точное
+    совпадение или подстрока без учета регистра) и обязательные атрибуты.
+    Заменяет lambda-фильтры find_all, которые вызывались для каждого элемента.
+    """
+
+    __slots__ = ('names', 'classes', 'class_substrings', 'attrs')
+
+    def __init__(
+        self,
+        names: Iterable[str],
+        classes: Iterable[str] = (),
+        class_substrings: Iterable[str] = (),
+        attrs: Iterable[str] = (),
+    ):
+        self.names = frozenset(names)
+        self.classes = frozenset(classes)
+        self.class_substrings = tuple(s.lower() for s in class_substrings)
+        self.attrs = tuple(attrs)
+
+    def matches(self, tag: Tag) -> bool:
+        if tag.name not in self.names:
+            return False
+        for attr in self.attrs:
+            if not tag.has_attr(attr):
+                return False
+        if not self.classes and not self.class_substrings:
+            return True
+
+        classes = tag.get('class')
+        if not classes:
+            return False
+        if self.classes and not self.classes.isdisjoint(classes):
+            return True
+        if self.class_substrings:
+            joined = ' '.join(classes).lower()
+            return any(s in joined for s in self.class_substrings)
+        return False
+
+
+class SearchExtractionPlan:
+    """
+    План извлечения результатов поиска, собирается один раз при импорте.
+
+    Блоки результатов ищутся за один обход документа сразу по всем вариантам
+    разметки (берется первый вариант, давший совпадения), поля блока -
+    за один обход блока. Правила в списках упорядочены по приоритету.
+    """
+
+    def __init__(self, items: List[TagRule], fields: Dict[str, List[TagRule]]):
+        self.items = items
+        self.fields = list(fields.items())
+
+    def find_items(self, soup: BeautifulSoup, limit: int) -> List[Tag]:
+        buckets: List[List[Tag]] = [[] for _ in self.items]
+        for tag in soup.descendants:
+            if not isinstance(tag, Tag):
+                continue
+            for bucket, rule in zip(buckets, self.items):
+                if rule.matches(tag):
+                    bucket.append(tag)
+            # Основной вариант разметки уже дал достаточно результатов
+            if len(buckets[0]) >= limit:
+                break
+
+        for bucket in buckets:
+            if bucket:
+                return bucket[:limit]
+        return []
+
+    def find_fields(self, item: Tag) -> Dict[str, Optional[Tag]]:
+        """Для каждого поля - первый тег по правилу с наивысшим приоритетом"""
+        found: Dict[str, Optional[Tag]] = {field: None for field, _ in self.fields}
+        ranks = {field: len(rules) for field, rules in self.fields}
+        remaining = len(self.fields)
+
+        for tag in item.descendants:
+            if not isinstance(tag, Tag):
+                continue
+            for field, rules in self.fields:
+                for rank in range(ranks[field]):
+                    if rules[rank].matches(tag):
+                        found[field] = tag
+                        ranks[field] = rank
+                        if rank == 0:
+                            remaining -= 1
+                        break
+            # У всех полей найдено совпадение по лучшему правилу
+            if not remaining:
+                break
+
+        return found
+
+
+# Разные варианты структуры страницы поиска APA
+SEARCH_PLAN = SearchExtractionPlan(
+    items=[
+        TagRule(['div'], classes=['search-result', 'result', 'search-item']),
+        TagRule(['article']),
+        TagRule(['div'], class_substrings=['result']),
+    ],
+    fields={
+        'title': [TagRule(['h2']), TagRule(['h3']), TagRule(['a'], class_substrings=['title'])],
+        'link': [TagRule(['a'], attrs=['href'])],
+        'description': [TagRule(['p']), TagRule(['div'], class_substrings=['description', 'summary'])],
+    },
+)
+
+
+def parse_search_results(
+    html: str, max_results: int, base_url: str, parser: str = "html.parser"
+) -> List[Dict[str, str]]:
+    """Разбор страницы поиска APA в список результатов"""
+    soup = BeautifulSoup(html, parser)
+    return extract_search_results(soup, max_results, base_url)
+
+
+def extract_search_results(
+    soup: BeautifulSoup, max_results: int, base_url: str,
+    plan: SearchExtractionPlan = SEARCH_PLAN
+) -> List[Dict[str, str]]:
+    """Извлечение результатов поиска из уже построенного дерева"""
+    results = []
+
+    for item in plan.find_items(soup, max_results):
+        fields = plan.find_fields(item)
+
+        # Извлекаем заголовок
+        title_tag = fields['title']
+        title = title_tag.get_text(strip=True) if title_tag else "Без названия"
+
+        # Извлекаем ссылку
+        link_tag = fields['link']
+        link = ""
+        if link_tag:
+            href = link_tag['href']
+            link = href if href.startswith('http') else urljoin(base_url, href)
+
+        # Извлекаем описание
+        description_tag = fields['description']
+        description = description_tag.get_text(strip=True) if description_tag else ""
+
+        if title and link:
+            results.append({
+                'title': title,
+                'link': link,
+                'description': description[:300] + "..." if len(description) > 300 else description
+            })
+
+    # Если не нашли результаты стандартным способом, пробуем альтернативный метод
+    if not results:
+        # Ищем все ссылки на странице с релевантным текстом
+        for link_tag in soup.find_all('a', href=True, limit=max_results):
+            text = link_tag.get_text(strip=True)
+            href = link_tag['href']
+
+            if len(text) > 10 and not href.startswith('#'):
+                link = href if href.startswith('http') else urljoin(base_url, href)
+                results.append({
+                    'title': text,
+                    'link': link,
+                    'description': ''
+                })
+
+    return results
+
+
+def parse_page_content(html: str, parser: str = "html.parser") -> Dict[str, str]:
+    """Извлечение заголовка и основного текста страницы APA"""
+    soup = BeautifulSoup(html, parser)
+
+    # Удаляем скрипты, стили и навигацию
+    for tag in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
+        tag.decompose()
+
+    # Извлекаем заголовок
+    title = soup.find('h1')
+    title_text = title.get_text(strip=True) if title else "Без названия"
+
+    # Извлекаем основной контент
+    main_content = (
+        soup.find('main') or
+        soup.find('article') or
+        soup.find('div', class_=lambda x: x and 'content' in str(x).lower())
+    )
+
+    if main_content:
+        # Извлекаем все заголовки и параграфы
+        content_parts = []
+        for element in main_content.find_all(['h1', 'h2', 'h3', 'h4', 'p', 'li']):
+            text = element.get_text(strip=True)
+            if text:
+                if element.name in ['h1', 'h2', 'h3', 'h4']:
+                    level = int(element.name[1])
+                    content_parts.append(f"\n{'#' * level} {text}\n")
+                else:
+                    content_parts.append(text)
+
+        content = '\n\n'.join(content_parts)
+    else:
+        # Если не нашли основной контент, извлекаем весь текст
+        content = soup.get_text(separator='\n', strip=True)
+
+    return {'title': title_text, 'content': content}
+
+
+class StreamingContentExtractor(HTMLParser):
+    """
+    Инкрементальное извлечение основного текста страницы по мере загрузки.
+
+    Повторяет логику parse_page_content без построения DOM: текст заголовков,
+    абзацев и пунктов списков внутри <main>/<article> (или блока с классом
+    "content"), скрипты и навигация пропускаются. Свойство done сообщает,
+    что основной контент уже получен и дальше страницу можно не читать.
+    """
+
+    SKIP_TAGS = {'script', 'style', 'nav', 'header', 'footer', 'aside'}
+    BLOCK_TAGS = {'h1', 'h2', 'h3', 'h4', 'p', 'li'}
+    VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+                 'link', 'meta', 'param', 'source', 'track', 'wbr'}
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.title: Optional[str] = None
+        # Страница прочитана не полностью (например, исчерпан лимит байт)
+        self.truncated = False
+
+        self._stack: List[str] = []
+        self._skip_depth = 0
+        self._title_parts: Optional[List[str]] = None
+
+        # Открытые блоки: [тег, части текста, глубина в стеке]
+        self._blocks: List[List[Any]] = []
+        # Глубина стека, на которой открыта область main/article или div.content
+        self._primary_depth: Optional[int] = None
+        self._secondary_depth: Optional[int] = None
+        self._primary_closed = False
+
+        self._parts = {'primary': [], 'secondary': [], 'fallback': []}
+        self._chars = {'primary': 0, 'secondary': 0, 'fallback': 0}
+        self._overflow = {'primary': False, 'secondary': False, 'fallback': False}
+
+    @property
+    def done(self) -> bool:
+        """Основной контент полностью прочитан или достигнут лимит символов"""
+        if self._primary_closed and self._parts['primary']:
+            return True
+        return self._chars['primary'] >= self.max_chars
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.VOID_TAGS:
+            return
+        self._stack.append(tag)
+        depth = len(self._stack)
+
+        if self._skip_depth or tag in self.SKIP_TAGS:
+            self._skip_depth = self._skip_depth or depth
+            return
+
+        if tag in ('main', 'article') and self._primary_depth is None and not self._primary_closed:
+            self._primary_depth = depth
+        elif tag == 'div' and self._secondary_depth is None:
+            classes = dict(attrs).get('class') or ''
+            if 'content' in classes.lower():
+                self._secondary_depth = depth
+
+        if tag == 'h1' and self.title is None and self._title_parts is None:
+            self._title_parts = []
+
+        if tag in self.BLOCK_TAGS:
+            self._blocks.append([tag, [], depth])
+
+    def handle_endtag(self, tag):
+        if tag not in self._stack:
+            return
+        # Закрываем все незакрытые вложенные теги (как это делает браузер)
+        while self._stack:
+            depth = len(self._stack)
+            current = self._stack.pop()
+            self._close(current, depth)
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if self._skip_depth:
+            return
+        if self._title_parts is not None:
+            self._title_parts.append(data)
+        for block in self._blocks:
+            block[1].append(data)
+        if not self._blocks:
+            self._append('fallback', data)
+
+    def close(self):
+        super().close()
+        while self._stack:
+            depth = len(self._stack)
+            self._close(self._stack.pop(), depth)
+
+    def result(self) -> Dict[str, Any]:
+        """Заголовок и текст в том же виде, что и parse_page_content"""
+        if self._parts['primary']:
+            area, separator = 'primary', '\n\n'
+        elif self._parts['secondary']:
+            area, separator = 'secondary', '\n\n'
+        else:
+            area, separator = 'fallback', '\n'
+        return {
+            'title': self.title or "Без названия",
+            'content': separator.join(self._parts[area]),
+            'truncated': self.truncated or self._overflow[area],
+        }
+
+    def _close(self, tag: str, depth: int):
+        if self._skip_depth:
+            if depth == self._skip_depth:
+                self._skip_depth = 0
+            return
+
+        if tag == 'h1' and self._title_parts is not None:
+            self.title = ' '.join(''.join(self._title_parts).split()) or None
+            self._title_parts = None
+
+        if self._blocks and self._blocks[-1][2] == depth:
+            block_tag, parts, _ = self._blocks.pop()
+            text = ' '.join(''.join(parts).split())
+            if text:
+                if block_tag.startswith('h'):
+                    text = f"\n{'#' * int(block_tag[1])} {text}\n"
+                if self._primary_depth is not None:
+                    self._append('primary', text)
+                elif self._secondary_depth is not None:
+                    self._append('secondary', text)
+                self._append('fallback', text)
+
+        if depth == self._primary_depth:
+            self._primary_depth = None
+            self._primary_closed = True
+        if depth == self._secondary_depth:
+            self._secondary_depth = None
+
+    def _append(self, area: str, text: str):
+        text = text if area != 'fallback' else text.strip()
+        if not text:
+            return
+        if self._chars[area] >= self.max_chars:
+            self._overflow[area] = True
+            return
+        self._parts[area].append(text)
+        self._chars[area] += len(text)
+
+
+def extract_page_content(html: str, max_chars: int) -> Dict[str, Any]:
+    """Разбор уже загруженной страницы тем же StreamingContentExtractor (для пула процессов)"""
+    extractor = StreamingContentExtractor(max_chars)
+    extractor.feed(html)
+    extractor.close()
+    return extractor.result()
+
+
+class ParseExecutor:
+    """
+    Выполнение разбора HTML в пуле потоков или процессов,
+    чтобы крупные страницы не блокировали event loop.
+    Режим "inline" выполняет разбор прямо в event loop.
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: Optional[int] = None):
+        if mode not in PARSE_MODES:
+            raise ValueError(f"Неизвестный режим разбора: {mode} (допустимо: {', '.join(PARSE_MODES)})")
+
+        self.mode = mode
+        self._executor: Optional[Executor] = None
+        if mode == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="apa-parse")
+        elif mode == "process":
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Выполнить функцию разбора; для режима process функция должна быть модульной"""
+        if self._executor is None:
+            return func(*args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def run_local(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Выполнить функцию над объектом этого процесса (например, feed потокового разбора):
+        в режиме process такой объект нельзя передать в пул, поэтому используется поток
+        """
+        if self.mode == "process":
+            return await asyncio.to_thread(func, *args)
+        return await self.run(func, *args)
+
+    def shutdown(self):
+        """Остановка пула"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Запись и воспроизведение HTTP-ответов APA для офлайн-проверок и бенчмарков.
+
+В режиме record запросы уходят в сеть, а каждый ответ сохраняется в
+JSON-фикстуру. В режиме replay сеть не используется: ответы берутся из
+сохраненных фикстур, при желании с записанной задержкой сервера.
+
+Режим задается переменной окружения APA_HTTP_MODE (live, record, replay),
+каталог фикстур - APA_FIXTURES_DIR.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from cache import normalize_url
+
+
+HTTP_MODES = ("live", "record", "replay")
+
+DEFAULT_FIXTURES_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "benchmarks", "recordings"
+)
+
+# Тело сохраняется уже распакованным, поэтому эти заголовки больше не верны
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection"}
+
+
+class FixtureNotFound(httpx.RequestError):
+    """Для запроса нет записанного ответа (повторять запрос бессмысленно)"""
+
+
+def fixture_path(directory: str, method: str, url: str) -> str:
+    """Путь к фикстуре: один файл на метод и нормализованный URL"""
+    key = f"{method.upper()} {normalize_url(url)}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:24]
+    host = httpx.URL(url).host or "unknown"
+    return os.path.join(directory, host, f"{digest}.json")
+
+
+def _encode_body(body: bytes) -> Dict[str, str]:
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body_base64": base64.b64encode(body).decode("ascii")}
+
+
+def _decode_body(data: Dict[str, Any]) -> bytes:
+    if "body_base64" in data:
+        return base64.b64decode(data["body_base64"])
+    return data.get("body", "").encode("utf-8")
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Пропускает запросы в сеть и сохраняет каждый ответ в фикстуру"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, directory: str):
+        self._transport = transport
+        self.directory = directory
+        self.recorded = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self._transport.handle_async_request(request)
+        # Ответ транспорта еще не распакован - распаковываем, чтобы фикстура читалась глазами
+        raw = httpx.Response(response.status_code, headers=response.headers, stream=response.stream)
+        try:
+            body = await raw.aread()
+        finally:
+            await raw.aclose()
+        elapsed = time.perf_counter() - started
+
+        headers = [(k, v) for k, v in response.headers.multi_items() if k.lower() not in _DROPPED_HEADERS]
+        fixture = {
+            "method": request.method,
+            "url": str(request.url),
+            "status": response.status_code,
+            "headers": headers,
+            "elapsed": round(elapsed, 4),
+            "recorded_at": time.time(),
+            **_encode_body(body),
+        }
+        path = fixture_path(self.directory, request.method, str(request.url))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, ensure_ascii=False, indent=1)
+        self.recorded += 1
+
+        return httpx.Response(
+            response.status_code, headers=headers, content=body,
+            extensions={"http_version": response.extensions.get("http_version", b"HTTP/1.1")},
+        )
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Отдает ответы из фикстур без обращения к сети.
+    latency_scale > 0 воспроизводит записанное время ответа сервера
+    (1.0 - как при записи), 0 - ответ мгновенный.
+    """
+
+    def __init__(self, directory: str, latency_scale: float = 0.0):
+        self.directory = directory
+        self.latency_scale = latency_scale
+        self.replayed = 0
+        self.missing = 0
+        self._fixtures: Dict[str, Dict[str, Any]] = {}
+
+    def _load(self, path: str) -> Optional[Dict[str, Any]]:
+        fixture = self._fixtures.get(path)
+        if fixture is None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                fixture = json.load(f)
+            fixture["content"] = _decode_body(fixture)
+            self._fixtures[path] = fixture
+        return fixture
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = fixture_path(self.directory, request.method, str(request.url))
+        fixture = self._load(path)
+        if fixture is None:
+            self.missing += 1
+            raise FixtureNotFound(f"Нет записанного ответа для {request.method} {request.url}", request=request)
+
+        if self.latency_scale > 0:
+            await asyncio.sleep(fixture.get("elapsed", 0.0) * self.latency_scale)
+
+        self.replayed += 1
+        return httpx.Response(
+            fixture["status"],
+            headers=[tuple(header) for header in fixture["headers"]],
+            content=fixture["content"],
+            extensions={"http_version": b"HTTP/1.1"},
+        )
+
+
+def create_transport(
+    mode: str,
+    directory: str = DEFAULT_FIXTURES_DIR,
+    latency_scale: float = 0.0,
+    **transport_options: Any,
+) -> Optional[httpx.AsyncBaseTransport]:
+    """
+    Транспорт для httpx.AsyncClient по режиму APA_HTTP_MODE.
+    Для live возвращает None (клиент создает обычный транспорт сам);
+    transport_options (http2, limits, ...) передаются сетевому транспорту в режиме record.
+    """
+    if mode not in HTTP_MODES:
+        raise ValueError(f"Неизвестный режим HTTP: {mode} (допустимо: {', '.join(HTTP_MODES)})")
+    if mode == "record":
+        return RecordingTransport(httpx.AsyncHTTPTransport(**transport_options), directory)
+    if mode == "replay":
+        return ReplayTransport(directory, latency_scale)
+    return None
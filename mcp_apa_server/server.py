@@ -5,12 +5,15 @@ MCP сервер для поиска психологической информ
 """
 
 import asyncio
+import codecs
 import json
-from typing import Any, Dict, List, Optional
-from urllib.parse import quote_plus, urljoin
+import os
+import sqlite3
+import sys
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import quote_plus
 
 import httpx
-from bs4 import BeautifulSoup
 from mcp.server import Server
 from mcp.types import (
     Resource,
@@ -21,6 +24,26 @@ from mcp.types import (
 )
 import mcp.server.stdio
 
+from cache import CacheEntry, ResponseCache, normalize_url
+from local_index import DEFAULT_INDEX_PATH, LocalIndex
+from parsing import (
+    ParseExecutor,
+    StreamingContentExtractor,
+    extract_page_content,
+    parse_page_content,
+    parse_search_results,
+    resolve_html_parser,
+)
+from recording import DEFAULT_FIXTURES_DIR, create_transport
+
+
+# Настройки можно задать в файле .env рядом с server.py
+try:
+    from dotenv import load_dotenv
+    load_dotenv(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env"))
+except ImportError:
+    pass
+
 
 # Константы
 APA_BASE_URL = "https://www.apa.org"
@@ -28,12 +51,107 @@ APA_SEARCH_URL = f"{APA_BASE_URL}/search"
 USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
 
 
+def _env_int(name: str, default: int) -> int:
+    """Целочисленная настройка из переменной окружения"""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    """Дробная настройка из переменной окружения"""
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    """Логическая настройка из переменной окружения"""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Настройки HTTP клиента
+HTTP_MAX_CONNECTIONS = _env_int("APA_HTTP_MAX_CONNECTIONS", 20)
+HTTP_MAX_KEEPALIVE_CONNECTIONS = _env_int("APA_HTTP_MAX_KEEPALIVE_CONNECTIONS", 10)
+HTTP_KEEPALIVE_EXPIRY = _env_float("APA_HTTP_KEEPALIVE_EXPIRY", 60.0)
+HTTP2_ENABLED = _env_bool("APA_HTTP2", False)
+HTTP_CONNECT_TIMEOUT = _env_float("APA_HTTP_CONNECT_TIMEOUT", 10.0)
+HTTP_READ_TIMEOUT = _env_float("APA_HTTP_READ_TIMEOUT", 30.0)
+HTTP_RETRIES = _env_int("APA_HTTP_RETRIES", 2)
+HTTP_RETRY_BACKOFF = _env_float("APA_HTTP_RETRY_BACKOFF", 0.5)
+HTTP_RETRY_MAX_DELAY = _env_float("APA_HTTP_RETRY_MAX_DELAY", 10.0)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# Остаток ответа, который выгоднее дочитать, чем закрыть соединение
+STREAM_DRAIN_MAX_BYTES = _env_int("APA_HTTP_STREAM_DRAIN_MAX_BYTES", 256 * 1024)
+
+# Настройки кэша
+CACHE_ENABLED = _env_bool("APA_CACHE_ENABLED", True)
+CACHE_PATH = os.environ.get(
+    "APA_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "responses.sqlite3")
+)
+CACHE_MEMORY_MAX_ENTRIES = _env_int("APA_CACHE_MEMORY_MAX_ENTRIES", 256)
+CACHE_MEMORY_MAX_BYTES = _env_int("APA_CACHE_MEMORY_MAX_BYTES", 32 * 1024 * 1024)
+CACHE_DISK_MAX_BYTES = _env_int("APA_CACHE_DISK_MAX_BYTES", 256 * 1024 * 1024)
+
+# Время жизни записей кэша (в секундах) для каждого инструмента
+CACHE_TTLS = {
+    "search_apa_site": _env_float("APA_CACHE_TTL_SEARCH", 6 * 3600),
+    "search_apa_topics": _env_float("APA_CACHE_TTL_TOPICS", 6 * 3600),
+    "get_apa_page_content": _env_float("APA_CACHE_TTL_PAGE", 24 * 3600),
+    "get_apa_psychology_tests_info": _env_float("APA_CACHE_TTL_TESTS_INFO", 12 * 3600),
+}
+
+# Локальный полнотекстовый индекс загруженных страниц
+INDEX_ENABLED = _env_bool("APA_INDEX_ENABLED", True)
+INDEX_PATH = os.environ.get("APA_INDEX_PATH", DEFAULT_INDEX_PATH)
+
+# Разбор HTML: inline (в event loop), thread или process
+PARSE_EXECUTOR = os.environ.get("APA_PARSE_EXECUTOR", "thread")
+PARSE_WORKERS = _env_int("APA_PARSE_WORKERS", 4)
+HTML_PARSER = resolve_html_parser(os.environ.get("APA_HTML_PARSER", "auto"))
+
+# Загрузка страниц: stream (по частям с лимитом) или full (целиком)
+PAGE_FETCH_MODE = os.environ.get("APA_PAGE_FETCH_MODE", "stream")
+PAGE_BYTE_BUDGET = _env_int("APA_PAGE_BYTE_BUDGET", 2 * 1024 * 1024)
+PAGE_CONTENT_MAX_CHARS = _env_int("APA_PAGE_CONTENT_MAX_CHARS", 10000)
+
+# Пакетная загрузка страниц (get_apa_pages_batch)
+BATCH_MAX_URLS = _env_int("APA_BATCH_MAX_URLS", 20)
+BATCH_MAX_CONCURRENCY = _env_int("APA_BATCH_MAX_CONCURRENCY", 5)
+
+# Запись/воспроизведение ответов APA: live, record (сеть + запись фикстур) или replay (только фикстуры)
+HTTP_MODE = os.environ.get("APA_HTTP_MODE", "live")
+FIXTURES_DIR = os.environ.get("APA_FIXTURES_DIR", DEFAULT_FIXTURES_DIR)
+REPLAY_LATENCY_SCALE = _env_float("APA_REPLAY_LATENCY_SCALE", 0.0)
+
+# Параллельные подзапросы get_apa_psychology_tests_info
+FANOUT_CONCURRENCY = _env_int("APA_FANOUT_CONCURRENCY", 3)
+FANOUT_QUERY_TIMEOUT = _env_float("APA_FANOUT_QUERY_TIMEOUT", 20.0)
+
+
 class APASearchServer:
     """MCP сервер для работы с сайтом APA"""
     
     def __init__(self):
         self.server = Server("apa-search-server")
         self.http_client: Optional[httpx.AsyncClient] = None
+        self.cache: Optional[ResponseCache] = None
+        self.index: Optional[LocalIndex] = None
+        self.http2_enabled = False
+        self.http_stats: Dict[str, int] = {
+            "requests": 0,
+            "new_connections": 0,
+            "tls_handshakes": 0,
+            "retries": 0,
+        }
+        self._fanout_semaphore = asyncio.Semaphore(FANOUT_CONCURRENCY)
+        self.parse_executor = ParseExecutor(PARSE_EXECUTOR, PARSE_WORKERS)
+        
+        # Выполняющиеся запросы для объединения одинаковых (single-flight)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.coalesce_stats: Dict[str, int] = {"executed": 0, "coalesced": 0}
         
         # Регистрация инструментов
         self.server.list_tools()(self.list_tools)
@@ -41,17 +159,58 @@ class APASearchServer:
         
     async def __aenter__(self):
         """Инициализация HTTP клиента"""
+        http2 = HTTP2_ENABLED
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                print("APA_HTTP2=1, но пакет h2 не установлен - используется HTTP/1.1", file=sys.stderr)
+                http2 = False
+        self.http2_enabled = http2
+        
+        limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        )
         self.http_client = httpx.AsyncClient(
-            timeout=30.0,
+            timeout=httpx.Timeout(
+                HTTP_READ_TIMEOUT,
+                connect=HTTP_CONNECT_TIMEOUT,
+                read=HTTP_READ_TIMEOUT
+            ),
+            limits=limits,
+            http2=http2,
+            transport=create_transport(
+                HTTP_MODE, FIXTURES_DIR, REPLAY_LATENCY_SCALE, http2=http2, limits=limits
+            ),
             headers={"User-Agent": USER_AGENT},
             follow_redirects=True
         )
+        if CACHE_ENABLED:
+            self.cache = ResponseCache(
+                CACHE_PATH,
+                memory_max_entries=CACHE_MEMORY_MAX_ENTRIES,
+                memory_max_bytes=CACHE_MEMORY_MAX_BYTES,
+                disk_max_bytes=CACHE_DISK_MAX_BYTES,
+            )
+        if INDEX_ENABLED:
+            try:
+                self.index = LocalIndex(INDEX_PATH)
+            except sqlite3.OperationalError as e:
+                # Например, SQLite собран без FTS5
+                print(f"Локальный индекс отключен: {e}", file=sys.stderr)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Закрытие HTTP клиента"""
+        """Закрытие HTTP клиента и кэша"""
         if self.http_client:
             await self.http_client.aclose()
+        if self.cache:
+            self.cache.close()
+        if self.index:
+            self.index.close()
+        self.parse_executor.shutdown()
     
     async def list_tools(self) -> List[Tool]:
         """Список доступных инструментов"""
@@ -97,6 +256,40 @@ class APASearchServer:
                     "required": ["url"]
                 }
             ),
+            Tool(
+                name="get_apa_pages_batch",
+                description=(
+                    "Получить содержимое нескольких страниц APA за один вызов. "
+                    "Страницы загружаются параллельно; для каждого URL возвращается текст или ошибка. "
+                    "Используйте вместо серии вызовов get_apa_page_content."
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "urls": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Список полных URL страниц на apa.org"
+                        },
+                        "max_concurrency": {
+                            "type": "integer",
+                            "description": (
+                                f"Сколько страниц загружать одновременно (по умолчанию и максимум: "
+                                f"{BATCH_MAX_CONCURRENCY}, большее значение уменьшается до максимума)"
+                            ),
+                            "default": BATCH_MAX_CONCURRENCY,
+                            "minimum": 1,
+                            "maximum": BATCH_MAX_CONCURRENCY
+                        },
+                        "stream": {
+                            "type": "boolean",
+                            "description": "Отправлять каждую страницу уведомлением сразу после загрузки (по умолчанию: false)",
+                            "default": False
+                        }
+                    },
+                    "required": ["urls"]
+                }
+            ),
             Tool(
                 name="search_apa_topics",
                 description=(
@@ -136,6 +329,45 @@ class APASearchServer:
                     },
                     "required": ["test_type"]
                 }
+            ),
+            Tool(
+                name="search_local_apa_index",
+                description=(
+                    "Поиск по локальному индексу страниц APA, ранее загруженных через get_apa_page_content. "
+                    "Работает без сети и отвечает за миллисекунды; результаты ранжируются по BM25."
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "query": {
+                            "type": "string",
+                            "description": "Поисковый запрос (например: 'reliability validity', 'depression screening')"
+                        },
+                        "max_results": {
+                            "type": "integer",
+                            "description": "Максимальное количество результатов (по умолчанию: 10)",
+                            "default": 10
+                        }
+                    },
+                    "required": ["query"]
+                }
+            ),
+            Tool(
+                name="get_apa_server_stats",
+                description=(
+                    "Статистика работы сервера: попадания и промахи кэша ответов APA, "
+                    "размер кэша в памяти и на диске."
+                ),
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "clear_cache": {
+                            "type": "boolean",
+                            "description": "Очистить кэш после получения статистики (по умолчанию: false)",
+                            "default": False
+                        }
+                    }
+                }
             )
         ]
     
@@ -149,6 +381,12 @@ class APASearchServer:
                 )
             elif name == "get_apa_page_content":
                 return await self._get_page_content(arguments["url"])
+            elif name == "get_apa_pages_batch":
+                return await self._get_pages_batch(
+                    arguments["urls"],
+                    arguments.get("max_concurrency", BATCH_MAX_CONCURRENCY),
+                    arguments.get("stream", False)
+                )
             elif name == "search_apa_topics":
                 return await self._search_apa_topics(
                     arguments["topic"],
@@ -158,6 +396,15 @@ class APASearchServer:
                 return await self._get_psychology_tests_info(
                     arguments["test_type"]
                 )
+            elif name == "search_local_apa_index":
+                return await self._search_local_index(
+                    arguments["query"],
+                    arguments.get("max_results", 10)
+                )
+            elif name == "get_apa_server_stats":
+                return await self._get_server_stats(
+                    arguments.get("clear_cache", False)
+                )
             else:
                 return [TextContent(
                     type="text",
@@ -169,75 +416,206 @@ class APASearchServer:
                 text=f"Ошибка при выполнении {name}: {str(e)}"
             )]
     
-    async def _search_apa_site(self, query: str, max_results: int) -> List[TextContent]:
-        """Поиск по сайту APA"""
-        if not self.http_client:
-            return [TextContent(type="text", text="HTTP клиент не инициализирован")]
+    async def _single_flight(self, key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Объединение одинаковых одновременных запросов: первый вызов выполняет работу,
+        остальные с тем же ключом ждут и получают тот же результат
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesce_stats["coalesced"] += 1
+        else:
+            self.coalesce_stats["executed"] += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        
+        # shield: отмена одного ожидающего (например, по таймауту) не отменяет общую задачу
+        return await asyncio.shield(task)
+    
+    async def _fetch_text(self, url: str, tool: str) -> str:
+        """Загрузка страницы через кэш; одновременные запросы одного URL объединяются"""
+        return await self._single_flight(
+            f"fetch:{normalize_url(url)}",
+            lambda: self._fetch_text_uncoalesced(url, tool)
+        )
+    
+    async def _fetch_text_uncoalesced(self, url: str, tool: str) -> str:
+        """Загрузка страницы через кэш с ревалидацией по ETag/Last-Modified"""
+        entry, fresh = self._cache_lookup(url, tool)
+        if entry and fresh:
+            return entry.body
+        
+        response = await self._send(url, self._conditional_headers(entry))
+        if entry and response.status_code == 304:
+            self.cache.mark_revalidated(entry)
+            return entry.body
+        response.raise_for_status()
         
-        # Формируем URL поиска
-        search_url = f"{APA_BASE_URL}/search?query={quote_plus(query)}"
+        self._cache_store(url, response.text, response)
+        return response.text
+    
+    async def _stream_page(self, url: str) -> Dict[str, Any]:
+        """
+        Потоковая загрузка страницы: ответ читается по частям и сразу разбирается,
+        чтение прекращается после извлечения основного контента или по лимиту байт
+        """
+        tool = "get_apa_page_content"
+        # Полное тело (в том числе сохраненное режимом full) подходит лучше прочитанной части;
+        # промах по полному ключу не считается, страница учитывается одним промахом
+        entry, fresh = self._cache_lookup(url, tool, count_miss=False)
+        if not entry:
+            entry, fresh = self._cache_lookup(url, tool, partial=True)
+        if entry and fresh:
+            return await self.parse_executor.run(extract_page_content, entry.body, PAGE_CONTENT_MAX_CHARS)
         
+        response = await self._send(url, self._conditional_headers(entry), stream=True)
         try:
-            response = await self.http_client.get(search_url)
+            if entry and response.status_code == 304:
+                self.cache.mark_revalidated(entry)
+                return await self.parse_executor.run(extract_page_content, entry.body, PAGE_CONTENT_MAX_CHARS)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            extractor = StreamingContentExtractor(PAGE_CONTENT_MAX_CHARS)
+            decoder = codecs.getincrementaldecoder(response.charset_encoding or "utf-8")(errors="replace")
+            received = 0
+            chunks = []
             
-            # Ищем результаты поиска
-            results = []
+            draining = False
+            partial = False
             
-            # Разные варианты структуры страницы поиска
-            search_results = (
-                soup.find_all('div', class_=['search-result', 'result', 'search-item']) or
-                soup.find_all('article') or
-                soup.find_all('div', class_=lambda x: x and 'result' in x.lower())
-            )
-            
-            for item in search_results[:max_results]:
-                # Извлекаем заголовок
-                title_tag = (
-                    item.find('h2') or 
-                    item.find('h3') or 
-                    item.find('a', class_=lambda x: x and 'title' in str(x).lower())
-                )
-                title = title_tag.get_text(strip=True) if title_tag else "Без названия"
+            async for chunk in response.aiter_bytes():
+                if draining:
+                    continue
                 
-                # Извлекаем ссылку
-                link_tag = item.find('a', href=True)
-                link = ""
-                if link_tag:
-                    href = link_tag['href']
-                    link = href if href.startswith('http') else urljoin(APA_BASE_URL, href)
+                chunk = chunk[:PAGE_BYTE_BUDGET - received]
+                received += len(chunk)
+                text = decoder.decode(chunk)
+                chunks.append(text)
+                # Разбор в пуле: до PAGE_BYTE_BUDGET байт HTMLParser не должен блокировать event loop
+                await self.parse_executor.run_local(extractor.feed, text)
                 
-                # Извлекаем описание
-                description_tag = (
-                    item.find('p') or 
-                    item.find('div', class_=lambda x: x and ('description' in str(x).lower() or 'summary' in str(x).lower()))
-                )
-                description = description_tag.get_text(strip=True) if description_tag else ""
+                if received >= PAGE_BYTE_BUDGET:
+                    extractor.truncated = True
+                elif not extractor.done:
+                    continue
                 
-                if title and link:
-                    results.append({
-                        'title': title,
-                        'link': link,
-                        'description': description[:300] + "..." if len(description) > 300 else description
-                    })
+                partial = True
+                # Небольшой остаток тела дочитываем, чтобы соединение вернулось в пул
+                length = response.headers.get("Content-Length", "")
+                if not (length.isdigit() and
+                        int(length) - response.num_bytes_downloaded <= STREAM_DRAIN_MAX_BYTES):
+                    break
+                draining = True
             
-            # Если не нашли результаты стандартным способом, пробуем альтернативный метод
-            if not results:
-                # Ищем все ссылки на странице с релевантным текстом
-                all_links = soup.find_all('a', href=True)
-                for link_tag in all_links[:max_results]:
-                    text = link_tag.get_text(strip=True)
-                    href = link_tag['href']
-                    
-                    if len(text) > 10 and not href.startswith('#'):
-                        link = href if href.startswith('http') else urljoin(APA_BASE_URL, href)
-                        results.append({
-                            'title': text,
-                            'link': link,
-                            'description': ''
-                        })
+            await self.parse_executor.run_local(extractor.close)
+        finally:
+            await response.aclose()
+        
+        # Прочитанная часть страницы хранится под отдельным ключом, чтобы режим full не получил обрезанный HTML
+        self._cache_store(url, "".join(chunks), response, partial=partial)
+        return extractor.result()
+    
+    async def _send(
+        self, url: str, headers: Optional[Dict[str, str]] = None, stream: bool = False
+    ) -> httpx.Response:
+        """
+        GET запрос с повтором при 429/5xx и сетевых ошибках (экспоненциальная задержка).
+        При stream=True тело не читается, ответ нужно закрыть через aclose().
+        """
+        attempt = 0
+        while True:
+            request = self.http_client.build_request(
+                "GET", url, headers=headers, extensions={"trace": self._trace_connection}
+            )
+            self.http_stats["requests"] += 1
+            try:
+                response = await self.http_client.send(request, stream=stream)
+            except httpx.TransportError:
+                if attempt >= HTTP_RETRIES:
+                    raise
+                delay = HTTP_RETRY_BACKOFF * (2 ** attempt)
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= HTTP_RETRIES:
+                    return response
+                delay = self._retry_delay(response, attempt)
+                await response.aclose()
+            
+            attempt += 1
+            self.http_stats["retries"] += 1
+            await asyncio.sleep(delay)
+    
+    @staticmethod
+    def _retry_delay(response: httpx.Response, attempt: int) -> float:
+        """Задержка перед повтором: Retry-After сервера или экспоненциальная"""
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(float(retry_after), HTTP_RETRY_MAX_DELAY)
+        return min(HTTP_RETRY_BACKOFF * (2 ** attempt), HTTP_RETRY_MAX_DELAY)
+    
+    async def _trace_connection(self, event_name: str, info: Dict[str, Any]):
+        """Трассировка httpcore: считаем новые соединения и TLS-рукопожатия"""
+        if event_name == "connection.connect_tcp.complete":
+            self.http_stats["new_connections"] += 1
+        elif event_name == "connection.start_tls.complete":
+            self.http_stats["tls_handshakes"] += 1
+    
+    def _connection_stats(self) -> Dict[str, Any]:
+        """Статистика переиспользования соединений"""
+        requests = self.http_stats["requests"]
+        reused = max(0, requests - self.http_stats["new_connections"])
+        return {
+            **self.http_stats,
+            "reused_connections": reused,
+            "reuse_ratio": round(reused / requests, 3) if requests else 0.0,
+            "http2": self.http2_enabled,
+            "mode": HTTP_MODE,
+        }
+    
+    @staticmethod
+    def _cache_key(url: str, partial: bool = False) -> str:
+        """Ключ кэша: нормализованный URL, для частично прочитанных страниц с префиксом"""
+        return f"partial:{normalize_url(url)}" if partial else normalize_url(url)
+    
+    def _cache_lookup(self, url: str, tool: str, partial: bool = False, count_miss: bool = True):
+        """Поиск ответа в кэше: (запись или None, свежая ли запись)"""
+        if not self.cache:
+            return None, False
+        return self.cache.lookup(self._cache_key(url, partial), CACHE_TTLS.get(tool, 0), count_miss)
+    
+    @staticmethod
+    def _conditional_headers(entry: Optional[CacheEntry]) -> Dict[str, str]:
+        """Заголовки условного запроса для проверки устаревшей записи"""
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+    
+    def _cache_store(self, url: str, body: str, response: httpx.Response, partial: bool = False):
+        """Сохранение ответа в кэш"""
+        if not self.cache:
+            return
+        self.cache.store(CacheEntry(
+            key=self._cache_key(url, partial),
+            body=body,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        ))
+    
+    async def _search_apa_site(
+        self, query: str, max_results: int, tool: str = "search_apa_site"
+    ) -> List[TextContent]:
+        """Поиск по сайту APA"""
+        if not self.http_client:
+            return [TextContent(type="text", text="HTTP клиент не инициализирован")]
+        
+        # Лишние пробелы не должны плодить записи в кэше
+        query = " ".join(query.split())
+        
+        try:
+            results = await self._fetch_search_results(query, max_results, tool)
             
             if not results:
                 return [TextContent(
@@ -245,76 +623,56 @@ class APASearchServer:
                     text=f"По запросу '{query}' ничего не найдено на сайте APA. Попробуйте другие ключевые слова."
                 )]
             
-            # Форматируем результаты
-            output = f"# Результаты поиска на APA.org по запросу: '{query}'\n\n"
-            output += f"Найдено результатов: {len(results)}\n\n"
-            
-            for i, result in enumerate(results, 1):
-                output += f"## {i}. {result['title']}\n"
-                output += f"**Ссылка:** {result['link']}\n"
-                if result['description']:
-                    output += f"**Описание:** {result['description']}\n"
-                output += "\n---\n\n"
-            
-            return [TextContent(type="text", text=output)]
+            return [TextContent(type="text", text=self._format_search_results(query, results))]
             
         except Exception as e:
             return [TextContent(
                 type="text",
-                text=f"Ошибка при поиске: {str(e)}\nURL: {search_url}"
+                text=f"Ошибка при поиске: {str(e)}\nURL: {self._search_url(query)}"
             )]
     
+    @staticmethod
+    def _search_url(query: str) -> str:
+        """URL страницы поиска APA"""
+        return f"{APA_SEARCH_URL}?query={quote_plus(query)}"
+    
+    async def _fetch_search_results(
+        self, query: str, max_results: int, tool: str
+    ) -> List[Dict[str, str]]:
+        """Загрузка и разбор страницы поиска APA в список результатов"""
+        url = self._search_url(query)
+        
+        async def load() -> List[Dict[str, str]]:
+            html = await self._fetch_text(url, tool)
+            return await self.parse_executor.run(
+                parse_search_results, html, max_results, APA_BASE_URL, HTML_PARSER
+            )
+        
+        return await self._single_flight(f"search:{max_results}:{normalize_url(url)}", load)
+    
+    @staticmethod
+    def _format_search_results(query: str, results: List[Dict[str, str]]) -> str:
+        """Форматирование результатов поиска в Markdown"""
+        output = f"# Результаты поиска на APA.org по запросу: '{query}'\n\n"
+        output += f"Найдено результатов: {len(results)}\n\n"
+        
+        for i, result in enumerate(results, 1):
+            output += f"## {i}. {result['title']}\n"
+            output += f"**Ссылка:** {result['link']}\n"
+            if result['description']:
+                output += f"**Описание:** {result['description']}\n"
+            output += "\n---\n\n"
+        
+        return output
+    
     async def _get_page_content(self, url: str) -> List[TextContent]:
         """Получение содержимого страницы"""
         if not self.http_client:
             return [TextContent(type="text", text="HTTP клиент не инициализирован")]
         
         try:
-            response = await self.http_client.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Удаляем скрипты, стили и навигацию
-            for tag in soup(['script', 'style', 'nav', 'header', 'footer', 'aside']):
-                tag.decompose()
-            
-            # Извлекаем заголовок
-            title = soup.find('h1')
-            title_text = title.get_text(strip=True) if title else "Без названия"
-            
-            # Извлекаем основной контент
-            main_content = (
-                soup.find('main') or 
-                soup.find('article') or 
-                soup.find('div', class_=lambda x: x and 'content' in str(x).lower())
-            )
-            
-            if main_content:
-                # Извлекаем все заголовки и параграфы
-                content_parts = []
-                for element in main_content.find_all(['h1', 'h2', 'h3', 'h4', 'p', 'li']):
-                    text = element.get_text(strip=True)
-                    if text:
-                        if element.name in ['h1', 'h2', 'h3', 'h4']:
-                            level = int(element.name[1])
-                            content_parts.append(f"\n{'#' * level} {text}\n")
-                        else:
-                            content_parts.append(text)
-                
-                content = '\n\n'.join(content_parts)
-            else:
-                # Если не нашли основной контент, извлекаем весь текст
-                content = soup.get_text(separator='\n', strip=True)
-            
-            # Ограничиваем длину
-            if len(content) > 10000:
-                content = content[:10000] + "\n\n...(содержимое обрезано, слишком длинное)"
-            
-            output = f"# {title_text}\n\n"
-            output += f"**URL:** {url}\n\n"
-            output += "---\n\n"
-            output += content
+            page = await self._single_flight(f"page:{normalize_url(url)}", lambda: self._load_page(url))
+            output = self._format_page(url, page)
             
             return [TextContent(type="text", text=output)]
             
@@ -324,13 +682,148 @@ class APASearchServer:
                 text=f"Ошибка при получении страницы: {str(e)}"
             )]
     
+    @staticmethod
+    def _format_page(url: str, page: Dict[str, Any]) -> str:
+        """Форматирование содержимого страницы в Markdown"""
+        content = page['content']
+        
+        # Ограничиваем длину
+        if len(content) > PAGE_CONTENT_MAX_CHARS or page.get('truncated'):
+            content = content[:PAGE_CONTENT_MAX_CHARS] + "\n\n...(содержимое обрезано, слишком длинное)"
+        
+        output = f"# {page['title']}\n\n"
+        output += f"**URL:** {url}\n\n"
+        output += "---\n\n"
+        output += content
+        return output
+    
+    async def _get_pages_batch(
+        self, urls: List[str], max_concurrency: int, stream: bool
+    ) -> List[TextContent]:
+        """Параллельная загрузка нескольких страниц с ограничением одновременных запросов"""
+        if not self.http_client:
+            return [TextContent(type="text", text="HTTP клиент не инициализирован")]
+        
+        if not urls:
+            return [TextContent(type="text", text="Список URL пуст")]
+        if len(urls) > BATCH_MAX_URLS:
+            return [TextContent(
+                type="text",
+                text=f"Слишком много URL: {len(urls)} (максимум {BATCH_MAX_URLS} за один вызов)"
+            )]
+        
+        concurrency = max(1, min(max_concurrency, BATCH_MAX_CONCURRENCY))
+        semaphore = asyncio.Semaphore(concurrency)
+        finished = 0
+        
+        async def load(url: str) -> Dict[str, Any]:
+            nonlocal finished
+            async with semaphore:
+                try:
+                    page = await self._single_flight(
+                        f"page:{normalize_url(url)}", lambda: self._load_page(url)
+                    )
+                    result = {'url': url, 'ok': True, 'text': self._format_page(url, page)}
+                except Exception as e:
+                    result = {
+                        'url': url,
+                        'ok': False,
+                        'text': f"# Ошибка\n\n**URL:** {url}\n\nОшибка при получении страницы: {str(e)}"
+                    }
+            
+            finished += 1
+            if stream:
+                await self._notify_batch_progress(result, finished, len(urls))
+            return result
+        
+        results = await asyncio.gather(*(load(url) for url in urls))
+        
+        failed = sum(1 for result in results if not result['ok'])
+        summary = "# Пакетная загрузка страниц APA\n\n"
+        summary += f"Загружено: {len(results) - failed} из {len(results)}"
+        if failed:
+            summary += f", с ошибками: {failed}"
+        summary += f"\nОдновременных загрузок: {concurrency}"
+        if concurrency != max_concurrency:
+            # Вызывающий должен видеть, что его значение не применено как есть
+            summary += f" (запрошено {max_concurrency}, допустимо от 1 до {BATCH_MAX_CONCURRENCY})"
+        summary += "\n"
+        
+        return [TextContent(type="text", text=summary)] + [
+            TextContent(type="text", text=result['text']) for result in results
+        ]
+    
+    async def _notify_batch_progress(self, result: Dict[str, Any], finished: int, total: int):
+        """
+        Отправка готовой страницы клиенту до завершения всего пакета:
+        уведомление о прогрессе (если клиент передал progressToken) и лог-сообщение с текстом
+        """
+        try:
+            context = self.server.request_context
+        except LookupError:
+            return  # Вызов вне MCP запроса (например, из бенчмарка)
+        
+        progress_token = context.meta.progressToken if context.meta else None
+        if progress_token is not None:
+            await context.session.send_progress_notification(progress_token, finished, total)
+        
+        await context.session.send_log_message(
+            level="info" if result['ok'] else "warning",
+            data={"url": result['url'], "ok": result['ok'], "finished": finished,
+                  "total": total, "text": result['text']},
+            logger="get_apa_pages_batch"
+        )
+    
+    async def _load_page(self, url: str) -> Dict[str, Any]:
+        """Загрузка и разбор страницы в выбранном режиме"""
+        if PAGE_FETCH_MODE == "stream":
+            page = await self._stream_page(url)
+        else:
+            html = await self._fetch_text(url, "get_apa_page_content")
+            page = await self.parse_executor.run(parse_page_content, html, HTML_PARSER)
+        
+        # Пополняем локальный индекс (неизмененные страницы не переиндексируются)
+        if self.index and page['content']:
+            self.index.upsert(normalize_url(url), page['title'], page['content'])
+        
+        return page
+    
+    async def _search_local_index(self, query: str, max_results: int) -> List[TextContent]:
+        """Поиск по локальному индексу загруженных страниц"""
+        if not self.index:
+            return [TextContent(type="text", text="Локальный индекс отключен")]
+        
+        results = self.index.search(query, max_results)
+        
+        if not results:
+            return [TextContent(
+                type="text",
+                text=(
+                    f"По запросу '{query}' в локальном индексе ничего не найдено. "
+                    f"Страниц в индексе: {self.index.stats()['pages']}. "
+                    "Индекс пополняется страницами, загруженными через get_apa_page_content."
+                )
+            )]
+        
+        output = f"# Результаты поиска в локальном индексе APA по запросу: '{query}'\n\n"
+        output += f"Найдено результатов: {len(results)}\n\n"
+        
+        for i, result in enumerate(results, 1):
+            output += f"## {i}. {result['title']}\n"
+            output += f"**Ссылка:** {result['url']}\n"
+            output += f"**Релевантность (BM25):** {result['score']:.4g}\n"
+            output += f"**Фрагмент:** {result['snippet']}\n"
+            output += "\n---\n\n"
+        
+        return [TextContent(type="text", text=output)]
+    
     async def _search_apa_topics(self, topic: str, query: str) -> List[TextContent]:
         """Поиск по конкретной теме"""
         # Формируем расширенный запрос
         search_query = f"{topic} {query}".strip()
         
         # Используем базовый поиск с дополнительной фильтрацией
-        results = await self._search_apa_site(search_query, 15)
+        results = await self._search_apa_site(search_query, 15, tool="search_apa_topics")
         
         # Добавляем информацию о теме
         if results and results[0].text:
@@ -341,32 +834,84 @@ class APASearchServer:
     
     async def _get_psychology_tests_info(self, test_type: str) -> List[TextContent]:
         """Получение информации о психологических тестах"""
+        if not self.http_client:
+            return [TextContent(type="text", text="HTTP клиент не инициализирован")]
+        
         # Формируем специфичный запрос для поиска тестов
         queries = [
-            f"{test_type} psychological test assessment",
-            f"{test_type} screening tool measure",
-            f"{test_type} diagnostic instrument"
+            " ".join(f"{test_type} psychological test assessment".split()),
+            " ".join(f"{test_type} screening tool measure".split()),
+            " ".join(f"{test_type} diagnostic instrument".split())
         ]
         
-        all_results = []
+        async def run_query(query: str) -> List[Dict[str, str]]:
+            async with self._fanout_semaphore:
+                return await asyncio.wait_for(
+                    self._fetch_search_results(query, 5, "get_apa_psychology_tests_info"),
+                    timeout=FANOUT_QUERY_TIMEOUT
+                )
+        
+        # Запросы выполняются параллельно, ошибка или таймаут одного не мешает остальным
+        outcomes = await asyncio.gather(
+            *(run_query(query) for query in queries),
+            return_exceptions=True
+        )
         
-        for query in queries:
-            results = await self._search_apa_site(query, 5)
-            if results and results[0].text:
-                all_results.append(results[0].text)
+        sections = []
+        failures = []
+        seen_links = set()
         
-        if not all_results:
-            return [TextContent(
-                type="text",
-                text=f"Информация о тестах типа '{test_type}' не найдена. Попробуйте другой тип теста."
-            )]
+        for query, outcome in zip(queries, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError):
+                failures.append(f"- '{query}': превышено время ожидания ({FANOUT_QUERY_TIMEOUT:g} с)")
+                continue
+            if isinstance(outcome, Exception):
+                failures.append(f"- '{query}': {str(outcome).splitlines()[0] if str(outcome) else type(outcome).__name__}")
+                continue
+            
+            # Убираем ссылки, уже найденные предыдущими запросами
+            unique = []
+            for result in outcome:
+                if result['link'] not in seen_links:
+                    seen_links.add(result['link'])
+                    unique.append(result)
+            
+            if unique:
+                sections.append(self._format_search_results(query, unique))
+        
+        if not sections:
+            text = f"Информация о тестах типа '{test_type}' не найдена. Попробуйте другой тип теста."
+            if failures:
+                text += "\n\nОшибки запросов:\n" + "\n".join(failures)
+            return [TextContent(type="text", text=text)]
         
         # Объединяем результаты
         combined = f"# Информация о психологических тестах: {test_type}\n\n"
-        combined += "\n\n---\n\n".join(all_results)
+        combined += "\n\n---\n\n".join(sections)
+        if failures:
+            combined += "\n\n**Часть запросов не выполнена:**\n" + "\n".join(failures) + "\n"
         
         return [TextContent(type="text", text=combined)]
     
+    async def _get_server_stats(self, clear_cache: bool) -> List[TextContent]:
+        """Статистика работы сервера"""
+        stats: Dict[str, Any] = {
+            "cache": self.cache.stats() if self.cache else {"enabled": False},
+            "local_index": self.index.stats() if self.index else {"enabled": False},
+            "http": self._connection_stats(),
+            "coalescing": self.coalesce_stats,
+        }
+        
+        if clear_cache and self.cache:
+            self.cache.clear()
+        
+        output = "# Статистика MCP сервера APA\n\n"
+        output += "```json\n" + json.dumps(stats, ensure_ascii=False, indent=2) + "\n```\n"
+        if clear_cache and self.cache:
+            output += "\nКэш очищен.\n"
+        
+        return [TextContent(type="text", text=output)]
+    
     async def run(self):
         """Запуск сервера"""
         from mcp.server.stdio import stdio_server
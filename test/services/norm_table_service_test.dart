@@ -0,0 +1,76 @@
+import 'package:flutter_test/flutter_test.dart';
+import 'package:psycho_app/services/norm_table_service.dart';
+
+void main() {
+  late NormTableService norms;
+
+  setUp(() {
+    norms = NormTableService();
+    norms.loadJson(_normsJson());
+  });
+
+  group('loadJson()', () {
+    test('reads strata and version', () {
+      expect(norms.isLoaded, isTrue);
+      expect(norms.normsVersion, 'test');
+      expect(norms.hasNorms('anxiety'), isTrue);
+      expect(norms.hasNorms('unknown_scale'), isFalse);
+    });
+
+    test('rejects other formats', () {
+      expect(
+        () => norms.loadJson({'format': 'norm_tables', 'version': 99, 'probabilities': [], 'strata': {}}),
+        throwsFormatException,
+      );
+    });
+  });
+
+  group('percentile()', () {
+    test('returns the percentile of a score equal to a quantile', () {
+      expect(norms.percentile('anxiety', 40.0), 50.0);
+    });
+
+    test('interpolates between quantiles', () {
+      expect(norms.percentile('anxiety', 30.0), closeTo(37.5, 1e-9));
+      expect(norms.percentile('anxiety', 70.0), closeTo(87.5, 1e-9));
+    });
+
+    test('clamps scores outside the table', () {
+      expect(norms.percentile('anxiety', -5.0), 0.0);
+      expect(norms.percentile('anxiety', 120.0), 100.0);
+    });
+
+    test('takes the middle of a run of equal quantiles', () {
+      // 50 is the value of the 50th, 75th and 100th percentile of 'anger'
+      expect(norms.percentile('anger', 50.0), 75.0);
+    });
+
+    test('uses the stratum and falls back to all', () {
+      expect(norms.percentile('anxiety', 40.0, stratum: 'locale=ru'), 75.0);
+      expect(norms.percentile('anger', 50.0, stratum: 'locale=ru'), 75.0);
+      expect(norms.percentile('anxiety', 40.0, stratum: 'locale=xx'), 50.0);
+    });
+
+    test('returns null for scales without norms', () {
+      expect(norms.percentile('unknown_scale', 50.0), isNull);
+    });
+  });
+}
+
+Map<String, dynamic> _normsJson() {
+  return {
+    'format': 'norm_tables',
+    'version': 1,
+    'norms_version': 'test',
+    'probabilities': [0, 25, 50, 75, 100],
+    'strata': {
+      'all': {
+        'anxiety': {'n': 1000, 'values': [0.0, 20.0, 40.0, 60.0, 80.0]},
+        'anger': {'n': 1000, 'values': [10.0, 30.0, 50.0, 50.0, 50.0]},
+      },
+      'locale=ru': {
+        'anxiety': {'n': 400, 'values': [0.0, 10.0, 20.0, 40.0, 90.0]},
+      },
+    },
+  };
+}
@@ -0,0 +1,67 @@
+import 'dart:convert';
+import 'dart:io';
+import 'package:flutter_test/flutter_test.dart';
+import 'package:psycho_app/models/test_model.dart';
+import 'package:psycho_app/services/summary_service.dart';
+
+/// Golden cases of tools/batch_scoring.py (`--golden`): SummaryService must
+/// give the results the Python batch scorer was checked against.
+void main() {
+  final fixture = jsonDecode(
+    File('test/fixtures/personality_type_golden.json').readAsStringSync(),
+  ) as Map<String, dynamic>;
+  final cases = fixture['users'] as List;
+  late SummaryService summaryService;
+
+  setUp(() {
+    summaryService = SummaryService();
+  });
+
+  test('fixture has the expected format', () {
+    expect(fixture['format'], 'personality_type_golden');
+    expect(fixture['version'], 1);
+    expect(cases, isNotEmpty);
+  });
+
+  group('calculateAveragedPersonalityType() golden cases', () {
+    for (var i = 0; i < cases.length; i++) {
+      final golden = cases[i] as Map<String, dynamic>;
+      final results = (golden['results'] as List).cast<Map<String, dynamic>>();
+      final expected = golden['expected'] as Map<String, dynamic>;
+
+      test('case $i: ${results.map((r) => r['testId']).join(', ')}', () {
+        final result = summaryService.calculateAveragedPersonalityType(
+          results.map(_testResult).toList(),
+          'en',
+        );
+
+        expect(result, isNotNull);
+        expect(result!['personalityType'], expected['personalityType']);
+
+        final typeScales = result['typeScales'] as Map<String, double>;
+        (expected['typeScales'] as Map<String, dynamic>).forEach((scaleId, value) {
+          expect(typeScales[scaleId], closeTo((value as num).toDouble(), 1e-9), reason: scaleId);
+        });
+
+        final bipolarScores = result['bipolarScores'] as Map<String, BipolarDimensionScore>;
+        (expected['bipolarPercentages'] as Map<String, dynamic>).forEach((dimension, value) {
+          final score = bipolarScores['personality_type_${dimension.toLowerCase()}']!;
+          expect(score.normalizedScore, closeTo((value as num).toDouble(), 1e-9), reason: dimension);
+        });
+      });
+    }
+  });
+}
+
+TestResult _testResult(Map<String, dynamic> json) {
+  return TestResult(
+    testId: json['testId'] as String,
+    totalScore: 0,
+    maxScore: 100,
+    interpretation: 'Golden case',
+    completedAt: DateTime(2024, 1, 1),
+    userAnswers: (json['userAnswers'] as Map<String, dynamic>).map(
+      (questionId, score) => MapEntry(questionId, score as int),
+    ),
+  );
+}
@@ -9,14 +9,31 @@ Adds weights for 8 Personality Type scales:
 - judging / perceiving
 
 Weight range: 0.1-0.5 (flexible, based on question relevance)
+
+Weight files are parsed once by the shared dart_weights module: every
+`QuestionWeight` entry comes with the `//` comment block that precedes it.
+Entries that already weight any Personality Type scale are left alone, so
+re-running the script on an updated file is a no-op.
+
+Targets can be files, directories or globs; several files are processed in
+parallel (see dart_weights.edit_weight_files).
+
+Usage:
+    python tools/add_personality_type_weights.py <weights_file.dart | directory | glob> [...] [--dry-run] [-j N]
+    python tools/add_personality_type_weights.py lib/config/summary/question_weights --dry-run
 """
 
+import argparse
 import re
 import sys
+import time
+
+from dart_weights import WeightFile, add_batch_arguments, edit_weight_files, print_edit_report
 
 # Personality Type scale mapping logic
 # Each entry: (keyword patterns, scale_id, weight)
-Personality Type_MAPPINGS = {
+# Patterns are `|`-separated keywords or `keyword.*keyword` pairs (see KeywordMatcher)
+PERSONALITY_TYPE_MAPPINGS = {
     # Extraversion / Introversion
     'extraversion': [
         (r'party|social|talk|people|outgoing|gregarious|lively|assertive|active|enthusiasm', 'extraversion', 0.4),
@@ -66,6 +83,118 @@ Personality Type_MAPPINGS = {
     ],
 }
 
+SECTION_COMMENT = "// Personality Type personality type scales"
+
+
+class KeywordMatcher:
+    """
+    All PERSONALITY_TYPE_MAPPINGS patterns compiled into one regex, built once.
+
+    Every pattern is an alternation of keywords or `a.*b` keyword pairs. The
+    distinct keywords are compiled into a single lookahead regex shaped as a
+    prefix tree, so one finditer pass reports every keyword occurrence,
+    overlapping ones included; a shorter keyword matching at the same
+    position is a prefix of the longer one and is derived from it. The
+    patterns are then evaluated from those occurrences in their original
+    order, which gives the same result as one re.search per pattern.
+    """
+
+    KEYWORD = re.compile(r"^[\w' ]+$")
+
+    def __init__(self, mappings):
+        keyword_ids = {}
+        # [(scale, [(alternatives, scale_id, weight), ...])]; alternative = tuple of 1 or 2 keyword ids
+        self.rules = []
+        for scale, patterns in mappings.items():
+            compiled = []
+            for pattern, scale_id, weight in patterns:
+                alternatives = []
+                for alternative in pattern.split('|'):
+                    parts = alternative.lower().split('.*')
+                    if len(parts) > 2 or not all(self.KEYWORD.match(part) for part in parts):
+                        raise ValueError(f"Unsupported pattern for the keyword matcher: {alternative!r}")
+                    alternatives.append(tuple(keyword_ids.setdefault(part, len(keyword_ids)) for part in parts))
+                compiled.append((alternatives, scale_id, weight))
+            self.rules.append((scale, compiled))
+
+        self.keywords = list(keyword_ids)
+        self.pattern = re.compile(f"(?={self._trie_pattern(keyword_ids)})", re.IGNORECASE)
+        # matched group -> (id, length) of the keyword and of the shorter keywords it starts with
+        self.implied = {
+            f"k{keyword_ids[keyword]}": [(keyword_ids[other], len(other)) for other in self.keywords
+                                         if keyword.startswith(other)]
+            for keyword in self.keywords
+        }
+
+    @staticmethod
+    def _trie_pattern(keyword_ids):
+        """
+        Keywords as a prefix tree: `p(?:lan(?P<k1>)(?:ning(?P<k2>))?|...)`.
+        Each position is checked against at most one branch per first letter,
+        and the empty group closed last names the longest keyword found there.
+        """
+        trie = {}
+        for keyword, keyword_id in keyword_ids.items():
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[None] = keyword_id
+
+        def render(node):
+            branches = [re.escape(char) + render(child) for char, child in sorted(
+                (item for item in node.items() if item[0] is not None))]
+            body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})" if branches else ''
+            if None not in node:
+                return body
+            marker = f"(?P<k{node[None]}>)"
+            return marker + (f"(?:{body})?" if body else '')
+
+        return render(trie)
+
+    def scan(self, text):
+        """Per line: first end and last start of every keyword found (`.` does not cross lines)"""
+        lines = []
+        for line in text.split('\n'):
+            first_end = {}
+            last_start = {}
+            for match in self.pattern.finditer(line):
+                start = match.start()
+                for keyword_id, length in self.implied[match.lastgroup]:
+                    if keyword_id not in first_end:
+                        first_end[keyword_id] = start + length
+                    last_start[keyword_id] = start
+            if first_end:
+                lines.append((first_end, last_start))
+        return lines
+
+    def match(self, text):
+        """{scale_id: weight} of the first matching pattern of every scale"""
+        lines = self.scan(text)
+        weights = {}
+        if not lines:
+            return weights
+
+        for _, patterns in self.rules:
+            for alternatives, scale_id, weight in patterns:
+                if any(self._matches(alternative, first_end, last_start)
+                       for first_end, last_start in lines for alternative in alternatives):
+                    # Use highest matching weight for this scale
+                    if scale_id not in weights or weight > weights[scale_id]:
+                        weights[scale_id] = weight
+                    break  # Use first matching pattern only
+        return weights
+
+    @staticmethod
+    def _matches(alternative, first_end, last_start):
+        if len(alternative) == 1:
+            return alternative[0] in first_end
+        # `a.*b`: some b starts at or after the end of the earliest a
+        first, second = alternative
+        return first in first_end and second in last_start and last_start[second] >= first_end[first]
+
+
+PERSONALITY_TYPE_MATCHER = KeywordMatcher(PERSONALITY_TYPE_MAPPINGS)
+
 
 def find_personality_type_weights(question_text, comment_text):
     """
@@ -73,94 +202,43 @@ def find_personality_type_weights(question_text, comment_text):
 
     Returns: dict of {scale_id: weight}
     """
-    combined_text = f"{question_text} {comment_text}".lower()
-    weights = {}
+    return PERSONALITY_TYPE_MATCHER.match(f"{question_text} {comment_text}".lower())
 
-    for scale, patterns in Personality Type_MAPPINGS.items():
-        for pattern, scale_id, weight in patterns:
-            if re.search(pattern, combined_text, re.IGNORECASE):
-                # Use highest matching weight for this scale
-                if scale_id not in weights or weight > weights[scale_id]:
-                    weights[scale_id] = weight
-                break  # Use first matching pattern only
 
-    return weights
-
-
-def add_personality_type_weights_to_file(filepath):
+def add_personality_type_weights_to_file(weight_file: WeightFile) -> int:
     """
-    Read weights file, add Personality Type weights to each question, write back.
+    Add Personality Type weights to each question of a parsed weights file.
+
+    Returns the number of updated questions; the caller saves the file.
     """
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-
-    # Pattern to match a question weight entry
-    # Matches: 'test_id:qN': const QuestionWeight(...),
-    pattern = r"('[\w_]+:q\d+': const QuestionWeight\([^)]+axisWeights: \{)([^}]+)(\}[^)]+note: '([^']+)')"
-
-    def add_weights(match):
-        prefix = match.group(1)  # Everything before axisWeights
-        existing_weights = match.group(2)  # Existing axis weights
-        suffix = match.group(3)  # Everything after axisWeights
-        note_text = match.group(4)  # Note content
-
-        # Extract question comment from preceding lines
-        # Look backwards for comment block
-        start_pos = match.start()
-        preceding_text = content[:start_pos]
-        comment_lines = []
-        for line in reversed(preceding_text.split('\n')[-10:]):  # Check last 10 lines
-            if '//' in line:
-                comment_lines.insert(0, line)
-            elif line.strip() and not line.strip().startswith('//'):
-                break
-
-        comment_text = ' '.join(comment_lines)
-
-        # Find Personality Type weights for this question
-        personality_type_weights = find_personality_type_weights(comment_text, note_text)
+    updated = 0
+    for entry in weight_file.entries:
+        # Entries that already have Personality Type scales (added by this script or by hand) are kept as is
+        if entry.axis_close < 0 or not PERSONALITY_TYPE_MAPPINGS.keys().isdisjoint(entry.axis_weights):
+            continue
 
+        personality_type_weights = find_personality_type_weights(' '.join(entry.comments), entry.note or '')
         if not personality_type_weights:
-            # No relevant Personality Type weights found
-            return match.group(0)
-
-        # Add Personality Type weights to existing weights
-        # Parse existing weights to find last weight line
-        existing_lines = existing_weights.strip().split('\n')
-
-        # Remove trailing comma from last weight if present
-        if existing_lines and existing_lines[-1].rstrip().endswith(','):
-            existing_lines[-1] = existing_lines[-1].rstrip()[:-1] + ','
+            continue
 
-        # Add Personality Type weights section
-        personality_type_lines = []
-        personality_type_lines.append("        // Personality Type personality type scales")
-        for scale_id, weight in sorted(personality_type_weights.items()):
-            personality_type_lines.append(f"        '{scale_id}': {weight},")
+        weight_file.add_axis_weights(entry, dict(sorted(personality_type_weights.items())), header=SECTION_COMMENT)
+        updated += 1
 
-        # Combine
-        new_weights = '\n'.join(existing_lines) + '\n' + '\n'.join(personality_type_lines) + '\n      '
+    if updated:
+        print(f"✅ {weight_file.path}: added Personality Type weights to {updated} questions")
+    return updated
 
-        return prefix + new_weights + suffix
 
-    # Apply transformation
-    updated_content = re.sub(pattern, add_weights, content, flags=re.DOTALL)
+def main():
+    parser = argparse.ArgumentParser(description="Add Personality Type weights to question weight files")
+    add_batch_arguments(parser)
+    args = parser.parse_args()
 
-    # Write back
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(updated_content)
-
-    print(f"✅ Updated {filepath}")
-
-    # Count how many questions were updated
-    personality_type_count = updated_content.count("// Personality Type personality type scales")
-    print(f"   Added Personality Type weights to {personality_type_count} questions")
+    started = time.perf_counter()
+    results = edit_weight_files(add_personality_type_weights_to_file, args.targets, args.jobs, args.dry_run)
+    if not print_edit_report(results, args.dry_run, time.perf_counter() - started):
+        sys.exit(1)
 
 
 if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("Usage: python add_personality_type_weights.py <weights_file.dart>")
-        sys.exit(1)
-
-    filepath = sys.argv[1]
-    add_personality_type_weights_to_file(filepath)
+    main()
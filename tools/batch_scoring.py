@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+Batch rescoring of exported test results with NumPy.
+
+Reproduces SummaryService.calculateAveragedPersonalityType for many users at
+once: _calculatePersonalityTypeScalesFromAllTests, _calculateBipolarPercentage
+and _determinePersonalityType.
+
+The compiled weight matrix (weight_matrix.py) is reduced to the rows that
+weight one of the 8 personality type scales, as a dense |weight| matrix W
+(questions x 8). For a batch of users the answers are accumulated into a
+users x questions matrix of normalized answers A (answer / 4, or / 45 for
+`factor_` questions) and a matrix of answer counts C, so that
+
+    scaleScores  = A @ W
+    scaleWeights = C @ W
+
+which is what the Dart loop adds up one answer at a time (retaken tests
+are counted once per attempt there too).
+
+TestScaleModel does the same for the hierarchical scale scores of a single
+test (TestService._calculateMultiFactorResult with ScaleScoreAccumulator).
+
+Input is a JSONL export, one user per line:
+    {"userId": "...", "results": [<TestResult.toJson()>, ...]}
+or a JSON list of such objects.
+
+Usage:
+    python tools/batch_scoring.py export.jsonl [--output scores.jsonl]
+    python tools/batch_scoring.py --synthetic 100000 --check 2000   # parity check + benchmark
+    python tools/batch_scoring.py --golden    # fixture of test/services/summary_service_golden_test.dart
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+import numpy as np
+
+from dart_weights import REPO_ROOT
+from weight_matrix import DEFAULT_OUTPUT, WeightMatrix, compiled_weight_matrix, load_weight_matrix
+from weight_store import WeightStore
+
+# Same order as scaleIds in SummaryService
+PERSONALITY_TYPE_SCALES = ['extraversion', 'introversion', 'sensing', 'intuition',
+                           'thinking', 'feeling', 'judging', 'perceiving']
+
+# (dimension, positive pole, negative pole, positive letter, negative letter)
+DIMENSIONS = [
+    ('EI', 'extraversion', 'introversion', 'E', 'I'),
+    ('SN', 'sensing', 'intuition', 'S', 'N'),
+    ('TF', 'thinking', 'feeling', 'T', 'F'),
+    ('JP', 'judging', 'perceiving', 'J', 'P'),
+]
+
+FACTOR_PREFIX = 'factor_'
+FACTOR_MAX = 45.0
+ANSWER_MAX = 4.0
+# Shared with test/services/summary_service_golden_test.dart
+GOLDEN_FIXTURE = os.path.join(REPO_ROOT, 'test', 'fixtures', 'personality_type_golden.json')
+GOLDEN_FORMAT = 'personality_type_golden'
+
+# Tests whose answer score is an index into the test's factors; TestService adds
+# the weights of 'factor_<selected factor>' once per question
+MULTI_CHOICE_TESTS = ('digital_career_fit_v1', 'conflict_communication_style_v1')
+# TestService stores 6 - score for reversed questions of these tests
+REVERSED_STORAGE_TESTS = ('ipip_big_five', 'love_profile')
+
+
+class ScoringModel:
+    """Personality type part of the weight matrix, laid out for matrix products"""
+
+    def __init__(self, matrix: WeightMatrix):
+        rows: Dict[int, np.ndarray] = {}
+        for position, scale in enumerate(PERSONALITY_TYPE_SCALES):
+            for key, weight in matrix.column(scale).items():
+                row = matrix.question_index[key]
+                if row not in rows:
+                    rows[row] = np.zeros(len(PERSONALITY_TYPE_SCALES))
+                rows[row][position] = abs(weight)
+
+        self.keys = [matrix.questions[row] for row in sorted(rows)]
+        self.weights = np.array([rows[row] for row in sorted(rows)]).reshape(-1, len(PERSONALITY_TYPE_SCALES))
+        self.divisors = np.array([
+            FACTOR_MAX if key.split(':', 1)[-1].startswith(FACTOR_PREFIX) else ANSWER_MAX
+            for key in self.keys
+        ])
+        # testId -> {questionId -> row}: one dict lookup per answer while encoding
+        self.test_rows: Dict[str, Dict[str, int]] = {}
+        for row, key in enumerate(self.keys):
+            test_id, question_id = key.split(':', 1)
+            self.test_rows.setdefault(test_id, {})[question_id] = row
+
+    @property
+    def size(self) -> int:
+        return len(self.keys)
+
+    def encode(self, users: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+        """Normalized answer sums and answer counts, users x questions"""
+        user_index: List[int] = []
+        row_index: List[int] = []
+        values: List[int] = []
+        for u, user in enumerate(users):
+            for result in user.get('results') or ():
+                answers = result.get('userAnswers')
+                rows = self.test_rows.get(result.get('testId'))
+                if not answers or rows is None:
+                    continue
+                for question_id, score in answers.items():
+                    row = rows.get(question_id)
+                    if row is not None:
+                        user_index.append(u)
+                        row_index.append(row)
+                        values.append(score)
+
+        flat = np.asarray(user_index, dtype=np.int64) * self.size + np.asarray(row_index, dtype=np.int64)
+        normalized = np.asarray(values, dtype=np.float64) / self.divisors[np.asarray(row_index, dtype=np.int64)]
+        length = len(users) * self.size
+        sums = np.bincount(flat, weights=normalized, minlength=length).reshape(len(users), self.size)
+        counts = np.bincount(flat, minlength=length).astype(np.float64).reshape(len(users), self.size)
+        return sums, counts
+
+    def score(self, sums: np.ndarray, counts: np.ndarray) -> Dict[str, np.ndarray]:
+        """Type scales, bipolar percentages and type letters for a batch"""
+        scale_scores = sums @ self.weights
+        scale_weights = counts @ self.weights
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scales = np.where(scale_weights > 0, scale_scores / scale_weights * 100, 0.0)
+
+        result = {'scales': scales}
+        letters = []
+        for dimension, positive, negative, positive_letter, negative_letter in DIMENSIONS:
+            percentage = bipolar_percentage(
+                scales[:, PERSONALITY_TYPE_SCALES.index(positive)],
+                scales[:, PERSONALITY_TYPE_SCALES.index(negative)],
+            )
+            result[dimension] = percentage
+            letters.append(np.where(percentage > 50, positive_letter,
+                                    np.where(percentage < 50, negative_letter, 'X')))
+        result['types'] = np.char.add(np.char.add(letters[0], letters[1]), np.char.add(letters[2], letters[3]))
+        return result
+
+    def score_users(self, users: List[Dict]) -> List[Dict]:
+        return self.rows(users, self.score(*self.encode(users)))
+
+    @staticmethod
+    def rows(users: List[Dict], batch: Dict[str, np.ndarray]) -> List[Dict]:
+        """Per-user results of an already scored batch"""
+        return [
+            {
+                'userId': user.get('userId'),
+                'personalityType': str(batch['types'][i]),
+                'bipolarPercentages': {dimension[0]: float(batch[dimension[0]][i]) for dimension in DIMENSIONS},
+                'typeScales': dict(zip(PERSONALITY_TYPE_SCALES, batch['scales'][i].tolist())),
+            }
+            for i, user in enumerate(users)
+        ]
+
+
+class TestScaleModel:
+    """Hierarchical scale scores of one test, laid out for matrix products
+
+    ScaleScoreAccumulator normalizes each answer to (answer - min) / (max - min)
+    over the question's answer scores, inverts it for negative weights and
+    averages it with |weight| per scale. With N the normalized answers and
+    A the answered mask (respondents x questions), P / M the |weights| of
+    positive / negative entries (questions x scales):
+
+        score = (N @ P + (A - N) @ M) / (A @ (P + M)) * 100, clamped to 0..100
+
+    Scales that received no answer are NaN (absent from the Dart map).
+    """
+
+    def __init__(self, matrix: WeightMatrix, test: Dict):
+        self.test_id = test['id']
+        self.question_ids = [question['id'] for question in test['questions']]
+        self.question_index = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        scores = [[answer['score'] for answer in question['answers']] or [0] for question in test['questions']]
+        self.minimums = np.array([min(values) for values in scores], dtype=np.float64)
+        self.maximums = np.array([max(values) for values in scores], dtype=np.float64)
+
+        rows = [matrix.row(f"{self.test_id}:{question_id}") if f"{self.test_id}:{question_id}" in matrix.question_index
+                else {} for question_id in self.question_ids]
+        self.factors: List[str] = list(test.get('factors') or []) if self.test_id in MULTI_CHOICE_TESTS else []
+        factor_rows = [matrix.row(f"{self.test_id}:{FACTOR_PREFIX}{factor}")
+                       if f"{self.test_id}:{FACTOR_PREFIX}{factor}" in matrix.question_index else {}
+                       for factor in self.factors]
+        self.scales = list(dict.fromkeys(scale for row in rows + factor_rows for scale in row))
+        self.positive, self.negative = self._split(rows)
+        self.factor_positive, self.factor_negative = self._split(factor_rows)
+
+    def _split(self, rows: List[Dict[str, float]]) -> Tuple[np.ndarray, np.ndarray]:
+        positive = np.zeros((len(rows), len(self.scales)))
+        negative = np.zeros((len(rows), len(self.scales)))
+        columns = {scale: i for i, scale in enumerate(self.scales)}
+        for r, row in enumerate(rows):
+            for scale, weight in row.items():
+                # QuestionWeight.getDirection: the sign of the weight
+                (negative if weight < 0 else positive)[r, columns[scale]] = abs(weight)
+        return positive, negative
+
+    def encode(self, answer_maps: List[Dict[str, int]]) -> np.ndarray:
+        """Stored userAnswers maps -> respondents x questions, NaN where unanswered"""
+        answers = np.full((len(answer_maps), len(self.question_ids)), np.nan)
+        for r, answer_map in enumerate(answer_maps):
+            for question_id, score in answer_map.items():
+                column = self.question_index.get(question_id)
+                if column is not None:
+                    answers[r, column] = score
+        return answers
+
+    def score(self, answers: np.ndarray) -> np.ndarray:
+        """Scale scores (respondents x scales) of stored answer scores"""
+        answered = ~np.isnan(answers)
+        span = self.maximums - self.minimums
+        with np.errstate(divide='ignore', invalid='ignore'):
+            normalized = np.where(answered & (span > 0), (answers - self.minimums) / span, 0.0)
+        mask = answered.astype(np.float64)
+        numerator = normalized @ self.positive + (mask - normalized) @ self.negative
+        denominator = mask @ (self.positive + self.negative)
+
+        if self.factors:
+            # Every answered question adds the full weight of its selected factor
+            choices = np.where(answered, answers, -1)
+            counts = np.stack([(choices == f).sum(axis=1) for f in range(len(self.factors))], axis=1).astype(np.float64)
+            numerator += counts @ self.factor_positive
+            denominator += counts @ (self.factor_positive + self.factor_negative)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(denominator > 0, np.clip(numerator / denominator * 100, 0.0, 100.0), np.nan)
+
+    def score_answers(self, answer_map: Dict[str, int]) -> Dict[str, float]:
+        """scaleScores of one test result, as the Dart map (only scales with contributions)"""
+        row = self.score(self.encode([answer_map]))[0]
+        return {scale: float(value) for scale, value in zip(self.scales, row.tolist()) if not np.isnan(value)}
+
+
+def bipolar_percentage(positive: np.ndarray, negative: np.ndarray) -> np.ndarray:
+    """_calculateBipolarPercentage over arrays"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        both = positive / (positive + negative) * 100
+    return np.select(
+        [(positive > 0) & (negative > 0), (positive > 0) & (negative == 0), (negative > 0) & (positive == 0)],
+        [both, positive, 100 - negative],
+        default=50.0,
+    )
+
+
+# --- Reference implementation (line-by-line port of the Dart code) ---
+
+def reference_scores(results: List[Dict], all_weights: Dict[str, Dict[str, float]]) -> Dict:
+    """Scalar port of calculateAveragedPersonalityType, used for parity checks"""
+    scale_scores = {scale: 0.0 for scale in PERSONALITY_TYPE_SCALES}
+    scale_weights = {scale: 0.0 for scale in PERSONALITY_TYPE_SCALES}
+
+    for result in results:
+        answers = result.get('userAnswers')
+        if not answers:
+            continue
+        test_id = result['testId']
+        for question_id, answer_score in answers.items():
+            question_weight = all_weights.get(f"{test_id}:{question_id}")
+            if question_weight is None:
+                continue
+            for scale_id, weight in question_weight.items():
+                if scale_id in scale_scores:
+                    normalized = answer_score / FACTOR_MAX if question_id.startswith(FACTOR_PREFIX) else answer_score / ANSWER_MAX
+                    scale_scores[scale_id] += normalized * abs(weight)
+                    scale_weights[scale_id] += abs(weight)
+
+    return personality_type_result(scale_scores, scale_weights)
+
+
+def reference_test_scales(test: Dict, answers: Dict[str, int], all_weights: Dict[str, Dict[str, float]]) -> Dict[str, float]:
+    """Scalar port of the ScaleScoreAccumulator loop of one test, used for parity checks"""
+    weighted: Dict[str, float] = {}
+    maximum: Dict[str, float] = {}
+    test_id = test['id']
+    factors = test.get('factors') or []
+    for question in test['questions']:
+        answer_score = answers.get(question['id'])
+        if answer_score is None:
+            continue
+        scores = [answer['score'] for answer in question['answers']]
+        low, high = min(scores), max(scores)
+        question_weight = all_weights.get(f"{test_id}:{question['id']}")
+        for scale_id, weight in (question_weight or {}).items():
+            normalized = (answer_score - low) / (high - low) if high > low else 0.0
+            directed = 1.0 - normalized if weight < 0 else normalized
+            weighted[scale_id] = weighted.get(scale_id, 0.0) + directed * abs(weight)
+            maximum[scale_id] = maximum.get(scale_id, 0.0) + abs(weight)
+        if test_id in MULTI_CHOICE_TESTS and 0 <= answer_score < len(factors):
+            for scale_id, weight in (all_weights.get(f"{test_id}:{FACTOR_PREFIX}{factors[answer_score]}") or {}).items():
+                weighted[scale_id] = weighted.get(scale_id, 0.0) + (0.0 if weight < 0 else 1.0) * abs(weight)
+                maximum[scale_id] = maximum.get(scale_id, 0.0) + abs(weight)
+    return {
+        scale_id: min(max(weighted[scale_id] / maximum[scale_id] * 100 if maximum[scale_id] > 0 else 0.0, 0.0), 100.0)
+        for scale_id in weighted
+    }
+
+
+def personality_type_result(scale_scores: Dict[str, float], scale_weights: Dict[str, float]) -> Dict:
+    """Normalization, bipolar percentages and type code from accumulated sums (scalar)"""
+    scales = {
+        scale: scale_scores[scale] / scale_weights[scale] * 100 if scale_weights[scale] > 0 else 0.0
+        for scale in PERSONALITY_TYPE_SCALES
+    }
+
+    percentages = {}
+    personality_type = ''
+    for dimension, positive, negative, positive_letter, negative_letter in DIMENSIONS:
+        p, n = scales[positive], scales[negative]
+        if p > 0 and n > 0:
+            percentage = p / (p + n) * 100
+        elif p > 0 and n == 0:
+            percentage = p
+        elif n > 0 and p == 0:
+            percentage = 100 - n
+        else:
+            percentage = 50.0
+        percentages[dimension] = percentage
+        personality_type += positive_letter if percentage > 50 else (negative_letter if percentage < 50 else 'X')
+
+    return {'personalityType': personality_type, 'bipolarPercentages': percentages, 'typeScales': scales}
+
+
+def check_parity(model: ScoringModel, matrix: WeightMatrix, users: List[Dict], tolerance: float = 1e-9) -> int:
+    """Compare batch scores with the reference port; returns the number of mismatching users"""
+    all_weights = {key: matrix.row(key) for key in matrix.questions}
+    failures = 0
+    for user, scored in zip(users, model.score_users(users)):
+        expected = reference_scores(user.get('results') or [], all_weights)
+        values_match = all(
+            abs(scored[group][name] - expected[group][name]) <= tolerance
+            for group in ('typeScales', 'bipolarPercentages')
+            for name in expected[group]
+        )
+        # A percentage within rounding error of 50 may legitimately flip to or from 'X'
+        near_tie = any(abs(value - 50) <= tolerance for value in expected['bipolarPercentages'].values())
+        if not values_match or (scored['personalityType'] != expected['personalityType'] and not near_tie):
+            failures += 1
+            if failures <= 5:
+                print(f"❌ {user.get('userId')}: {scored} != {expected}")
+    return failures
+
+
+# --- Input ---
+
+def read_users(path: str) -> Iterator[Dict]:
+    """Users from a JSONL export or a JSON list"""
+    with open(path, 'r', encoding='utf-8') as f:
+        first = f.read(1)
+        f.seek(0)
+        if first == '[':
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def synthetic_users(matrix: WeightMatrix, count: int, seed: int = 0) -> List[Dict]:
+    """Random users: each completes a random subset of tests, some retake one"""
+    rng = np.random.default_rng(seed)
+    tests: Dict[str, List[str]] = {}
+    for key in matrix.questions:
+        test_id, question_id = key.split(':', 1)
+        tests.setdefault(test_id, []).append(question_id)
+    test_ids = sorted(tests)
+    highs = {
+        test_id: np.array([FACTOR_MAX + 1 if q.startswith(FACTOR_PREFIX) else ANSWER_MAX + 1 for q in questions])
+        for test_id, questions in tests.items()
+    }
+
+    users = []
+    for u in range(count):
+        taken = rng.choice(len(test_ids), size=rng.integers(0, min(12, len(test_ids)) + 1), replace=False)
+        if len(taken) and rng.random() < 0.1:
+            taken = np.append(taken, taken[0])  # retake
+        results = []
+        for t in taken:
+            test_id = test_ids[t]
+            scores = np.floor(rng.random(len(highs[test_id])) * highs[test_id]).astype(int).tolist()
+            skipped = (rng.random(len(scores)) < 0.05).tolist()
+            answers = {
+                question_id: score
+                for question_id, score, skip in zip(tests[test_id], scores, skipped)
+                if not skip
+            }
+            results.append({'testId': test_id, 'userAnswers': answers})
+        users.append({'userId': f"synthetic-{u}", 'results': results})
+    return users
+
+
+def golden_fixture(matrix: WeightMatrix, count: int = 12, seed: int = 7) -> Dict:
+    """
+    Inputs and expected results for the Dart golden test: synthetic users
+    scored with reference_scores, which adds answers in the Dart loop order.
+    At least one user retakes a test (every attempt counts in the app), and
+    users with a percentage within 1e-6 of 50 are left out, where summation
+    order could flip a letter.
+    """
+    all_weights = {key: matrix.row(key) for key in matrix.questions}
+    users = [user for user in synthetic_users(matrix, count * 2, seed) if user['results']]
+    if not any(len({r['testId'] for r in user['results']}) < len(user['results']) for user in users[:count]):
+        users[0]['results'].append(dict(users[0]['results'][0]))
+
+    cases = []
+    for user in users:
+        expected = reference_scores(user['results'], all_weights)
+        if any(0 < abs(p - 50) < 1e-6 for p in expected['bipolarPercentages'].values()):
+            continue
+        cases.append({'results': user['results'], 'expected': expected})
+        if len(cases) == count:
+            break
+    return {'format': GOLDEN_FORMAT, 'version': 1, 'source_hash': matrix.source_hash, 'users': cases}
+
+
+def batches(users: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch: List[Dict] = []
+    for user in users:
+        batch.append(user)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rescore exported results with the SummaryService personality type math")
+    parser.add_argument('export', nargs='?', help="JSONL (one user per line) or JSON list export")
+    parser.add_argument('--synthetic', type=int, help="Score N generated users instead of an export")
+    parser.add_argument('--output', help="Write scores as JSONL")
+    parser.add_argument('--batch-size', type=int, default=4096)
+    parser.add_argument('--matrix', help=f"Compiled weight matrix JSON or .bin store (default: rebuild {DEFAULT_OUTPUT} if stale)")
+    parser.add_argument('--check', type=int, default=0, metavar='N',
+                        help="Compare the first N users with the scalar reference implementation")
+    parser.add_argument('--golden', nargs='?', const=GOLDEN_FIXTURE, metavar='PATH',
+                        help=f"Write the Dart golden test fixture (default: {os.path.relpath(GOLDEN_FIXTURE, REPO_ROOT)})")
+    args = parser.parse_args()
+    if not args.export and not args.synthetic and not args.golden:
+        parser.error("pass an export file, --synthetic N or --golden")
+
+    if args.matrix:
+        matrix = WeightStore(args.matrix) if args.matrix.endswith('.bin') else load_weight_matrix(args.matrix)
+    else:
+        matrix = compiled_weight_matrix()
+    if args.golden:
+        fixture = golden_fixture(matrix)
+        os.makedirs(os.path.dirname(os.path.abspath(args.golden)), exist_ok=True)
+        with open(args.golden, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(fixture, ensure_ascii=False, indent=1) + '\n')
+        print(f"✅ {len(fixture['users'])} golden cases -> {args.golden}")
+        return
+
+    model = ScoringModel(matrix)
+    print(f"Model: {model.size} questions with personality type weights from {len(matrix.maps)} maps")
+
+    users: Iterable[Dict] = synthetic_users(matrix, args.synthetic) if args.synthetic else read_users(args.export)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    checked: List[Dict] = []
+    scored = 0
+    encode_seconds = score_seconds = 0.0
+    types: Dict[str, int] = {}
+    try:
+        for batch in batches(users, args.batch_size):
+            if len(checked) < args.check:
+                checked.extend(batch[:args.check - len(checked)])
+            started = time.perf_counter()
+            encoded = model.encode(batch)
+            encode_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            result = model.score(*encoded)
+            score_seconds += time.perf_counter() - started
+            scored += len(batch)
+            for personality_type in result['types'].tolist():
+                types[personality_type] = types.get(personality_type, 0) + 1
+            if output:
+                for line in model.rows(batch, result):
+                    output.write(json.dumps(line, ensure_ascii=False) + '\n')
+    finally:
+        if output:
+            output.close()
+
+    total = encode_seconds + score_seconds
+    print(f"✅ Scored {scored} users in {total * 1000:.1f} ms "
+          f"({scored / total if total else 0:,.0f} users/s; encode {encode_seconds * 1000:.1f} ms, "
+          f"score {score_seconds * 1000:.1f} ms)")
+    top = sorted(types.items(), key=lambda item: -item[1])[:5]
+    print("   most frequent types: " + ', '.join(f"{t} {c / scored:.1%}" for t, c in top))
+    if output:
+        print(f"   written to {args.output}")
+
+    if args.check:
+        failures = check_parity(model, matrix, checked)
+        if failures:
+            print(f"❌ {failures} of {len(checked)} users differ from the reference implementation")
+            sys.exit(1)
+        print(f"✅ Parity with the reference implementation on {len(checked)} users")
+
+
+if __name__ == '__main__':
+    # Run through the importable modules so cached IR refers to dart_weights.* classes
+    import batch_scoring
+    batch_scoring.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark and golden check for the Personality Type keyword matcher.
+
+Runs find_personality_type_weights (one compiled KeywordMatcher scan) and
+the previous implementation (one re.search per pattern) over the comment
+block and note of every question in the weight files, plus generated
+texts that stress overlapping keywords, `a.*b` pairs, case and line
+breaks. Exits non-zero if any result differs.
+
+Usage:
+    python tools/benchmarks/personality_type_matcher.py [--repeat 20] [--synthetic 5000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from add_personality_type_weights import PERSONALITY_TYPE_MAPPINGS, PERSONALITY_TYPE_MATCHER, find_personality_type_weights  # noqa: E402
+from dart_weights import load_weight_files  # noqa: E402
+
+
+def legacy_find_personality_type_weights(question_text, comment_text):
+    """Previous implementation, kept as the reference"""
+    combined_text = f"{question_text} {comment_text}".lower()
+    weights = {}
+    for scale, patterns in PERSONALITY_TYPE_MAPPINGS.items():
+        for pattern, scale_id, weight in patterns:
+            if re.search(pattern, combined_text, re.IGNORECASE):
+                if scale_id not in weights or weight > weights[scale_id]:
+                    weights[scale_id] = weight
+                break
+    return weights
+
+
+def repo_texts():
+    """(question text, comment text) as add_personality_type_weights passes them"""
+    return [(' '.join(entry.comments), entry.note or '')
+            for weight_file in load_weight_files() for entry in weight_file.entries]
+
+
+def synthetic_texts(count, seed=0):
+    """Random mixes of keywords, keyword fragments and filler words"""
+    rng = random.Random(seed)
+    words = sorted(PERSONALITY_TYPE_MATCHER.keywords)
+    fragments = [w[:rng.randint(1, len(w))] for w in words] + [w + 'ness' for w in words]
+    filler = ['the', 'and', 'often', 'I', 'with', 'myself', '—', 'очень', '//', '.']
+    texts = []
+    for _ in range(count):
+        tokens = []
+        for _ in range(rng.randint(0, 12)):
+            pool = rng.choice((words, fragments, filler))
+            token = rng.choice(pool)
+            if rng.random() < 0.2:
+                token = token.upper() if rng.random() < 0.5 else token.capitalize()
+            tokens.append(token)
+        separator = rng.choice((' ', '', ' ', '\n'))
+        text = separator.join(tokens)
+        split = rng.randint(0, len(text))
+        texts.append((text[:split], text[split:]))
+    return texts
+
+
+def measure(func, texts, repeat):
+    """Microseconds per text"""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for question_text, comment_text in texts:
+            func(question_text, comment_text)
+    return (time.perf_counter() - started) * 1e6 / (repeat * len(texts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Personality Type keyword matcher benchmark and golden check")
+    parser.add_argument('--repeat', type=int, default=20, help="Passes over the texts for timing")
+    parser.add_argument('--synthetic', type=int, default=5000, help="Generated texts added to the golden check")
+    args = parser.parse_args()
+
+    texts = repo_texts()
+    synthetic = synthetic_texts(args.synthetic)
+
+    mismatches = 0
+    for question_text, comment_text in texts + synthetic:
+        expected = legacy_find_personality_type_weights(question_text, comment_text)
+        actual = find_personality_type_weights(question_text, comment_text)
+        if actual != expected:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"❌ {question_text!r} {comment_text!r}: {actual} != {expected}")
+
+    matched = sum(1 for q, c in texts if find_personality_type_weights(q, c))
+    print(f"Patterns: {sum(len(p) for p in PERSONALITY_TYPE_MAPPINGS.values())}, "
+          f"keywords in the compiled matcher: {len(PERSONALITY_TYPE_MATCHER.keywords)}")
+    print(f"Texts: {len(texts)} from weight files ({matched} with matches), {len(synthetic)} generated")
+    print('-' * 64)
+    print(f"{'texts':<16}{'re.search, µs':>16}{'matcher, µs':>16}{'speedup':>12}")
+    for name, sample in (('weight files', texts), ('generated', synthetic)):
+        legacy = measure(legacy_find_personality_type_weights, sample, args.repeat)
+        current = measure(find_personality_type_weights, sample, args.repeat)
+        print(f"{name:<16}{legacy:>16.2f}{current:>16.2f}{legacy / current:>11.1f}x")
+
+    if mismatches:
+        print(f"\n❌ {mismatches} texts differ from the previous implementation")
+        sys.exit(1)
+    print(f"\n✅ Identical output on all {len(texts) + len(synthetic)} texts")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,110 +1,295 @@
 #!/usr/bin/env python3
 """
 Convert Dart test files to JSON format.
-This is a simplified parser that extracts key information.
+
+Every lib/data/*_data.dart file with a static `TestModel getXTest()` method
+is evaluated with dart_literals and written to assets/tests/<test id>.json
+in the schema of TestModel.toJson() (plus the disclaimer that
+TestLoaderService reads). Keys that only exist in the JSON, such as the
+hand-written `interpretations`, are kept when a file is regenerated.
+
+A manifest in tools/.cache records the hash of each source file and of
+the outputs it produced, so a run only re-evaluates data files that
+changed (or whose outputs went missing or were edited). Changing this
+script, dart_literals.py or test_bundle.py invalidates the whole manifest.
+
+With --bundle-dir each test is also written in the interned bundle
+formats of test_bundle.py (build/tests by default).
+
+Usage:
+    python tools/convert_tests.py [--force] [--check] [--bundle-dir [DIR]] [sources ...]
 """
 
+import argparse
+import glob
+import hashlib
 import json
-import re
 import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from dart_literals import DartEvalError, DartFile, evaluate_expression
+from test_bundle import bundle_files
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TOOLS_DIR)
+DATA_PATTERN = os.path.join(ROOT_DIR, 'lib', 'data', '*_data.dart')
+OUTPUT_DIR = os.path.join(ROOT_DIR, 'assets', 'tests')
+DEFAULT_BUNDLE_DIR = os.path.join(ROOT_DIR, 'build', 'tests')
+MANIFEST_PATH = os.path.join(TOOLS_DIR, '.cache', 'convert_tests_manifest.json')
+
+JSON_VERSION = '1.0.0'
+# Keys the converter owns; anything else in an existing output is preserved
+GENERATED_KEYS = {'id', 'version', 'type', 'factors', 'is_bipolar', 'bipolar_dimensions', 'disclaimer', 'questions'}
+# Left behind by the old placeholder converter
+OBSOLETE_KEYS = {'_note'}
+
 
 def parse_map_literal(text):
     """Parse Dart map literal like {'ru': 'text', 'en': 'text'}"""
-    result = {}
-    pattern = r"'(\w+)':\s*'([^']*(?:''[^']*)*)'"
-    for match in re.finditer(pattern, text):
-        key, value = match.groups()
-        value = value.replace("''", "'")  # Unescape single quotes
-        result[key] = value
+    return evaluate_expression(text)
+
+
+def _hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hash_file(path: str) -> Optional[str]:
+    try:
+        with open(path, 'rb') as f:
+            return _hash_bytes(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def converter_hash() -> str:
+    """Hash of the converter code; outputs from another version are rebuilt"""
+    digest = hashlib.sha256()
+    for name in ('convert_tests.py', 'dart_literals.py', 'test_bundle.py'):
+        with open(os.path.join(TOOLS_DIR, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+# --- TestModel -> JSON ---
+
+def answer_to_json(answer: Dict) -> Dict:
+    score = answer['score']
+    if not isinstance(score, int) or isinstance(score, bool):
+        raise ValueError(f"answer {answer.get('id')}: score must be an int, got {score!r}")
+    return {'id': answer['id'], 'text': answer['text'], 'score': score}
+
+
+def question_to_json(question: Dict) -> Dict:
+    """Mirrors QuestionModel.toJson()"""
+    result = {'id': question['id'], 'text': question['text']}
+    if question.get('factorId') is not None:
+        result['factor'] = question['factorId']
+    if question.get('isReversed'):
+        result['is_reversed'] = True
+    if question.get('axisWeights'):
+        # Map<String, double>.from() rejects ints
+        result['axis_weights'] = {axis: float(weight) for axis, weight in question['axisWeights'].items()}
+    for key, json_key in (('bipolarPole', 'bipolar_pole'), ('bipolarDimension', 'bipolar_dimension'),
+                          ('targetScale', 'target_scale')):
+        if question.get(key) is not None:
+            result[json_key] = question[key]
+    result['answers'] = [answer_to_json(answer) for answer in question['answers']]
     return result
 
-def extract_answers_standard_5point():
-    """Standard 5-point scale for IPIP test"""
-    return [
-        {"id": "a1", "text": {"ru": "Совершенно неточно", "en": "Very Inaccurate"}, "score": 1},
-        {"id": "a2", "text": {"ru": "Скорее неточно", "en": "Moderately Inaccurate"}, "score": 2},
-        {"id": "a3", "text": {"ru": "Ни точно, ни неточно", "en": "Neither Accurate Nor Inaccurate"}, "score": 3},
-        {"id": "a4", "text": {"ru": "Скорее точно", "en": "Moderately Accurate"}, "score": 4},
-        {"id": "a5", "text": {"ru": "Совершенно точно", "en": "Very Accurate"}, "score": 5},
-    ]
-
-print("🔄 Converting legacy tests to JSON...\n")
-print("Note: This creates minimal JSON structures.")
-print("Manual review recommended for complex tests.\n")
-
-# For now, create placeholder JSON files
-# User can fill in questions manually or run Dart converter on Windows
-
-tests_config = {
-    "ipip_big_five": {
-        "name": "IPIP Big Five",
-        "factors": ["extraversion", "agreeableness", "conscientiousness", "emotional_stability", "intellect"],
-        "questions": 50,
-        "type": "multi_factor"
-    },
-    "fisher_temperament": {
-        "name": "Fisher Temperament",
-        "factors": ["explorer", "builder", "director", "negotiator"],
-        "questions": 56,
-        "type": "multi_factor"
-    },
-    "love_profile": {
-        "name": "Love Profile",
-        "factors": ["intimacy", "passion", "commitment"],
-        "questions": 60,
-        "type": "multi_factor"
-    },
-    "sixteen_types": {
-        "name": "16 Personality Types",
-        "factors": ["extraversion_introversion", "sensing_intuition", "thinking_feeling", "judging_perceiving"],
-        "questions": 80,
-        "type": "multi_factor"
+
+def test_to_json(test: Dict) -> Dict:
+    """Mirrors TestModel.toJson(), plus the disclaimer read by TestLoaderService"""
+    result = {
+        'id': test['id'],
+        'version': JSON_VERSION,
+        'type': 'multi_factor' if test.get('type') == 'multiFactor' else 'simple',
     }
-}
+    if test.get('factorIds') is not None:
+        result['factors'] = list(test['factorIds'])
+    if test.get('isBipolar'):
+        result['is_bipolar'] = True
+    if test.get('bipolarDimensions') is not None:
+        result['bipolar_dimensions'] = list(test['bipolarDimensions'])
+    if test.get('disclaimer') is not None:
+        result['disclaimer'] = test['disclaimer']
+    result['questions'] = [question_to_json(question) for question in test['questions']]
+    return result
 
-os.makedirs("assets/tests", exist_ok=True)
 
-for test_id, config in tests_config.items():
-    filename = f"assets/tests/{test_id}.json"
+def convert_source(path: str) -> List[Dict]:
+    """JSON of every test defined in one data file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        dart_file = DartFile(f.read(), os.path.relpath(path, ROOT_DIR))
+    tests = []
+    for class_name, method in dart_file.find_methods('TestModel'):
+        test = dart_file.call(class_name, method)
+        if getattr(test, 'type', None) != 'TestModel':
+            raise DartEvalError(f"{dart_file.path}: {class_name}.{method} did not return a TestModel")
+        tests.append(test_to_json(test))
+    return tests
 
-    if os.path.exists(filename):
-        print(f"⏭️  Skipping {config['name']}: {filename} already exists")
-        continue
 
-    # Create placeholder JSON
-    json_data = {
-        "id": test_id,
-        "version": "1.0.0",
-        "type": config["type"],
-        "factors": config["factors"],
-        "questions": [],
-        "_note": f"TODO: Add {config['questions']} questions. Run convert_tests.bat on Windows or convert manually."
-    }
+# --- Output ---
+
+def render(data: Dict, existing_path: str) -> bytes:
+    """Serialized output, merged with the preserved keys of the existing file"""
+    newline = '\n'
+    try:
+        with open(existing_path, 'r', encoding='utf-8', newline='') as f:
+            existing_text = f.read()
+        existing = json.loads(existing_text)
+        if '\r\n' in existing_text:
+            newline = '\r\n'
+        for key, value in existing.items():
+            if key not in GENERATED_KEYS and key not in OBSOLETE_KEYS:
+                data[key] = value
+    except (FileNotFoundError, ValueError):
+        pass
+    text = json.dumps(data, ensure_ascii=False, indent=2) + '\n'
+    return text.replace('\n', newline).encode('utf-8')
+
+
+def write_if_changed(path: str, content: bytes) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(content)
+    os.replace(temp_path, path)
+    return True
+
+
+# --- Manifest ---
+
+def load_manifest(path: str = MANIFEST_PATH) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {'converter': None, 'sources': {}}
+    if manifest.get('converter') != converter_hash():
+        return {'converter': None, 'sources': {}}
+    return manifest
+
+
+def save_manifest(manifest: Dict, path: str = MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    manifest['converter'] = converter_hash()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def is_up_to_date(entry: Optional[Dict], source_hash: str, output_dir: str, bundle_dir: Optional[str]) -> bool:
+    if not entry or entry.get('source') != source_hash:
+        return False
+    if entry.get('output_dir') != _manifest_path(output_dir) or entry.get('bundle_dir') != _manifest_path(bundle_dir):
+        return False
+    return all(_hash_file(os.path.join(ROOT_DIR, path)) == output_hash
+               for path, output_hash in entry['outputs'].items())
+
+
+def _manifest_path(path: Optional[str]) -> Optional[str]:
+    return None if path is None else os.path.relpath(path, ROOT_DIR)
+
+
+def test_outputs(test: Dict, output_dir: str, bundle_dir: Optional[str]) -> List[Tuple[str, bytes]]:
+    """(path, content) of every file generated for one test"""
+    path = os.path.join(output_dir, f"{test['id']}.json")
+    content = render(test, path)
+    outputs = [(path, content)]
+    if bundle_dir is not None:
+        # Built from the merged JSON, so preserved keys end up in the bundle too
+        outputs.extend((os.path.join(bundle_dir, name), data)
+                       for name, data in bundle_files(json.loads(content)).items())
+    return outputs
+
+
+def convert_all(sources: List[str], output_dir: str = OUTPUT_DIR, force: bool = False,
+                check: bool = False, bundle_dir: Optional[str] = None) -> Tuple[int, int, List[str]]:
+    """Convert changed sources. Returns (rebuilt sources, written files, errors)
+
+    With check=True nothing is written; a source counts as rebuilt when its
+    outputs differ from what the converter would produce.
+    """
+    manifest = {'converter': None, 'sources': {}} if force else load_manifest()
+    rebuilt = 0
+    written = 0
+    errors = []
+    for source in sources:
+        key = os.path.relpath(source, ROOT_DIR)
+        source_hash = _hash_file(source)
+        if not check and is_up_to_date(manifest['sources'].get(key), source_hash, output_dir, bundle_dir):
+            continue
+        try:
+            tests = convert_source(source)
+        except (DartEvalError, KeyError, ValueError) as e:
+            errors.append(f"{key}: {e}")
+            continue
+        outputs = {}
+        changed = False
+        for test in tests:
+            for path, content in test_outputs(test, output_dir, bundle_dir):
+                if check:
+                    changed |= _hash_file(path) != _hash_bytes(content)
+                elif write_if_changed(path, content):
+                    changed = True
+                    written += 1
+                    print(f"✅ {os.path.relpath(path, ROOT_DIR)} ({len(test['questions'])} questions)")
+                outputs[os.path.relpath(path, ROOT_DIR)] = _hash_bytes(content)
+        if check:
+            if changed:
+                rebuilt += 1
+                print(f"⚠️  {key}: JSON is out of date")
+            continue
+        rebuilt += 1
+        # Also recorded when empty: special tests with custom screens define no TestModel
+        manifest['sources'][key] = {
+            'source': source_hash,
+            'output_dir': _manifest_path(output_dir),
+            'bundle_dir': _manifest_path(bundle_dir),
+            'outputs': outputs,
+        }
+    if not check:
+        save_manifest(manifest)
+    return rebuilt, written, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert lib/data/*_data.dart tests to assets/tests/*.json")
+    parser.add_argument('sources', nargs='*', help="Data files to convert (default: lib/data/*_data.dart)")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR, help="Directory for the JSON files")
+    parser.add_argument('--force', action='store_true', help="Ignore the manifest and re-evaluate every source")
+    parser.add_argument('--bundle-dir', nargs='?', const=DEFAULT_BUNDLE_DIR,
+                        help=f"Also write .bundle.json / .bundle.bin files (default dir: {os.path.relpath(DEFAULT_BUNDLE_DIR, ROOT_DIR)})")
+    parser.add_argument('--check', action='store_true', help="Only report outdated JSON files; exit 1 if any")
+    args = parser.parse_args()
+
+    sources = [os.path.abspath(path) for path in args.sources] or sorted(glob.glob(DATA_PATTERN))
+    os.makedirs(args.output_dir, exist_ok=True)
+    if args.bundle_dir:
+        os.makedirs(args.bundle_dir, exist_ok=True)
+
+    print("🔄 Converting Dart tests to JSON...\n")
+    started = time.perf_counter()
+    rebuilt, written, errors = convert_all(sources, args.output_dir, args.force, args.check, args.bundle_dir)
+    elapsed = time.perf_counter() - started
+
+    for error in errors:
+        print(f"❌ {error}")
+    if args.check:
+        print(f"\n{len(sources) - rebuilt - len(errors)}/{len(sources)} sources up to date ({elapsed:.2f} s)")
+        sys.exit(1 if rebuilt or errors else 0)
+    print(f"\n📊 {len(sources)} sources, {rebuilt} re-evaluated, {written} files written, "
+          f"{len(sources) - rebuilt - len(errors)} unchanged ({elapsed:.2f} s)")
+    if errors:
+        sys.exit(1)
+
 
-    # Add placeholder questions
-    for i in range(min(3, config['questions'])):  # First 3 as examples
-        json_data["questions"].append({
-            "id": f"q{i+1}",
-            "text": {
-                "ru": f"TODO: Вопрос {i+1}",
-                "en": f"TODO: Question {i+1}"
-            },
-            "factor": config["factors"][i % len(config["factors"])],
-            "is_reversed": False,
-            "answers": extract_answers_standard_5point()
-        })
-
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(json_data, f, ensure_ascii=False, indent=2)
-
-    print(f"✅ Created placeholder: {filename}")
-    print(f"   ⚠️  Contains only {min(3, config['questions'])} sample questions")
-    print(f"   📝 TODO: Add remaining {config['questions'] - 3} questions\n")
-
-print("\n" + "="*60)
-print("✅ Placeholder JSON files created!")
-print("\nNext steps:")
-print("1. Run convert_tests.bat on Windows to auto-convert")
-print("2. OR manually copy questions from Dart files")
-print("3. OR use the legacy fallback (tests work as-is)")
-print("="*60)
+if __name__ == '__main__':
+    main()
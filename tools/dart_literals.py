@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+"""
+Evaluator for the constant Dart code that defines tests in lib/data/*_data.dart.
+
+Test data files build a TestModel from literals inside static methods:
+
+    static TestModel getStressTest() {
+      final answers = _getLikertAnswers();
+      return TestModel(id: 'stress_test', questions: [QuestionModel(...), ...]);
+    }
+
+This module tokenizes a Dart file, indexes the static methods and fields of
+its classes, and evaluates a method on demand. Supported are the forms the
+data files use: string literals (adjacent, triple-quoted, raw, with simple
+`$name` / `${name}` interpolation), numbers, booleans, null, list/map
+literals with `const` and type arguments, spreads, constructor calls with
+named arguments, enum values, local `final`/`var`/`const` variables,
+`return` and `=>` bodies, and calls to other static methods of the same
+class. Anything else raises DartEvalError with the file and line, so an
+unsupported construct never turns into silently wrong data.
+
+Constructor calls evaluate to DartObject (a dict of the arguments with the
+class name in .type); enum values to DartEnum.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<string>r?(?:'''.*?'''|\"\"\".*?\"\"\"|'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*"))
+  | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+  | (?P<ident>[A-Za-z_$][\w$]*)
+  | (?P<space>\s+)
+  | (?P<punct>\.\.\.|=>|\?\?|\?\.|[^\s])
+""", re.VERBOSE | re.DOTALL)
+
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+ESCAPE_PATTERN = re.compile(r"\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|.)", re.DOTALL)
+INTERPOLATION_PATTERN = re.compile(r"\$(?:\{\s*([A-Za-z_]\w*)\s*\}|([A-Za-z_]\w*))")
+
+MODIFIERS = {'static', 'const', 'final', 'var', 'late', 'external', 'abstract'}
+
+
+class DartEvalError(Exception):
+    """Construct the evaluator does not support, with its location"""
+
+
+class DartObject(dict):
+    """Result of a constructor call: named arguments plus the class name"""
+
+    def __init__(self, type_name: str, arguments: Dict[str, Any], positional: List[Any]):
+        super().__init__(arguments)
+        self.type = type_name
+        self.positional = positional
+
+
+class DartEnum(str):
+    """Enum value such as TestType.multiFactor (the str is the value name)"""
+
+    def __new__(cls, enum_name: str, value: str):
+        instance = super().__new__(cls, value)
+        instance.enum = enum_name
+        return instance
+
+
+class Token:
+    __slots__ = ('kind', 'value', 'start')
+
+    def __init__(self, kind: str, value: str, start: int):
+        self.kind = kind
+        self.value = value
+        self.start = start
+
+
+def tokenize(content: str) -> List[Token]:
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(content):
+        kind = match.lastgroup
+        if kind not in ('space', 'comment'):
+            tokens.append(Token(kind, match.group(), match.start()))
+    tokens.append(Token('eof', '', len(content)))
+    return tokens
+
+
+def decode_string(literal: str, scope: Optional[Dict[str, Any]] = None, where: str = '') -> str:
+    """Value of one Dart string literal token"""
+    raw = literal.startswith('r')
+    if raw:
+        literal = literal[1:]
+    quote = 3 if literal[:3] in ("'''", '"""') else 1
+    body = literal[quote:-quote]
+    if quote == 3 and body.startswith('\n'):
+        body = body[1:]  # Dart drops the first newline of a multi-line string
+    if raw:
+        return body
+
+    def interpolate(match):
+        name = match.group(1) or match.group(2)
+        if scope is None or name not in scope:
+            raise DartEvalError(f"{where}: cannot interpolate ${name}")
+        return str(scope[name])
+
+    # Interpolate before unescaping so `\$` stays a literal dollar
+    pieces = re.split(r"(\\.)", body, flags=re.DOTALL)
+    for i in range(0, len(pieces), 2):
+        pieces[i] = INTERPOLATION_PATTERN.sub(interpolate, pieces[i])
+    return ESCAPE_PATTERN.sub(_unescape, ''.join(pieces))
+
+
+def _unescape(match) -> str:
+    code = match.group(1)
+    if code.startswith('u{'):
+        return chr(int(code[2:-1], 16))
+    if code.startswith('u') and len(code) == 5:
+        return chr(int(code[1:], 16))
+    if code.startswith('x') and len(code) == 3:
+        return chr(int(code[1:], 16))
+    return ESCAPES.get(code, code)
+
+
+class Member:
+    """Static method or field of a class: token range of its body"""
+
+    def __init__(self, name: str, kind: str, params: List[str], start: int, end: int, return_type: str):
+        self.name = name
+        self.kind = kind  # 'block', 'arrow' or 'field'
+        self.params = params
+        self.start = start
+        self.end = end
+        self.return_type = return_type
+
+
+class DartFile:
+    """Tokenized Dart source with an index of class members"""
+
+    def __init__(self, content: str, path: str = '<string>'):
+        self.path = path
+        self.content = content
+        self.tokens = tokenize(content)
+        # class name -> member name -> Member ('' for top-level declarations)
+        self.classes: Dict[str, Dict[str, Member]] = {}
+        self._index()
+
+    def line(self, token_index: int) -> int:
+        return self.content.count('\n', 0, self.tokens[token_index].start) + 1
+
+    def where(self, token_index: int) -> str:
+        return f"{self.path}:{self.line(token_index)}"
+
+    # --- Indexing ---
+
+    def _match_brace(self, i: int) -> int:
+        """Index of the bracket closing tokens[i]"""
+        pairs = {'{': '}', '(': ')', '[': ']'}
+        opening = self.tokens[i].value
+        closing = pairs[opening]
+        depth = 0
+        while i < len(self.tokens):
+            value = self.tokens[i].value
+            if self.tokens[i].kind == 'punct':
+                if value == opening:
+                    depth += 1
+                elif value == closing:
+                    depth -= 1
+                    if depth == 0:
+                        return i
+            i += 1
+        raise DartEvalError(f"{self.path}: unbalanced '{opening}'")
+
+    def _statement_end(self, i: int) -> int:
+        """Index of the `;` ending the statement that starts at i"""
+        while self.tokens[i].value != ';':
+            if self.tokens[i].kind == 'punct' and self.tokens[i].value in '{([':
+                i = self._match_brace(i)
+            if self.tokens[i].kind == 'eof':
+                raise DartEvalError(f"{self.path}: missing ';'")
+            i += 1
+        return i
+
+    def _index(self):
+        tokens = self.tokens
+        i = 0
+        while tokens[i].kind != 'eof':
+            token = tokens[i]
+            if token.value in ('class', 'enum', 'extension', 'mixin') and tokens[i + 1].kind == 'ident':
+                name = tokens[i + 1].value
+                j = i + 2
+                while tokens[j].value != '{':
+                    j += 1
+                end = self._match_brace(j)
+                if token.value == 'class':
+                    self.classes[name] = self._members(j + 1, end)
+                i = end + 1
+            elif token.value in ('import', 'export', 'part', 'library'):
+                i = self._statement_end(i) + 1
+            else:
+                end = self._declaration(i, self.classes.setdefault('', {}))
+                i = end + 1 if end > i else i + 1
+
+    def _members(self, start: int, end: int) -> Dict[str, Member]:
+        members: Dict[str, Member] = {}
+        i = start
+        while i < end:
+            next_i = self._declaration(i, members)
+            i = next_i + 1 if next_i > i else i + 1
+        return members
+
+    def _declaration(self, i: int, members: Dict[str, Member]) -> int:
+        """Index a method or field declaration starting at i; returns its last token index"""
+        tokens = self.tokens
+        j = i
+        header: List[Token] = []
+        while tokens[j].kind != 'eof':
+            value = tokens[j].value
+            if tokens[j].kind == 'punct' and value in ('(', '=', ';', '{', '=>'):
+                break
+            if value == '<':
+                close = self._match_angle(j)
+                header.append(Token('type', ''.join(t.value for t in tokens[j:close + 1]), tokens[j].start))
+                j = close + 1
+                continue
+            header.append(tokens[j])
+            j += 1
+        names = [t for t in header if t.kind == 'ident' and t.value not in MODIFIERS]
+        if not names:
+            return self._skip(j)
+        name = names[-1].value
+        return_type = ''.join(t.value for t in header[:-1] if t.value not in MODIFIERS)
+        value = tokens[j].value
+
+        if value == '(':
+            close = self._match_brace(j)
+            params = [t.value for k, t in enumerate(tokens[j + 1:close], j + 1)
+                      if t.kind == 'ident' and tokens[k + 1].value in (',', ')', '}', ']', '=')]
+            body = close + 1
+            while tokens[body].value in ('async', 'sync', '*'):
+                body += 1
+            if tokens[body].value == '{':
+                end = self._match_brace(body)
+                members[name] = Member(name, 'block', params, body + 1, end, return_type)
+                return end
+            if tokens[body].value == '=>':
+                end = self._statement_end(body)
+                members[name] = Member(name, 'arrow', params, body + 1, end, return_type)
+                return end
+            return self._skip(body)
+        if value == '=':
+            end = self._statement_end(j)
+            members[name] = Member(name, 'field', [], j + 1, end, return_type)
+            return end
+        return self._skip(j)
+
+    def _skip(self, i: int) -> int:
+        if self.tokens[i].value == '{':
+            return self._match_brace(i)
+        if self.tokens[i].value == ';':
+            return i
+        return max(i - 1, 0) if self.tokens[i].kind == 'eof' else i
+
+    def _match_angle(self, i: int) -> int:
+        depth = 0
+        while True:
+            value = self.tokens[i].value
+            if value == '<':
+                depth += 1
+            elif value == '>':
+                depth -= 1
+                if depth == 0:
+                    return i
+            elif value in (';', '{', '(') or self.tokens[i].kind == 'eof':
+                return i - 1
+            i += 1
+
+    # --- Evaluation ---
+
+    def find_methods(self, return_type: str) -> List[Tuple[str, str]]:
+        """(class, method) of parameterless static methods returning return_type"""
+        return [
+            (class_name, member.name)
+            for class_name, members in self.classes.items()
+            for member in members.values()
+            if member.kind != 'field' and not member.params and member.return_type == return_type
+        ]
+
+    def call(self, class_name: str, name: str, arguments: Optional[List[Any]] = None) -> Any:
+        members = self.classes.get(class_name, {})
+        member = members.get(name)
+        if member is None:
+            raise DartEvalError(f"{self.path}: {class_name}.{name} not found")
+        return _Evaluator(self, class_name).member(member, arguments or [])
+
+
+class _Evaluator:
+    def __init__(self, dart_file: DartFile, class_name: str):
+        self.file = dart_file
+        self.tokens = dart_file.tokens
+        self.class_name = class_name
+        self.fields: Dict[str, Any] = {}
+
+    def error(self, i: int, message: str) -> DartEvalError:
+        return DartEvalError(f"{self.file.where(i)}: {message}")
+
+    def member(self, member: Member, arguments: List[Any]) -> Any:
+        if member.kind == 'field':
+            if member.name not in self.fields:
+                self.fields[member.name], _ = self.expression(member.start, {})
+            return self.fields[member.name]
+        if len(arguments) != len(member.params):
+            raise self.error(member.start, f"{member.name} expects {len(member.params)} arguments")
+        scope = dict(zip(member.params, arguments))
+        if member.kind == 'arrow':
+            value, _ = self.expression(member.start, scope)
+            return value
+        return self.block(member.start, member.end, scope)
+
+    def block(self, i: int, end: int, scope: Dict[str, Any]) -> Any:
+        tokens = self.tokens
+        while i < end:
+            value = tokens[i].value
+            if value == 'return':
+                result, i = self.expression(i + 1, scope)
+                return result
+            if value in ('final', 'var', 'const') or (tokens[i].kind == 'ident' and tokens[i + 1].kind in ('ident', 'punct')
+                                                      and self._is_typed_declaration(i)):
+                j = i
+                while tokens[j + 1].value != '=':
+                    j += 1
+                    if tokens[j].kind == 'eof' or tokens[j].value == ';':
+                        raise self.error(i, "unsupported declaration")
+                name = tokens[j].value
+                scope[name], i = self.expression(j + 2, scope)
+                if tokens[i].value != ';':
+                    raise self.error(i, "expected ';'")
+                i += 1
+                continue
+            raise self.error(i, f"unsupported statement starting with '{value}'")
+        raise self.error(end, "method has no return statement")
+
+    def _is_typed_declaration(self, i: int) -> bool:
+        """`Type name = ...` / `List<T> name = ...`"""
+        tokens = self.tokens
+        j = i + 1
+        if tokens[j].value == '<':
+            j = self.file._match_angle(j) + 1
+        if tokens[j].value == '?':
+            j += 1
+        return tokens[j].kind == 'ident' and tokens[j + 1].value == '='
+
+    def expression(self, i: int, scope: Dict[str, Any]) -> Tuple[Any, int]:
+        value, i = self.primary(i, scope)
+        while True:
+            token = self.tokens[i]
+            if token.value == '+' and token.kind == 'punct':
+                right, i = self.primary(i + 1, scope)
+                try:
+                    value = value + right
+                except TypeError:
+                    raise self.error(i, "unsupported '+' operands")
+            elif token.value == '??':
+                right, i = self.primary(i + 1, scope)
+                value = right if value is None else value
+            else:
+                return value, i
+
+    def primary(self, i: int, scope: Dict[str, Any]) -> Tuple[Any, int]:
+        tokens = self.tokens
+        token = tokens[i]
+
+        if token.value in ('const', 'new'):
+            return self.primary(i + 1, scope)
+        if token.kind == 'string':
+            parts = []
+            while tokens[i].kind == 'string':
+                parts.append(decode_string(tokens[i].value, scope, self.file.where(i)))
+                i += 1
+            return ''.join(parts), i
+        if token.kind == 'number':
+            number = float(token.value) if any(c in token.value for c in '.eE') else int(token.value)
+            return number, i + 1
+        if token.value == '-' and tokens[i + 1].kind == 'number':
+            value, i = self.primary(i + 1, scope)
+            return -value, i
+        if token.value == '<':
+            # Type arguments of a collection literal: <String>[...], <String, int>{...}
+            return self.primary(self.file._match_angle(i) + 1, scope)
+        if token.value == '[':
+            return self.collection(i, ']', scope)
+        if token.value == '{':
+            return self.collection(i, '}', scope)
+        if token.value == '(':
+            value, j = self.expression(i + 1, scope)
+            if tokens[j].value != ')':
+                raise self.error(j, "expected ')'")
+            return self.postfix(value, j + 1, scope)
+        if token.kind == 'ident':
+            return self.identifier(i, scope)
+        raise self.error(i, f"unsupported expression '{token.value}'")
+
+    def identifier(self, i: int, scope: Dict[str, Any]) -> Tuple[Any, int]:
+        tokens = self.tokens
+        name = tokens[i].value
+        if name in ('true', 'false'):
+            return name == 'true', i + 1
+        if name == 'null':
+            return None, i + 1
+
+        # Qualified name: Class.member, Enum.value, Class.named(...)
+        parts = [name]
+        j = i + 1
+        while tokens[j].value == '.' and tokens[j + 1].kind == 'ident':
+            parts.append(tokens[j + 1].value)
+            j += 2
+        if tokens[j].value == '<':  # generic call: List<T>.from / Foo<T>(...)
+            close = self.file._match_angle(j)
+            if tokens[close + 1].value in ('(', '.'):
+                j = close + 1
+
+        if tokens[j].value == '(':
+            arguments, named, j = self.arguments(j, scope)
+            return self.postfix(self.invoke(i, parts, arguments, named), j, scope)
+
+        if parts[0] in scope:
+            value = scope[parts[0]]
+            if len(parts) > 1:
+                raise self.error(i, f"unsupported member access {'.'.join(parts)}")
+            return self.postfix(value, j, scope)
+
+        members = self.file.classes.get(self.class_name, {})
+        if len(parts) == 1 and parts[0] in members and members[parts[0]].kind == 'field':
+            return self.postfix(self.member(members[parts[0]], []), j, scope)
+        if len(parts) == 2 and parts[0] in self.file.classes and parts[1] in self.file.classes[parts[0]]:
+            member = self.file.classes[parts[0]][parts[1]]
+            if member.kind == 'field':
+                return self.postfix(_Evaluator(self.file, parts[0]).member(member, []), j, scope)
+        if len(parts) == 2 and parts[0][:1].isupper():
+            return self.postfix(DartEnum(parts[0], parts[1]), j, scope)
+        raise self.error(i, f"unknown identifier {'.'.join(parts)}")
+
+    def invoke(self, i: int, parts: List[str], arguments: List[Any], named: Dict[str, Any]) -> Any:
+        members = self.file.classes.get(self.class_name, {})
+        if len(parts) == 1 and parts[0] in members and not named:
+            return self.member(members[parts[0]], arguments)
+        if len(parts) == 2 and parts[0] in self.file.classes and parts[1] in self.file.classes[parts[0]]:
+            return _Evaluator(self.file, parts[0]).member(self.file.classes[parts[0]][parts[1]], arguments)
+        if parts[0] in ('List', 'Map', 'Set') and len(parts) == 2 and parts[1] in ('from', 'of', 'unmodifiable'):
+            source = arguments[0]
+            return dict(source) if parts[0] == 'Map' else list(source)
+        if parts[0][:1].isupper():
+            return DartObject('.'.join(parts), named, arguments)
+        raise self.error(i, f"unsupported call {'.'.join(parts)}()")
+
+    def postfix(self, value: Any, i: int, scope: Dict[str, Any]) -> Tuple[Any, int]:
+        """Method calls on a value: .toList(), .cast<T>(), .sublist(a, b)"""
+        tokens = self.tokens
+        while tokens[i].value == '.' and tokens[i + 1].kind == 'ident':
+            method = tokens[i + 1].value
+            j = i + 2
+            if tokens[j].value == '<':
+                j = self.file._match_angle(j) + 1
+            if tokens[j].value != '(':
+                raise self.error(i, f"unsupported property .{method}")
+            arguments, named, j = self.arguments(j, scope)
+            if method in ('toList', 'cast') and isinstance(value, list):
+                value = list(value)
+            elif method == 'sublist' and isinstance(value, list):
+                value = value[arguments[0]:arguments[1] if len(arguments) > 1 else None]
+            else:
+                raise self.error(i, f"unsupported method .{method}()")
+            i = j
+        return value, i
+
+    def arguments(self, i: int, scope: Dict[str, Any]) -> Tuple[List[Any], Dict[str, Any], int]:
+        """Arguments of a call; tokens[i] is '('. Returns positional, named and the index after ')'"""
+        tokens = self.tokens
+        positional: List[Any] = []
+        named: Dict[str, Any] = {}
+        i += 1
+        while tokens[i].value != ')':
+            if tokens[i].kind == 'ident' and tokens[i + 1].value == ':':
+                named[tokens[i].value], i = self.expression(i + 2, scope)
+            else:
+                value, i = self.expression(i, scope)
+                positional.append(value)
+            if tokens[i].value == ',':
+                i += 1
+            elif tokens[i].value != ')':
+                raise self.error(i, f"expected ',' or ')' but found '{tokens[i].value}'")
+        return positional, named, i + 1
+
+    def collection(self, i: int, closing: str, scope: Dict[str, Any]) -> Tuple[Any, int]:
+        """List literal, map literal or set literal; tokens[i] is the opening bracket"""
+        tokens = self.tokens
+        items: List[Any] = []
+        entries: Dict[Any, Any] = {}
+        is_map = None
+        i += 1
+        while tokens[i].value != closing:
+            if tokens[i].value == '...':
+                value, i = self.expression(i + 1, scope)
+                if isinstance(value, dict):
+                    is_map = True
+                    entries.update(value)
+                else:
+                    items.extend(value)
+            else:
+                key, i = self.expression(i, scope)
+                if closing == '}' and tokens[i].value == ':':
+                    is_map = True
+                    entries[key], i = self.expression(i + 1, scope)
+                else:
+                    items.append(key)
+            if tokens[i].value == ',':
+                i += 1
+            elif tokens[i].value != closing:
+                raise self.error(i, f"expected ',' or '{closing}' but found '{tokens[i].value}'")
+        i += 1
+        if closing == ']':
+            return self.postfix(items, i, scope)
+        if is_map or not items:
+            return self.postfix(entries, i, scope)
+        return self.postfix(list(dict.fromkeys(items)), i, scope)  # set literal
+
+
+def parse_dart_file(path: str) -> DartFile:
+    with open(path, 'r', encoding='utf-8') as f:
+        return DartFile(f.read(), path)
+
+
+def evaluate_expression(source: str) -> Any:
+    """Value of a standalone constant expression, e.g. a map literal"""
+    dart_file = DartFile(f"final value = {source};")
+    return dart_file.call('', 'value')
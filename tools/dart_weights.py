@@ -0,0 +1,747 @@
+#!/usr/bin/env python3
+"""
+Shared parser and in-memory IR for Dart question weight files
+(lib/config/summary/question_weights/*_weights.dart).
+
+Every `'test:question': [const] QuestionWeight(...)` entry is parsed into a
+WeightEntry with its axisWeights, axisDirections, note, trailing comments
+of each axis line and the `//` comment block above the entry. A
+WeightFile indexes the entries by key and by test id.
+
+Edits (add/replace/remove an axis weight) are recorded as text patches
+against the original source and applied on save. Everything that was not
+edited keeps its exact formatting, line endings included, so writing back
+an unchanged file reproduces it byte for byte and the same edits always
+produce the same output.
+
+Parsed files are cached on disk by content hash (tools/.cache/weights_ir/),
+so a pipeline of several tools parses each weight file only once.
+
+edit_weight_files() runs an edit function over many files in a process
+pool, with atomic writes and an optional dry run that only prints diffs;
+the weight-editing tools use it for their directory / glob mode.
+
+Run as a script, it loads the files and checks that span edits round-trip
+(check_round_trip): rewritten and moved weights must re-parse to the same IR.
+
+Usage:
+    python tools/dart_weights.py [--no-cache] [paths or directories ...]
+"""
+
+import argparse
+import contextlib
+import difflib
+import glob
+import hashlib
+import io
+import os
+import pickle
+import re
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Bump when the IR layout or parsing rules change: invalidates the cache
+PARSER_VERSION = 1
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_WEIGHTS_DIR = os.path.join(REPO_ROOT, 'lib', 'config', 'summary', 'question_weights')
+DEFAULT_CACHE_DIR = os.path.join(REPO_ROOT, 'tools', '.cache', 'weights_ir')
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<comment>//[^\n]*)
+  | (?P<string>'(?:\\.|[^'\\\n])*'|"(?:\\.|[^"\\\n])*")
+  | (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<ident>[A-Za-z_]\w*)
+  | (?P<space>\s+)
+  | (?P<punct>.)
+""", re.VERBOSE)
+
+MAP_DECLARATION = ['Map', '<', 'String', ',', 'QuestionWeight', '>']
+
+# Process-wide counters, reported by the CLI and by tools that use the module
+STATS = {'parsed': 0, 'memory_hits': 0, 'disk_hits': 0}
+_MEMORY_CACHE: Dict[str, bytes] = {}
+
+
+@dataclass
+class Token:
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+class DartMap(dict):
+    """Parsed map literal with source offsets of its braces and items"""
+
+    def __init__(self):
+        super().__init__()
+        self.open = -1
+        self.close = -1
+        # key -> (key start, value start, value end, item end incl. comma and trailing comment)
+        self.spans: Dict[str, Tuple[int, int, int, int]] = {}
+        self.comments: Dict[str, str] = {}
+
+
+@dataclass
+class AxisSpan:
+    """Where one `'scale': value,` item of a map sits in the source"""
+    key_start: int
+    value_start: int
+    value_end: int
+    item_end: int
+
+
+@dataclass
+class WeightEntry:
+    """One QuestionWeight entry of a weights map"""
+    key: str
+    test_id: str
+    question_id: str
+    map_name: Optional[str] = None
+    comments: List[str] = field(default_factory=list)
+    axis_weights: Dict[str, float] = field(default_factory=dict)
+    axis_comments: Dict[str, str] = field(default_factory=dict)
+    axis_directions: Optional[Dict[str, int]] = None
+    note: Optional[str] = None
+    start: int = -1
+    end: int = -1
+    axis_open: int = -1
+    axis_close: int = -1
+    axis_spans: Dict[str, AxisSpan] = field(default_factory=dict)
+    directions_spans: Dict[str, AxisSpan] = field(default_factory=dict)
+
+    @property
+    def comment_text(self) -> str:
+        """Preceding comment block as plain text"""
+        return ' '.join(line.lstrip('/').strip() for line in self.comments)
+
+
+class WeightFile:
+    """Parsed weights file: entries in source order plus indexes and pending edits"""
+
+    def __init__(self, path: str, content: str, entries: List[WeightEntry], maps: List[str]):
+        self.path = path
+        self.content = content
+        self.content_hash = content_hash(content)
+        self.newline = '\r\n' if '\r\n' in content else '\n'
+        self.entries = entries
+        self.maps = maps
+        self.index: Dict[str, WeightEntry] = {entry.key: entry for entry in entries}
+        self.by_test: Dict[str, List[WeightEntry]] = {}
+        for entry in entries:
+            self.by_test.setdefault(entry.test_id, []).append(entry)
+        self._edits: List[Tuple[int, int, int, str]] = []
+        self.cache_dir: Optional[str] = None
+
+    @property
+    def changed(self) -> bool:
+        return bool(self._edits)
+
+    # --- Edits ---
+
+    def set_axis_weight(self, entry: WeightEntry, scale_id: str, weight: float):
+        """Change an existing weight or add a new one"""
+        span = entry.axis_spans.get(scale_id)
+        if span is None:
+            self.add_axis_weights(entry, {scale_id: weight})
+            return
+        self._edit(span.value_start, span.value_end, format_number(weight))
+        entry.axis_weights[scale_id] = float(weight)
+
+    def add_axis_weights(
+        self,
+        entry: WeightEntry,
+        weights: Dict[str, float],
+        header: Optional[str] = None,
+        comments: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Append weights before the `}` closing axisWeights, in the given order.
+        header is an optional `// ...` line written above them.
+        """
+        weights = {k: v for k, v in weights.items() if k not in entry.axis_weights}
+        if not weights or entry.axis_close < 0:
+            return
+        comments = comments or {}
+
+        lines = [header] if header else []
+        for scale_id, weight in weights.items():
+            comment = comments.get(scale_id)
+            lines.append(f"'{scale_id}': {format_number(weight)}," + (f" // {comment}" if comment else ''))
+
+        content, newline = self.content, self.newline
+        line_start = content.rfind('\n', 0, entry.axis_close) + 1
+        closing_prefix = content[line_start:entry.axis_close]
+        if closing_prefix.strip():
+            # Inline map: `axisWeights: {'a': 1.0},` - break it into lines
+            indent = closing_prefix[:len(closing_prefix) - len(closing_prefix.lstrip())]
+            comma = '' if content[:entry.axis_close].rstrip().endswith((',', '{')) else ','
+            text = comma + newline + ''.join(f"{indent}  {line}{newline}" for line in lines) + indent
+            self._edit(entry.axis_close, entry.axis_close, text)
+        else:
+            text = ''.join(f"{closing_prefix}  {line}{newline}" for line in lines)
+            self._edit(line_start, line_start, text)
+
+        entry.axis_weights.update({k: float(v) for k, v in weights.items()})
+        entry.axis_comments.update({k: v for k, v in comments.items() if k in weights})
+
+    def remove_axis_weight(self, entry: WeightEntry, scale_id: str) -> bool:
+        """Remove a weight (its whole line when it has one to itself)"""
+        span = entry.axis_spans.pop(scale_id, None)
+        if span is None:
+            return False
+        self._remove_item(span)
+        entry.axis_weights.pop(scale_id, None)
+        entry.axis_comments.pop(scale_id, None)
+        return True
+
+    def remove_axis_direction(self, entry: WeightEntry, scale_id: str) -> bool:
+        """Remove an axisDirections item"""
+        span = entry.directions_spans.pop(scale_id, None)
+        if span is None or entry.axis_directions is None:
+            return False
+        self._remove_item(span)
+        entry.axis_directions.pop(scale_id, None)
+        return True
+
+    def _remove_item(self, span: AxisSpan):
+        content = self.content
+        line_start = content.rfind('\n', 0, span.key_start) + 1
+        line_end = content.find('\n', span.item_end)
+        line_end = len(content) if line_end < 0 else line_end + 1
+        alone = not content[line_start:span.key_start].strip() and not content[span.item_end:line_end].strip()
+        if alone:
+            self._edit(line_start, line_end, '')
+        else:
+            self._edit(span.key_start, span.item_end, '')
+
+    def _edit(self, start: int, end: int, text: str):
+        self._edits.append((start, end, len(self._edits), text))
+
+    # --- Output ---
+
+    def render(self) -> str:
+        """Source with all pending edits applied"""
+        pieces = []
+        last = 0
+        for start, end, _, text in sorted(self._edits):
+            if start < last:
+                raise ValueError(f"Overlapping edits in {self.path} at offset {start}")
+            pieces.append(self.content[last:start])
+            pieces.append(text)
+            last = end
+        pieces.append(self.content[last:])
+        return ''.join(pieces)
+
+    def diff(self) -> str:
+        """Unified diff of the pending edits"""
+        name = os.path.relpath(os.path.abspath(self.path), REPO_ROOT)
+        if name.startswith('..'):
+            name = os.path.abspath(self.path).lstrip(os.sep)
+        name = name.replace(os.sep, '/')
+        return ''.join(difflib.unified_diff(
+            self.content.splitlines(keepends=True),
+            self.render().splitlines(keepends=True),
+            fromfile=f"a/{name}",
+            tofile=f"b/{name}",
+        ))
+
+    def save(self, path: Optional[str] = None) -> bool:
+        """
+        Write the file if it has edits (or to a different path).
+        The new content goes to a temporary file that then replaces the
+        target, so an interrupted run never leaves a half-written file.
+        Afterwards the object reflects the written content and can be edited again.
+        """
+        target = path or self.path
+        if not self._edits and target == self.path:
+            return False
+
+        rendered = self.render()
+        directory = os.path.dirname(os.path.abspath(target))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(target), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+                f.write(rendered)
+            if os.path.exists(target):
+                shutil.copymode(target, tmp_path)
+            os.replace(tmp_path, target)
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.remove(tmp_path)
+            raise
+
+        fresh = load_weight_source(rendered, target, self.cache_dir)
+        self.__dict__.update(fresh.__dict__)
+        return True
+
+
+def content_hash(content: str) -> str:
+    return hashlib.sha256(f"{PARSER_VERSION}\0{content}".encode('utf-8')).hexdigest()
+
+
+def format_number(value: float) -> str:
+    """Dart double literal (1 -> 1.0, 0.25 -> 0.25)"""
+    return repr(float(value))
+
+
+def unquote(literal: str) -> str:
+    """Value of a Dart string literal"""
+    return re.sub(r"\\(.)", r"\1", literal[1:-1])
+
+
+def tokenize(content: str) -> List[Token]:
+    """Split Dart source into significant tokens (comments kept, whitespace dropped)"""
+    return [
+        Token(match.lastgroup, match.group(), match.start(), match.end())
+        for match in TOKEN_PATTERN.finditer(content)
+        if match.lastgroup != 'space'
+    ]
+
+
+# --- Parsing ---
+
+class _Parser:
+    """Recursive-descent reader of the Dart literals used in weight files"""
+
+    def __init__(self, content: str):
+        self.content = content
+        self.tokens = tokenize(content)
+
+    def entries(self) -> Tuple[List[WeightEntry], List[str]]:
+        tokens = self.tokens
+        entries: List[WeightEntry] = []
+        maps: List[str] = []
+        comments: List[str] = []
+        current_class: Optional[str] = None
+        current_map: Optional[str] = None
+        depth = 0
+
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token.kind == 'comment':
+                comments.append(token.value)
+                i += 1
+                continue
+
+            body = self._entry_body_start(i)
+            if body is not None:
+                entry, i = self._entry(i, body, comments, current_map)
+                entries.append(entry)
+                comments = []
+                continue
+
+            value = token.value
+            if value == 'class' and i + 1 < len(tokens):
+                current_class = tokens[i + 1].value
+            elif value == 'Map' and [t.value for t in tokens[i:i + 6]] == MAP_DECLARATION and i + 6 < len(tokens):
+                name = tokens[i + 6].value
+                current_map = f"{current_class}.{name}" if current_class and depth > 0 else name
+                maps.append(current_map)
+            elif value == '{':
+                depth += 1
+            elif value == '}':
+                depth -= 1
+                if depth == 0:
+                    current_class = None
+
+            comments = []
+            i += 1
+
+        return entries, maps
+
+    def _entry_body_start(self, i: int) -> Optional[int]:
+        """Index after `(` if tokens[i] starts `'key': [const] QuestionWeight(`"""
+        tokens = self.tokens
+        if tokens[i].kind != 'string':
+            return None
+        values = [t.value for t in tokens[i + 1:i + 5]]
+        if values[:1] != [':']:
+            return None
+        if values[1:4] == ['const', 'QuestionWeight', '(']:
+            return i + 5
+        if values[1:3] == ['QuestionWeight', '(']:
+            return i + 4
+        return None
+
+    def _entry(self, i: int, body: int, comments: List[str], map_name: Optional[str]) -> Tuple[WeightEntry, int]:
+        tokens = self.tokens
+        key = unquote(tokens[i].value)
+        arguments: Dict[str, object] = {}
+        j = body
+        while j < len(tokens) and tokens[j].value != ')':
+            if tokens[j].kind == 'comment' or tokens[j].value == ',':
+                j += 1
+                continue
+            name = tokens[j].value
+            arguments[name], j = self._value(j + 2)  # skip `name :`
+
+        test_id, _, question_id = key.partition(':')
+        entry = WeightEntry(
+            key=key,
+            test_id=str(arguments.get('testId', test_id)),
+            question_id=str(arguments.get('questionId', question_id)),
+            map_name=map_name,
+            comments=comments,
+            start=tokens[i].start,
+            end=tokens[j].end if j < len(tokens) else len(self.content),
+        )
+
+        axis = arguments.get('axisWeights')
+        if isinstance(axis, DartMap):
+            entry.axis_weights = {k: float(v) for k, v in axis.items()}
+            entry.axis_comments = dict(axis.comments)
+            entry.axis_open, entry.axis_close = axis.open, axis.close
+            entry.axis_spans = {k: AxisSpan(*span) for k, span in axis.spans.items()}
+
+        directions = arguments.get('axisDirections')
+        if isinstance(directions, DartMap):
+            entry.axis_directions = {k: int(v) for k, v in directions.items()}
+            entry.directions_spans = {k: AxisSpan(*span) for k, span in directions.spans.items()}
+
+        note = arguments.get('note')
+        if isinstance(note, str):
+            entry.note = note
+
+        return entry, j + 1
+
+    def _value(self, i: int):
+        """Parse a Dart literal starting at tokens[i]; returns (value, next index)"""
+        tokens = self.tokens
+        while tokens[i].kind == 'comment':
+            i += 1
+        token = tokens[i]
+
+        if token.kind == 'string':
+            parts = []
+            # Adjacent string literals are concatenated in Dart
+            while i < len(tokens) and tokens[i].kind == 'string':
+                parts.append(unquote(tokens[i].value))
+                i += 1
+            return ''.join(parts), i
+        if token.kind == 'number':
+            number = float(token.value)
+            return (int(number) if number.is_integer() and '.' not in token.value else number), i + 1
+        if token.value == 'const':
+            return self._value(i + 1)
+        if token.value == '{':
+            return self._map(i)
+        if token.value == '[':
+            items = []
+            i += 1
+            while tokens[i].value != ']':
+                if tokens[i].kind == 'comment' or tokens[i].value == ',':
+                    i += 1
+                    continue
+                item, i = self._value(i)
+                items.append(item)
+            return items, i + 1
+        if token.kind == 'ident':
+            # Identifier, qualified name or constructor call: keep the identifier
+            i += 1
+            while i < len(tokens) and tokens[i].value == '.':
+                i += 2
+            if i < len(tokens) and tokens[i].value == '(':
+                depth = 0
+                while True:
+                    depth += {'(': 1, ')': -1}.get(tokens[i].value, 0)
+                    i += 1
+                    if depth == 0:
+                        break
+            return token.value, i
+        raise ValueError(f"Unexpected token {token.value!r} at offset {token.start}")
+
+    def _map(self, i: int) -> Tuple[DartMap, int]:
+        tokens, content = self.tokens, self.content
+        result = DartMap()
+        result.open = tokens[i].start
+        i += 1
+        while tokens[i].value != '}':
+            if tokens[i].kind == 'comment' or tokens[i].value == ',':
+                i += 1
+                continue
+            key_token = tokens[i]
+            key, i = self._value(i)
+            value_token = tokens[i + 1]
+            value, i = self._value(i + 1)  # skip `:`
+            value_end = tokens[i - 1].end
+            item_end = value_end
+            if tokens[i].value == ',':
+                item_end = tokens[i].end
+                i += 1
+            # Comment on the same line belongs to this item
+            if tokens[i].kind == 'comment' and '\n' not in content[item_end:tokens[i].start]:
+                result.comments[key] = tokens[i].value[2:].strip()
+                item_end = tokens[i].end
+                i += 1
+            result[key] = value
+            result.spans[key] = (key_token.start, value_token.start, value_end, item_end)
+        result.close = tokens[i].start
+        return result, i + 1
+
+
+def parse_weight_source(content: str, path: str = '<string>') -> WeightFile:
+    """Parse weights file source (no caching)"""
+    entries, maps = _Parser(content).entries()
+    STATS['parsed'] += 1
+    return WeightFile(path, content, entries, maps)
+
+
+# --- Loading with cache ---
+
+def load_weight_file(path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> WeightFile:
+    """
+    Parse a weights file, reusing a cached IR when the content is unchanged.
+    cache_dir=None disables the on-disk cache (the in-process cache stays).
+    """
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        content = f.read()
+    return load_weight_source(content, path, cache_dir)
+
+
+def load_weight_source(content: str, path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> WeightFile:
+    """Same as load_weight_file for source text that is already in memory"""
+    digest = content_hash(content)
+
+    payload = _MEMORY_CACHE.get(digest)
+    if payload is not None:
+        STATS['memory_hits'] += 1
+    elif cache_dir:
+        try:
+            with open(os.path.join(cache_dir, f"{digest}.pickle"), 'rb') as f:
+                payload = f.read()
+            STATS['disk_hits'] += 1
+        except OSError:
+            payload = None
+
+    if payload is not None:
+        # Cache files are written only by this module from local sources
+        entries, maps = pickle.loads(payload)
+        weight_file = WeightFile(path, content, entries, maps)
+    else:
+        weight_file = parse_weight_source(content, path)
+        payload = pickle.dumps((weight_file.entries, weight_file.maps), protocol=pickle.HIGHEST_PROTOCOL)
+        _MEMORY_CACHE[digest] = payload
+        if cache_dir:
+            _write_cache(cache_dir, digest, payload)
+
+    weight_file.cache_dir = cache_dir
+    return weight_file
+
+
+def _write_cache(cache_dir: str, digest: str, payload: bytes):
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, os.path.join(cache_dir, f"{digest}.pickle"))
+    except OSError:
+        pass  # the cache is an optimization only
+
+
+def weight_file_paths(targets: Iterable[str] = ()) -> List[str]:
+    """Expand files, directories (all *_weights.dart) and glob patterns into sorted paths"""
+    targets = list(targets) or [DEFAULT_WEIGHTS_DIR]
+    paths = []
+    for target in targets:
+        if os.path.isdir(target):
+            paths.extend(glob.glob(os.path.join(target, '*_weights.dart')))
+        elif any(ch in target for ch in '*?['):
+            paths.extend(glob.glob(target, recursive=True))
+        else:
+            paths.append(target)
+    return sorted(dict.fromkeys(paths))
+
+
+def load_weight_files(targets: Iterable[str] = (), cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> List[WeightFile]:
+    """Parse every weights file among the targets (default: the whole weights directory)"""
+    return [load_weight_file(path, cache_dir) for path in weight_file_paths(targets)]
+
+
+# --- Batch editing ---
+
+def add_batch_arguments(parser: argparse.ArgumentParser, default_targets: Iterable[str] = ()):
+    """Standard CLI of the weight-editing tools: targets, --jobs, --dry-run"""
+    default_targets = list(default_targets)
+    default_help = ', '.join(os.path.relpath(t, REPO_ROOT) for t in default_targets) if default_targets else None
+    parser.add_argument('targets', nargs='*' if default_targets else '+', default=default_targets,
+                        help="Weight files, directories (all *_weights.dart) or globs"
+                             + (f" (default: {default_help})" if default_help else ''))
+    parser.add_argument('-j', '--jobs', type=int, default=0, help="Worker processes (default: one per core)")
+    parser.add_argument('--dry-run', action='store_true', help="Print unified diffs instead of writing files")
+
+
+def edit_weight_files(
+    edit: Callable[[WeightFile], int],
+    targets: Iterable[str] = (),
+    jobs: int = 0,
+    dry_run: bool = False,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+) -> List[Dict]:
+    """
+    Apply edit(weight_file) -> number of changes to every target file.
+
+    Files are processed in a process pool (jobs=0: one worker per core) and
+    saved atomically unless dry_run is set. edit must be a module-level
+    function so it can be sent to the workers. Whatever it prints is
+    captured and returned with the file's result, so output is not
+    interleaved between files.
+    """
+    paths = weight_file_paths(targets)
+    worker = partial(_edit_file, edit, dry_run=dry_run, cache_dir=cache_dir)
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+    if jobs <= 1:
+        return [worker(path) for path in paths]
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(worker, paths))
+
+
+def _edit_file(edit: Callable[[WeightFile], int], path: str, dry_run: bool, cache_dir: Optional[str]) -> Dict:
+    result = {'path': path, 'entries': 0, 'changes': 0, 'written': False, 'parsed': False,
+              'diff': '', 'log': '', 'error': None, 'parse_seconds': 0.0, 'total_seconds': 0.0}
+    started = time.perf_counter()
+    log = io.StringIO()
+    try:
+        parsed_before = STATS['parsed']
+        weight_file = load_weight_file(path, cache_dir)
+        result['parse_seconds'] = time.perf_counter() - started
+        result['parsed'] = STATS['parsed'] > parsed_before
+        result['entries'] = len(weight_file.entries)
+        with contextlib.redirect_stdout(log):
+            result['changes'] = edit(weight_file) or 0
+        if dry_run:
+            result['diff'] = weight_file.diff()
+        else:
+            result['written'] = weight_file.save()
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['log'] = log.getvalue()
+    result['total_seconds'] = time.perf_counter() - started
+    return result
+
+
+def print_edit_report(results: List[Dict], dry_run: bool = False, wall_seconds: Optional[float] = None) -> bool:
+    """Captured output, diffs and the per-file timing summary; returns False if any file failed"""
+    for result in results:
+        if result['log']:
+            print(result['log'], end='')
+        if result['diff']:
+            print(result['diff'], end='')
+
+    print(f"\n{'file':<48}{'entries':>9}{'changes':>9}{'parse ms':>10}{'total ms':>10}  status")
+    print('-' * 96)
+    for result in results:
+        name = os.path.basename(result['path'])
+        if result['error']:
+            status = f"❌ {result['error']}"
+        elif result['written']:
+            status = 'written'
+        elif dry_run and result['diff']:
+            status = 'would change'
+        else:
+            status = 'unchanged'
+        source = 'parsed' if result['parsed'] else 'cached'
+        print(f"{name:<48}{result['entries']:>9}{result['changes']:>9}"
+              f"{result['parse_seconds'] * 1000:>10.2f}{result['total_seconds'] * 1000:>10.2f}  {status} ({source})")
+    print('-' * 96)
+    failed = sum(1 for r in results if r['error'])
+    changed = sum(1 for r in results if r['written'] or (dry_run and r['diff']))
+    cpu = sum(r['total_seconds'] for r in results)
+    print(f"{'total':<48}{sum(r['entries'] for r in results):>9}{sum(r['changes'] for r in results):>9}"
+          f"{sum(r['parse_seconds'] for r in results) * 1000:>10.2f}{cpu * 1000:>10.2f}")
+    summary = f"{len(results)} files, {changed} {'would change' if dry_run else 'changed'}, {failed} failed"
+    if wall_seconds is not None:
+        summary += f", wall time {wall_seconds * 1000:.1f} ms"
+    print(f"\n{'🔍' if dry_run else '✅'} {summary}")
+    return not failed
+
+
+def _weights_ir(weight_file: WeightFile, moved: Iterable[str] = ()) -> Tuple:
+    """Maps and entries with ordered axis items; entries in `moved` have their first item last"""
+    moved = set(moved)
+    entries = []
+    for e in weight_file.entries:
+        items = list(e.axis_weights.items())
+        if e.key in moved:
+            items = items[1:] + items[:1]
+        entries.append((e.key, e.map_name, items, e.axis_directions))
+    return weight_file.maps, entries
+
+
+def check_round_trip(weight_file: WeightFile) -> List[str]:
+    """
+    Edit a fresh parse of the file through its spans, re-parse the rendered
+    source and compare the IR with weight_file (which may come from the cache):
+
+      rewrite   every axis weight set to its own value (format_number text)
+      move      the first axis weight of every entry removed and added back,
+                so it must come back once, as the last item
+    """
+    rewritten = parse_weight_source(weight_file.content, weight_file.path)
+    for entry in rewritten.entries:
+        for scale_id, weight in list(entry.axis_weights.items()):
+            rewritten.set_axis_weight(entry, scale_id, weight)
+
+    moved = parse_weight_source(weight_file.content, weight_file.path)
+    moved_keys = []
+    for entry in moved.entries:
+        if len(entry.axis_spans) > 1 and entry.axis_close >= 0:
+            scale_id = next(iter(entry.axis_spans))
+            if moved.content.count(f"'{scale_id}':", entry.axis_open, entry.axis_close) > 1:
+                # Duplicate key in the literal (the last one wins): the spans only know one of them
+                continue
+            weight = entry.axis_weights[scale_id]
+            moved.remove_axis_weight(entry, scale_id)
+            moved.add_axis_weights(entry, {scale_id: weight})
+            moved_keys.append(entry.key)
+
+    problems = []
+    for name, edited, expected in (('rewrite', rewritten, _weights_ir(weight_file)),
+                                   ('move', moved, _weights_ir(weight_file, moved_keys))):
+        try:
+            if _weights_ir(parse_weight_source(edited.render(), weight_file.path)) != expected:
+                problems.append(f"{name}: re-parsed weights differ")
+        except ValueError as e:
+            problems.append(f"{name}: {e}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse Dart question weight files and check round-trip")
+    parser.add_argument('targets', nargs='*', help="Files, directories or globs (default: question_weights/)")
+    parser.add_argument('--no-cache', action='store_true', help="Ignore the on-disk IR cache")
+    args = parser.parse_args()
+
+    cache_dir = None if args.no_cache else DEFAULT_CACHE_DIR
+    started = time.perf_counter()
+    files = load_weight_files(args.targets, cache_dir)
+    elapsed = time.perf_counter() - started
+    loaded = dict(STATS)
+
+    failures = 0
+    for weight_file in files:
+        for problem in check_round_trip(weight_file):
+            failures += 1
+            print(f"❌ Round-trip mismatch: {weight_file.path} ({problem})")
+
+    entries = sum(len(f.entries) for f in files)
+    axes = sum(len(e.axis_weights) for f in files for e in f.entries)
+    print(f"✅ {len(files)} files, {entries} entries, {axes} axis weights in {elapsed * 1000:.1f} ms")
+    print(f"   parsed: {loaded['parsed']}, cache hits: {loaded['disk_hits']}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    # Run through the importable module so cached IR refers to dart_weights.* classes
+    import dart_weights
+    dart_weights.main()
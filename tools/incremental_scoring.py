@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Incremental personality type scoring: update a user's aggregate when one test changes.
+
+SummaryService recomputes scaleScores / scaleWeights over every completed
+test each time. A UserScaleState keeps those running sums instead and
+applies each change as a delta, with the app's semantics: TestProvider
+appends every attempt (a retake is one more result, and SummaryService
+sums all of them, see batch_scoring), and deleteTestResult removes one
+attempt. add() and delete() mirror those and cost O(questions of that
+test) and O(8).
+
+replace() is a deliberate departure from the app: it drops the earlier
+attempts of a test before adding the new one (latest attempt only). The
+app's results differ from it as soon as a test is retaken.
+
+Besides the float sums, each scale keeps two integer counters: how many
+weighted answers feed it and how many of those contributed a non-zero
+score. The Dart code branches on `scaleWeights > 0` and on scale scores
+being exactly 0, and subtraction can leave 1e-16 residue where a full
+recompute gives 0. The counters make those branches exact.
+
+--check runs a randomized property check: random sequences of completions,
+retakes, deletions and replacements, comparing the incremental state with
+a full recompute (batch_scoring.reference_scores) of the same attempt list
+after every step, i.e. what the app would score for add / delete.
+
+Usage:
+    python tools/incremental_scoring.py --check [--seeds 200] [--steps 60]
+    python tools/incremental_scoring.py --benchmark
+"""
+
+import argparse
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from batch_scoring import (
+    FACTOR_MAX, FACTOR_PREFIX, PERSONALITY_TYPE_SCALES, ScoringModel, personality_type_result, reference_scores,
+)
+from weight_matrix import WeightMatrix, compiled_weight_matrix
+
+
+class TestContribution:
+    """What one attempt of one test adds to the 8 scale accumulators"""
+    __slots__ = ('scores', 'weights', 'answered', 'nonzero')
+
+    def __init__(self, scores: np.ndarray, weights: np.ndarray, answered: np.ndarray, nonzero: np.ndarray):
+        self.scores = scores
+        self.weights = weights
+        self.answered = answered
+        self.nonzero = nonzero
+
+
+def test_contribution(model: ScoringModel, test_id: str, answers: Dict[str, int]) -> Optional[TestContribution]:
+    """Contribution of one test's answers, or None if none of them is weighted"""
+    rows = model.test_rows.get(test_id)
+    if not rows or not answers:
+        return None
+    indices = []
+    values = []
+    for question_id, score in answers.items():
+        row = rows.get(question_id)
+        if row is not None:
+            indices.append(row)
+            values.append(score)
+    if not indices:
+        return None
+
+    weights = model.weights[indices]
+    normalized = np.asarray(values, dtype=np.float64) / model.divisors[indices]
+    contributions = normalized[:, None] * weights
+    return TestContribution(
+        scores=contributions.sum(axis=0),
+        weights=weights.sum(axis=0),
+        answered=np.count_nonzero(weights > 0, axis=0),
+        nonzero=np.count_nonzero(contributions > 0, axis=0),
+    )
+
+
+class UserScaleState:
+    """Running scaleScores / scaleWeights of one user, updated per attempt"""
+
+    def __init__(self, model: ScoringModel):
+        self.model = model
+        size = len(PERSONALITY_TYPE_SCALES)
+        self.scale_scores = np.zeros(size)
+        self.scale_weights = np.zeros(size)
+        self.answered = np.zeros(size, dtype=np.int64)
+        self.nonzero = np.zeros(size, dtype=np.int64)
+        # attempt id -> (test id, contribution or None when nothing in it is weighted)
+        self.attempts: Dict[int, Tuple[str, Optional[TestContribution]]] = {}
+        self._next_attempt = 0
+
+    def add(self, test_id: str, answers: Dict[str, int]) -> int:
+        """Record a completed attempt, as TestProvider.saveTestResult does; returns its id"""
+        contribution = test_contribution(self.model, test_id, answers)
+        if contribution is not None:
+            self.scale_scores += contribution.scores
+            self.scale_weights += contribution.weights
+            self.answered += contribution.answered
+            self.nonzero += contribution.nonzero
+        attempt = self._next_attempt
+        self._next_attempt += 1
+        self.attempts[attempt] = (test_id, contribution)
+        return attempt
+
+    def delete(self, attempt: int):
+        """Forget one attempt, as TestProvider.deleteTestResult does"""
+        _, contribution = self.attempts.pop(attempt)
+        if contribution is None:
+            return
+        self.scale_scores -= contribution.scores
+        self.scale_weights -= contribution.weights
+        self.answered -= contribution.answered
+        self.nonzero -= contribution.nonzero
+        # Nothing left on a scale: drop the subtraction residue
+        self.scale_scores[self.nonzero == 0] = 0.0
+        self.scale_weights[self.answered == 0] = 0.0
+
+    def replace(self, test_id: str, answers: Dict[str, int]) -> int:
+        """Latest attempt only: delete the test's earlier attempts, then add (not what the app does)"""
+        for attempt in [a for a, (t, _) in self.attempts.items() if t == test_id]:
+            self.delete(attempt)
+        return self.add(test_id, answers)
+
+    def sums(self) -> Tuple[Dict[str, float], Dict[str, float]]:
+        return (dict(zip(PERSONALITY_TYPE_SCALES, self.scale_scores.tolist())),
+                dict(zip(PERSONALITY_TYPE_SCALES, self.scale_weights.tolist())))
+
+    def result(self) -> Dict:
+        """Same shape as batch_scoring.reference_scores"""
+        return personality_type_result(*self.sums())
+
+
+# --- Property check ---
+
+def _random_answers(rng: random.Random, questions: List[str]) -> Dict[str, int]:
+    answers = {}
+    for question_id in questions:
+        if rng.random() < 0.1:
+            continue
+        high = int(FACTOR_MAX) if question_id.startswith(FACTOR_PREFIX) else 4
+        # Plenty of zeros: all-zero tests exercise the exact-zero branches
+        answers[question_id] = 0 if rng.random() < 0.3 else rng.randint(0, high)
+    return answers
+
+
+def _same_result(actual: Dict, expected: Dict, tolerance: float) -> bool:
+    for group in ('typeScales', 'bipolarPercentages'):
+        for name, value in expected[group].items():
+            if abs(actual[group][name] - value) > tolerance:
+                return False
+    if actual['personalityType'] != expected['personalityType']:
+        # A percentage within rounding error of 50 may legitimately flip to or from 'X'
+        return any(abs(value - 50) <= tolerance for value in expected['bipolarPercentages'].values())
+    return True
+
+
+def check_equivalence(matrix: WeightMatrix, seeds: int, steps: int, tolerance: float = 1e-9) -> int:
+    """Random operation sequences; returns the number of failing seeds"""
+    model = ScoringModel(matrix)
+    all_weights = {key: matrix.row(key) for key in matrix.questions}
+    tests: Dict[str, List[str]] = {}
+    for key in matrix.questions:
+        test_id, question_id = key.split(':', 1)
+        tests.setdefault(test_id, []).append(question_id)
+    # Mostly tests with personality type weights, plus a few without any
+    test_ids = sorted(model.test_rows) + sorted(set(tests) - set(model.test_rows))[:3] + ['unknown_test']
+
+    failures = 0
+    for seed in range(seeds):
+        rng = random.Random(seed)
+        state = UserScaleState(model)
+        # The app's completed-tests list: every attempt, in order, with the state's attempt ids
+        attempts: List[Tuple[int, Dict]] = []
+        history = []
+        for step in range(steps):
+            test_id = rng.choice(test_ids)
+            operation = rng.random()
+            if attempts and operation < 0.2:
+                attempt, result = attempts.pop(rng.randrange(len(attempts)))
+                history.append(('delete', result['testId']))
+                state.delete(attempt)
+            else:
+                answers = _random_answers(rng, tests.get(test_id, ['q1', 'q2']))
+                taken = any(result['testId'] == test_id for _, result in attempts)
+                if taken and operation < 0.3:
+                    history.append(('replace', test_id))
+                    attempts = [(a, result) for a, result in attempts if result['testId'] != test_id]
+                    attempt = state.replace(test_id, answers)
+                else:
+                    history.append(('retake' if taken else 'complete', test_id))
+                    attempt = state.add(test_id, answers)
+                attempts.append((attempt, {'testId': test_id, 'userAnswers': answers}))
+
+            expected = reference_scores([result for _, result in attempts], all_weights)
+            if not _same_result(state.result(), expected, tolerance):
+                failures += 1
+                print(f"❌ seed {seed}, step {step}: {history[-5:]}")
+                print(f"   incremental: {state.result()}")
+                print(f"   recomputed:  {expected}")
+                break
+    return failures
+
+
+def benchmark(matrix: WeightMatrix, tests_per_user: int = 20, repeat: int = 2000):
+    """Time of one retake (replacing the previous attempt): incremental delta vs full recompute"""
+    model = ScoringModel(matrix)
+    all_weights = {key: matrix.row(key) for key in matrix.questions}
+    rng = random.Random(0)
+    tests: Dict[str, List[str]] = {}
+    for key in matrix.questions:
+        test_id, question_id = key.split(':', 1)
+        tests.setdefault(test_id, []).append(question_id)
+    taken = rng.sample(sorted(model.test_rows), min(tests_per_user, len(model.test_rows)))
+    completed = {test_id: {'testId': test_id, 'userAnswers': _random_answers(rng, tests[test_id])} for test_id in taken}
+
+    state = UserScaleState(model)
+    for result in completed.values():
+        state.add(result['testId'], result['userAnswers'])
+
+    retakes = [(test_id, _random_answers(rng, tests[test_id])) for test_id in (rng.choice(taken) for _ in range(repeat))]
+
+    started = time.perf_counter()
+    for test_id, answers in retakes:
+        state.replace(test_id, answers)
+        state.result()
+    incremental = (time.perf_counter() - started) / repeat
+
+    started = time.perf_counter()
+    for test_id, answers in retakes:
+        completed[test_id] = {'testId': test_id, 'userAnswers': answers}
+        reference_scores(list(completed.values()), all_weights)
+    full = (time.perf_counter() - started) / repeat
+
+    print(f"Retake with {len(taken)} completed tests: incremental {incremental * 1e6:.1f} µs, "
+          f"full recompute {full * 1e6:.1f} µs ({full / incremental:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental personality type scoring")
+    parser.add_argument('--check', action='store_true', help="Randomized equivalence check against full recomputation")
+    parser.add_argument('--seeds', type=int, default=200, help="Random operation sequences to check")
+    parser.add_argument('--steps', type=int, default=60, help="Operations per sequence")
+    parser.add_argument('--benchmark', action='store_true', help="Compare a retake delta with a full recompute")
+    args = parser.parse_args()
+    if not args.check and not args.benchmark:
+        parser.error("pass --check and/or --benchmark")
+
+    matrix = compiled_weight_matrix()
+    if args.check:
+        started = time.perf_counter()
+        failures = check_equivalence(matrix, args.seeds, args.steps)
+        elapsed = time.perf_counter() - started
+        if failures:
+            print(f"❌ {failures} of {args.seeds} sequences diverged from full recomputation")
+            sys.exit(1)
+        print(f"✅ {args.seeds} sequences x {args.steps} steps match full recomputation ({elapsed:.1f} s)")
+    if args.benchmark:
+        benchmark(matrix)
+
+
+if __name__ == '__main__':
+    # Run through the importable modules so cached IR refers to dart_weights.* classes
+    import incremental_scoring
+    incremental_scoring.main()
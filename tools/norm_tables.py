@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Build percentile norm tables for every scale of hierarchical_scales.dart
+and personality_type_scales.dart, and look percentiles up in them.
+
+Each respondent is scored the way the app scores them:
+
+    hierarchical scales   average of the per-test scaleScores (SummaryCalculator
+                          v2), every test rescored with TestScaleModel and the
+                          current QuestionWeightsConfig weights
+    type scales           SummaryService personality type scales (ScoringModel)
+
+Respondents come from answer exports (the JSONL / JSON format of
+batch_scoring) or from simulate_respondents (--simulate N). Scores are
+counted into ScoreHistogram bins per stratum: 'all', plus one stratum per
+combination of the --stratify fields of the export's user objects (e.g.
+--stratify locale gives 'locale=ru'). Memory therefore does not depend on
+the number of respondents.
+
+The asset stores, per stratum and scale with at least --min-count scores,
+the scale score at every percentile of `probabilities`:
+
+    {"format": "norm_tables", "version": 1, "norms_version": "<hash>",
+     "probabilities": [0, 1, ..., 100], "source": {...},
+     "strata": {"all": {"anxiety": {"n": 51234, "values": [...]}, ...}, ...}}
+
+NormTable.percentile() (and NormTableService in the app, which loads
+assets/norms/norm_tables.json) finds a score with a binary search over
+the values and interpolates between the neighbouring percentiles. Tables
+built with --simulate only describe simulated respondents; ship norms
+built from real exports.
+
+Usage:
+    python tools/norm_tables.py export.jsonl [--stratify locale] [--output assets/norms/norm_tables.json]
+    python tools/norm_tables.py --simulate 200000
+    python tools/norm_tables.py --lookup build/norms/norm_tables.json --scale anxiety --score 62.5
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from batch_scoring import PERSONALITY_TYPE_SCALES, ScoringModel, TestScaleModel, batches, read_users
+from dart_weights import REPO_ROOT
+from simulate_respondents import AnswerSampler, ScoreHistogram, build_simulation, load_tests
+from weight_matrix import (
+    HIERARCHICAL_SCALES_PATH, PERSONALITY_TYPE_SCALES_PATH, TEST_SCALES_OUTPUT, WeightMatrix,
+    compiled_weight_matrix, config_map_names, load_scale_registry,
+)
+
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, 'build', 'norms', 'norm_tables.json')
+ASSET_PATH = os.path.join(REPO_ROOT, 'assets', 'norms', 'norm_tables.json')
+NORMS_FORMAT = 'norm_tables'
+NORMS_VERSION = 1
+OVERALL_STRATUM = 'all'
+PROBABILITIES = list(range(0, 101))
+DEFAULT_MIN_COUNT = 100
+
+
+class NormTable:
+    """Quantile arrays of a norms asset; percentile lookups in O(log n)"""
+
+    def __init__(self, payload: Dict):
+        if payload.get('format') != NORMS_FORMAT or payload.get('version') != NORMS_VERSION:
+            raise ValueError(f"Not a norm table (version {NORMS_VERSION})")
+        self.norms_version = payload.get('norms_version')
+        self.probabilities: List[float] = [float(p) for p in payload['probabilities']]
+        self.strata: Dict[str, Dict[str, List[float]]] = {
+            stratum: {scale: table['values'] for scale, table in scales.items()}
+            for stratum, scales in payload['strata'].items()
+        }
+
+    @classmethod
+    def load(cls, path: str) -> 'NormTable':
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def values(self, scale: str, stratum: str = OVERALL_STRATUM) -> Optional[List[float]]:
+        """Quantiles of a scale; strata without enough data fall back to 'all'"""
+        table = self.strata.get(stratum, {}).get(scale)
+        if table is None and stratum != OVERALL_STRATUM:
+            table = self.strata.get(OVERALL_STRATUM, {}).get(scale)
+        return table
+
+    def percentile(self, scale: str, score: float, stratum: str = OVERALL_STRATUM) -> Optional[float]:
+        """Share of the norm population (0-100) scoring below `score`, None without norms"""
+        values = self.values(scale, stratum)
+        if values is None:
+            return None
+        low = bisect_left(values, score)
+        high = bisect_right(values, score)
+        if high == 0:
+            return self.probabilities[0]
+        if low == len(values):
+            return self.probabilities[-1]
+        if low < high:
+            # The score is a quantile shared by several percentiles: take the middle of the run
+            return (self.probabilities[low] + self.probabilities[high - 1]) / 2
+        below, above = values[low - 1], values[low]
+        fraction = (score - below) / (above - below)
+        return self.probabilities[low - 1] + fraction * (self.probabilities[low] - self.probabilities[low - 1])
+
+    def score(self, scale: str, percentile: float, stratum: str = OVERALL_STRATUM) -> Optional[float]:
+        """Inverse lookup: the scale score at a percentile"""
+        values = self.values(scale, stratum)
+        if values is None:
+            return None
+        return float(np.interp(percentile, self.probabilities, values))
+
+
+class NormAccumulator:
+    """ScoreHistograms of every scale per stratum; mergeable"""
+
+    def __init__(self, scales: List[str]):
+        self.scales = list(scales)
+        self.strata: Dict[str, ScoreHistogram] = {}
+        self.respondents = 0
+
+    def _histogram(self, stratum: str) -> ScoreHistogram:
+        if stratum not in self.strata:
+            self.strata[stratum] = ScoreHistogram(self.scales)
+        return self.strata[stratum]
+
+    def add(self, values: np.ndarray, strata: Optional[List[str]] = None):
+        """Count a respondents x scales block (NaN = not measured) into 'all' and each row's stratum"""
+        self._histogram(OVERALL_STRATUM).add(values)
+        if strata is not None:
+            keys = np.asarray(strata)
+            for stratum in dict.fromkeys(strata):
+                if stratum != OVERALL_STRATUM:
+                    self._histogram(stratum).add(values[keys == stratum])
+        self.respondents += len(values)
+
+    def merge(self, other: 'NormAccumulator'):
+        for stratum, histogram in other.strata.items():
+            self._histogram(stratum).merge(histogram)
+        self.respondents += other.respondents
+
+    def to_json(self, min_count: int = DEFAULT_MIN_COUNT, source: Optional[Dict] = None) -> Dict:
+        strata = {}
+        for stratum in sorted(self.strata, key=lambda name: (name != OVERALL_STRATUM, name)):
+            histogram = self.strata[stratum]
+            scales = {}
+            for i, scale in enumerate(self.scales):
+                n = int(histogram.counts[i].sum())
+                if n >= min_count:
+                    scales[scale] = {'n': n, 'values': [round(value, 2) for value in histogram.percentiles(i, PROBABILITIES)]}
+            if scales:
+                strata[stratum] = scales
+        body = json.dumps(strata, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        return {
+            'format': NORMS_FORMAT,
+            'version': NORMS_VERSION,
+            'norms_version': hashlib.sha256(body).hexdigest()[:16],
+            'probabilities': PROBABILITIES,
+            'source': source or {},
+            'strata': strata,
+        }
+
+
+class RespondentScorer:
+    """Summary-level scores (respondents x registered scales) of exported or simulated respondents"""
+
+    def __init__(self, type_matrix: WeightMatrix, scale_matrix: WeightMatrix, tests: List[Dict], scales: List[str]):
+        self.scales = scales
+        self.column = {scale: i for i, scale in enumerate(scales)}
+        self.type_model = ScoringModel(type_matrix)
+        self.type_columns = np.array([self.column[scale] for scale in PERSONALITY_TYPE_SCALES])
+        self.test_models: Dict[str, TestScaleModel] = {}
+        self.test_columns: Dict[str, np.ndarray] = {}
+        for test in tests:
+            model = TestScaleModel(scale_matrix, test)
+            # Type scales shown in the summary come from SummaryService, not from the test averages
+            used = [i for i, scale in enumerate(model.scales)
+                    if scale in self.column and scale not in PERSONALITY_TYPE_SCALES]
+            if used:
+                self.test_models[test['id']] = model
+                self.test_columns[test['id']] = np.array(used)
+
+    def _empty(self, count: int) -> np.ndarray:
+        return np.zeros((count, len(self.scales)))
+
+    def _add_test_scores(self, sums: np.ndarray, counts: np.ndarray, test_id: str, rows: np.ndarray, scores: np.ndarray):
+        used = self.test_columns[test_id]
+        targets = np.array([self.column[self.test_models[test_id].scales[i]] for i in used])
+        block = scores[:, used]
+        measured = ~np.isnan(block)
+        if len(np.unique(rows)) == len(rows):
+            sums[rows[:, None], targets] += np.where(measured, block, 0.0)
+            counts[rows[:, None], targets] += measured
+            return
+        # Rows repeat for retaken tests: bincount adds duplicates up (fancy-index += would not)
+        flat = (rows[:, None] * len(self.scales) + targets[None, :])[measured]
+        sums += np.bincount(flat, weights=block[measured], minlength=sums.size).reshape(sums.shape)
+        counts += np.bincount(flat, minlength=counts.size).reshape(counts.shape)
+
+    def _finish(self, sums: np.ndarray, counts: np.ndarray, type_scales: np.ndarray, typed: np.ndarray) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            values = np.where(counts > 0, sums / counts, np.nan)
+        values[:, self.type_columns] = np.nan
+        values[np.ix_(typed, self.type_columns)] = type_scales
+        return values
+
+    def score_users(self, users: List[Dict]) -> np.ndarray:
+        sums = self._empty(len(users))
+        counts = self._empty(len(users))
+        pending: Dict[str, List] = {}
+        for u, user in enumerate(users):
+            for result in user.get('results') or ():
+                if result.get('userAnswers') and result.get('testId') in self.test_models:
+                    pending.setdefault(result['testId'], []).append((u, result['userAnswers']))
+        for test_id, entries in pending.items():
+            model = self.test_models[test_id]
+            rows = np.array([u for u, _ in entries])
+            self._add_test_scores(sums, counts, test_id, rows, model.score(model.encode([a for _, a in entries])))
+
+        answer_sums, answer_counts = self.type_model.encode(users)
+        typed = np.flatnonzero((answer_counts @ self.type_model.weights).any(axis=1))
+        type_scales = self.type_model.score(answer_sums[typed], answer_counts[typed])['scales']
+        return self._finish(sums, counts, type_scales, typed)
+
+    def score_simulated(self, kept: Dict) -> np.ndarray:
+        count = len(kept['taken'])
+        sums = self._empty(count)
+        counts = self._empty(count)
+        for test_id, (rows, scores) in kept['test_scales'].items():
+            if test_id in self.test_models:
+                self._add_test_scores(sums, counts, test_id, rows, scores)
+        return self._finish(sums, counts, kept['scales'], np.flatnonzero(kept['typed']))
+
+
+def stratum_of(user: Dict, fields: List[str]) -> str:
+    if not fields:
+        return OVERALL_STRATUM
+    return ','.join(f"{field}={user.get(field)}" for field in fields)
+
+
+def build_from_exports(paths: Iterable[str], scorer: RespondentScorer, fields: List[str],
+                       batch_size: int = 4096) -> NormAccumulator:
+    accumulator = NormAccumulator(scorer.scales)
+    for path in paths:
+        for batch in batches(read_users(path), batch_size):
+            strata = [stratum_of(user, fields) for user in batch] if fields else None
+            accumulator.add(scorer.score_users(batch), strata)
+    return accumulator
+
+
+def build_from_simulation(count: int, scorer: RespondentScorer, tests: List[Dict], type_matrix: WeightMatrix,
+                          scale_matrix: WeightMatrix, sampler: AnswerSampler, completion: float,
+                          seed: int = 0, batch_size: int = 16_384) -> NormAccumulator:
+    simulation = build_simulation(tests, type_matrix, scale_matrix, sampler, completion)
+    rng = np.random.default_rng(seed)
+    accumulator = NormAccumulator(scorer.scales)
+    for offset in range(0, count, batch_size):
+        kept = simulation.run_batch(min(batch_size, count - offset), rng, keep_answers=True)
+        accumulator.add(scorer.score_simulated(kept))
+    return accumulator
+
+
+def norm_scales() -> List[str]:
+    return load_scale_registry([HIERARCHICAL_SCALES_PATH, PERSONALITY_TYPE_SCALES_PATH])
+
+
+def print_summary(payload: Dict):
+    overall = payload['strata'].get(OVERALL_STRATUM, {})
+    print(f"   {len(payload['strata'])} strata, {len(overall)} scales with norms in '{OVERALL_STRATUM}' "
+          f"(version {payload['norms_version']})")
+    for scale in list(overall)[:8]:
+        values = overall[scale]['values']
+        print(f"   {scale:<28} n {overall[scale]['n']:>9,}   p10 {values[10]:6.1f}   p50 {values[50]:6.1f}   p90 {values[90]:6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build percentile norm tables for the summary scales")
+    parser.add_argument('exports', nargs='*', help="JSONL / JSON exports (users with results)")
+    parser.add_argument('--simulate', type=int, metavar='N', help="Build from N simulated respondents instead")
+    parser.add_argument('--completion', type=float, default=0.2, help="Simulated test completion probability")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stratify', action='append', default=[], metavar='FIELD',
+                        help="User field to stratify exports by (repeatable)")
+    parser.add_argument('--min-count', type=int, default=DEFAULT_MIN_COUNT,
+                        help="Leave out scales with fewer scores in a stratum")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help=f"Norms JSON (the app loads {os.path.relpath(ASSET_PATH, REPO_ROOT)})")
+    parser.add_argument('--lookup', metavar='NORMS', help="Look up --score of --scale in a norms file")
+    parser.add_argument('--scale')
+    parser.add_argument('--score', type=float)
+    parser.add_argument('--stratum', default=OVERALL_STRATUM)
+    args = parser.parse_args()
+
+    if args.lookup:
+        if args.scale is None or args.score is None:
+            parser.error("--lookup needs --scale and --score")
+        percentile = NormTable.load(args.lookup).percentile(args.scale, args.score, args.stratum)
+        if percentile is None:
+            print(f"❌ No norms for {args.scale}")
+            sys.exit(1)
+        print(f"{args.scale} {args.score:g}: percentile {percentile:.1f}")
+        return
+    if not args.exports and not args.simulate:
+        parser.error("pass export files, --simulate N or --lookup NORMS")
+
+    started = time.perf_counter()
+    type_matrix = compiled_weight_matrix()
+    scale_matrix = compiled_weight_matrix(TEST_SCALES_OUTPUT, config_map_names())
+    tests = load_tests()
+    scorer = RespondentScorer(type_matrix, scale_matrix, tests, norm_scales())
+    if args.simulate:
+        sampler = AnswerSampler()
+        accumulator = build_from_simulation(args.simulate, scorer, tests, type_matrix, scale_matrix, sampler,
+                                            args.completion, args.seed)
+        source = dict(sampler.settings(), kind='simulation', respondents=args.simulate,
+                      completion=args.completion, seed=args.seed)
+    else:
+        accumulator = build_from_exports(args.exports, scorer, args.stratify)
+        source = {'kind': 'exports', 'files': [os.path.basename(path) for path in args.exports],
+                  'respondents': accumulator.respondents, 'stratify': args.stratify}
+    source.update(weights=type_matrix.source_hash, test_scale_weights=scale_matrix.source_hash)
+    payload = accumulator.to_json(args.min_count, source)
+    elapsed = time.perf_counter() - started
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(json.dumps(payload, ensure_ascii=False, separators=(',', ':')))
+    print(f"✅ Norms of {accumulator.respondents:,} respondents written to {args.output} "
+          f"({os.path.getsize(args.output) / 1024:.0f} KB, {elapsed:.2f} s)")
+    print_summary(payload)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Streaming reliability statistics of exported answers: Cronbach's alpha,
+corrected item-total correlations and item means per test scale.
+
+Scales come from the test JSON (assets/tests). A question belongs to its
+factor; without one, to its bipolar_dimension (items of the second pole
+reverse-keyed) or to the scale of its largest axis_weights entry (reverse-
+keyed if negative). A test with none of these is one 'total' scale.
+is_reversed questions are reverse-keyed as min + max - score, except in
+the tests whose answers TestService already stores reversed. Multi-choice
+tests (the answer is a factor index) have no item scale and are skipped.
+
+Exports are read in chunks of --chunk-size results per test, and only
+integer sufficient statistics are kept per scale:
+
+    complete cases    n, item sums S and cross products C = sum of x x^T
+    every answer      count, sum and sum of squares per item
+
+so memory depends on the number of items, not on the number of
+respondents, and nothing is lost to rounding. Statistics of several
+processes (-j, or --save-state on other machines and --merge here) are
+merged by adding them up. With Σ = (C - S S^T / n) / (n - 1):
+
+    alpha               k / (k - 1) * (1 - trace(Σ) / sum(Σ))
+    item-total r        corr(x_i, total - x_i)
+    alpha if deleted    alpha of the other k - 1 items
+
+Input formats:
+    JSONL   one user per line ({"userId": ..., "results": [TestResult.toJson(), ...]})
+            or one TestResult per line; a JSON list is read whole
+    CSV     one answer per row with result_id (or user_id), test_id,
+            question_id and score columns; the rows of one result must be adjacent
+
+Usage:
+    python tools/reliability.py export.jsonl [more exports] [-j 4] [--format text|json] [--items]
+    python tools/reliability.py part-1.jsonl --save-state build/reliability/part-1.json
+    python tools/reliability.py --merge build/reliability/part-*.json
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from batch_scoring import MULTI_CHOICE_TESTS, REVERSED_STORAGE_TESTS, read_users
+from simulate_respondents import load_tests
+
+TOTAL_SCALE = 'total'
+STATE_FORMAT = 'reliability_state'
+STATE_VERSION = 1
+DEFAULT_CHUNK_SIZE = 4096
+# JSONL files larger than this are split into byte ranges across workers
+SPLIT_SIZE = 64 * 1024 * 1024
+CSV_KEY_COLUMNS = ('result_id', 'user_id')
+DEFAULT_MIN_ALPHA = 0.7
+
+
+def _scale_of(question: Dict, factors: List[str]) -> Tuple[Optional[str], bool]:
+    """(scale, reverse-keyed by the scale definition) of one question"""
+    factor = question.get('factor')
+    if factor is not None and factor in factors:
+        return factor, False
+    dimension = question.get('bipolar_dimension')
+    pole = question.get('bipolar_pole')
+    if dimension and pole:
+        # personality_type_ei: E is the first pole, I the second
+        return dimension, pole.upper() != dimension.rsplit('_', 1)[-1][:1].upper()
+    weights = question.get('axis_weights')
+    if weights:
+        axis = max(weights, key=lambda name: abs(weights[name]))
+        return axis, weights[axis] < 0
+    return None, False
+
+
+class TestLayout:
+    """Questions of one test grouped into scales, with the keying of every item"""
+
+    def __init__(self, test: Dict):
+        self.test_id = test['id']
+        questions = [question for question in test['questions'] if question['answers']]
+        self.question_ids = [question['id'] for question in questions]
+        self.question_index = {question_id: i for i, question_id in enumerate(self.question_ids)}
+        self.pivots = np.array([
+            min(a['score'] for a in question['answers']) + max(a['score'] for a in question['answers'])
+            for question in questions
+        ], dtype=np.float64)
+
+        factors = list(test.get('factors') or [])
+        stored_reversed = self.test_id in REVERSED_STORAGE_TESTS
+        members: Dict[str, List[int]] = {}
+        reversed_ = np.zeros(len(questions), dtype=bool)
+        for column, question in enumerate(questions):
+            scale, keyed = _scale_of(question, factors)
+            if scale is None:
+                continue
+            members.setdefault(scale, []).append(column)
+            reversed_[column] = keyed != (bool(question.get('is_reversed')) and not stored_reversed)
+        if not members:
+            members[TOTAL_SCALE] = list(range(len(questions)))
+            reversed_ = np.array([bool(q.get('is_reversed')) and not stored_reversed for q in questions], dtype=bool)
+        self.reversed = reversed_
+        self.scales = {scale: np.array(columns, dtype=np.int64) for scale, columns in members.items()}
+
+    def encode(self, answer_maps: List[Dict[str, int]]) -> np.ndarray:
+        """Keyed answers, results x questions, NaN where unanswered"""
+        answers = np.full((len(answer_maps), len(self.question_ids)), np.nan)
+        for r, answer_map in enumerate(answer_maps):
+            for question_id, score in answer_map.items():
+                column = self.question_index.get(question_id)
+                if column is not None:
+                    answers[r, column] = score
+        return np.where(self.reversed, self.pivots - answers, answers)
+
+
+class ScaleStatistics:
+    """Integer sufficient statistics of one scale; merging is addition"""
+
+    def __init__(self, items: int):
+        self.n = 0
+        self.sums = np.zeros(items, dtype=np.int64)
+        self.cross = np.zeros((items, items), dtype=np.int64)
+        self.item_counts = np.zeros(items, dtype=np.int64)
+        self.item_sums = np.zeros(items, dtype=np.int64)
+        self.item_squares = np.zeros(items, dtype=np.int64)
+
+    @property
+    def items(self) -> int:
+        return len(self.sums)
+
+    def add(self, block: np.ndarray):
+        """Count a results x items block of keyed answers (NaN = unanswered)"""
+        answered = ~np.isnan(block)
+        values = np.where(answered, block, 0.0)
+        # Answers are integers and every product fits a float64 mantissa, so rint is exact
+        self.item_counts += answered.sum(axis=0)
+        self.item_sums += np.rint(values.sum(axis=0)).astype(np.int64)
+        self.item_squares += np.rint((values * values).sum(axis=0)).astype(np.int64)
+        complete = values[answered.all(axis=1)]
+        self.n += len(complete)
+        self.sums += np.rint(complete.sum(axis=0)).astype(np.int64)
+        self.cross += np.rint(complete.T @ complete).astype(np.int64)
+
+    def merge(self, other: 'ScaleStatistics'):
+        if other.items != self.items:
+            raise ValueError(f"Cannot merge statistics of {other.items} and {self.items} items")
+        self.n += other.n
+        for name in ('sums', 'cross', 'item_counts', 'item_sums', 'item_squares'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+
+    def to_json(self) -> Dict:
+        return {'n': self.n, 'sums': self.sums.tolist(), 'cross': self.cross.tolist(),
+                'item_counts': self.item_counts.tolist(), 'item_sums': self.item_sums.tolist(),
+                'item_squares': self.item_squares.tolist()}
+
+    @classmethod
+    def from_json(cls, payload: Dict) -> 'ScaleStatistics':
+        stats = cls(len(payload['sums']))
+        stats.n = payload['n']
+        for name in ('sums', 'cross', 'item_counts', 'item_sums', 'item_squares'):
+            setattr(stats, name, np.array(payload[name], dtype=np.int64).reshape(getattr(stats, name).shape))
+        return stats
+
+    def report(self, question_ids: List[str], reversed_: List[bool]) -> Dict:
+        """alpha, item-total correlations and item statistics"""
+        k = self.items
+        alpha = None
+        item_total = [None] * k
+        alpha_deleted = [None] * k
+        if self.n >= 2 and k >= 2:
+            sums = self.sums.astype(np.float64)
+            covariance = (self.cross - np.outer(sums, sums) / self.n) / (self.n - 1)
+            variances = np.diag(covariance)
+            total = covariance.sum()
+            row_sums = covariance.sum(axis=1)
+            if total > 0:
+                alpha = k / (k - 1) * (1 - variances.sum() / total)
+            rest_variance = total - 2 * row_sums + variances
+            with np.errstate(divide='ignore', invalid='ignore'):
+                correlations = (row_sums - variances) / np.sqrt(variances * rest_variance)
+                if k >= 3:
+                    deleted = (k - 1) / (k - 2) * (1 - (variances.sum() - variances) / rest_variance)
+                    alpha_deleted = [float(value) if rest > 0 else None
+                                     for value, rest in zip(deleted.tolist(), rest_variance.tolist())]
+            item_total = [float(value) if np.isfinite(value) else None for value in correlations.tolist()]
+
+        items = []
+        for i, question_id in enumerate(question_ids):
+            count = int(self.item_counts[i])
+            mean = self.item_sums[i] / count if count else None
+            variance = ((self.item_squares[i] - self.item_sums[i] * mean) / (count - 1)) if count > 1 else None
+            items.append({
+                'question': question_id,
+                'reversed': reversed_[i],
+                'n': count,
+                'mean': _rounded(mean),
+                'sd': _rounded(np.sqrt(max(variance, 0.0)) if variance is not None else None),
+                'item_total_r': _rounded(item_total[i]),
+                'alpha_if_deleted': _rounded(alpha_deleted[i]),
+            })
+        return {'items': k, 'n': self.n, 'alpha': _rounded(alpha), 'questions': items}
+
+
+def _rounded(value: Optional[float], digits: int = 4) -> Optional[float]:
+    return None if value is None else round(float(value), digits)
+
+
+class ReliabilityStatistics:
+    """ScaleStatistics of every (test, scale) plus input counters; mergeable"""
+
+    def __init__(self):
+        self.scales: Dict[str, Dict[str, ScaleStatistics]] = {}
+        self.results: Dict[str, int] = {}
+        self.skipped: Dict[str, int] = {}
+
+    def add_results(self, layout: TestLayout, answer_maps: List[Dict[str, int]]):
+        block = layout.encode(answer_maps)
+        test_scales = self.scales.setdefault(layout.test_id, {})
+        for scale, columns in layout.scales.items():
+            if scale not in test_scales:
+                test_scales[scale] = ScaleStatistics(len(columns))
+            test_scales[scale].add(block[:, columns])
+        self.results[layout.test_id] = self.results.get(layout.test_id, 0) + len(answer_maps)
+
+    def skip(self, test_id: str):
+        self.skipped[test_id] = self.skipped.get(test_id, 0) + 1
+
+    def merge(self, other: 'ReliabilityStatistics'):
+        for test_id, scales in other.scales.items():
+            test_scales = self.scales.setdefault(test_id, {})
+            for scale, stats in scales.items():
+                if scale in test_scales:
+                    test_scales[scale].merge(stats)
+                else:
+                    test_scales[scale] = stats
+        for counter, other_counter in ((self.results, other.results), (self.skipped, other.skipped)):
+            for test_id, count in other_counter.items():
+                counter[test_id] = counter.get(test_id, 0) + count
+
+    def to_json(self) -> Dict:
+        return {
+            'format': STATE_FORMAT,
+            'version': STATE_VERSION,
+            'results': self.results,
+            'skipped': self.skipped,
+            'scales': {test_id: {scale: stats.to_json() for scale, stats in scales.items()}
+                       for test_id, scales in self.scales.items()},
+        }
+
+    @classmethod
+    def from_json(cls, payload: Dict) -> 'ReliabilityStatistics':
+        if payload.get('format') != STATE_FORMAT or payload.get('version') != STATE_VERSION:
+            raise ValueError(f"Not a reliability state (version {STATE_VERSION})")
+        statistics = cls()
+        statistics.results = dict(payload['results'])
+        statistics.skipped = dict(payload['skipped'])
+        statistics.scales = {test_id: {scale: ScaleStatistics.from_json(stats) for scale, stats in scales.items()}
+                             for test_id, scales in payload['scales'].items()}
+        return statistics
+
+    def report(self, layouts: Dict[str, TestLayout]) -> Dict:
+        tests = {}
+        for test_id in sorted(self.scales):
+            layout = layouts.get(test_id)
+            if layout is None:
+                continue
+            scales = {}
+            for scale, stats in self.scales[test_id].items():
+                columns = layout.scales.get(scale)
+                if columns is None or len(columns) != stats.items:
+                    raise ValueError(f"{test_id}.{scale}: statistics do not match the current test JSON")
+                scales[scale] = stats.report([layout.question_ids[c] for c in columns],
+                                             layout.reversed[columns].tolist())
+            tests[test_id] = {'results': self.results.get(test_id, 0), 'scales': scales}
+        return {'tests': tests, 'skipped': dict(sorted(self.skipped.items()))}
+
+
+# --- Input ---
+
+def _result_pairs(record: Dict) -> Iterator[Tuple[Optional[str], Optional[Dict]]]:
+    if 'results' in record:
+        for result in record.get('results') or ():
+            yield result.get('testId'), result.get('userAnswers')
+    else:
+        yield record.get('testId'), record.get('userAnswers')
+
+
+def iter_results(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[Optional[str], Optional[Dict]]]:
+    """(testId, userAnswers) of every result in an export, or in a byte range of a JSONL export"""
+    if path.endswith('.csv'):
+        yield from _csv_results(path)
+        return
+    with open(path, 'rb') as f:
+        first = f.read(1)
+        if first == b'[':
+            for user in read_users(path):
+                yield from _result_pairs(user)
+            return
+        # A line belongs to the range it starts in
+        if start > 0:
+            f.seek(start - 1)
+            f.readline()
+        else:
+            f.seek(0)
+        while end is None or f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+            if line.strip():
+                yield from _result_pairs(json.loads(line))
+
+
+def _csv_results(path: str) -> Iterator[Tuple[str, Dict[str, int]]]:
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        reader = csv.DictReader(f)
+        key_column = next((column for column in CSV_KEY_COLUMNS if column in (reader.fieldnames or ())), None)
+        if key_column is None:
+            raise ValueError(f"{path}: CSV needs one of the columns {', '.join(CSV_KEY_COLUMNS)}")
+        current = None
+        answers: Dict[str, int] = {}
+        for row in reader:
+            key = (row[key_column], row['test_id'])
+            if key != current:
+                if current is not None:
+                    yield current[1], answers
+                current, answers = key, {}
+            answers[row['question_id']] = int(row['score'])
+        if current is not None:
+            yield current[1], answers
+
+
+def plan_work(paths: List[str], jobs: int) -> List[Tuple[str, int, Optional[int]]]:
+    """(path, start, end) work items; large JSONL files are split into byte ranges"""
+    work = []
+    for path in paths:
+        size = os.path.getsize(path)
+        if jobs > 1 and size > SPLIT_SIZE and not path.endswith('.csv'):
+            with open(path, 'rb') as f:
+                is_list = f.read(1) == b'['
+            if not is_list:
+                step = -(-size // jobs)
+                work.extend((path, start, min(start + step, size)) for start in range(0, size, step))
+                continue
+        work.append((path, 0, None))
+    return work
+
+
+_LAYOUTS: Dict[str, TestLayout] = {}
+
+
+def _init_worker(layouts: Dict[str, TestLayout]):
+    global _LAYOUTS
+    _LAYOUTS = layouts
+
+
+def process_range(path: str, start: int = 0, end: Optional[int] = None,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> ReliabilityStatistics:
+    """Statistics of one work item, flushing every test's pending results in chunks"""
+    statistics = ReliabilityStatistics()
+    pending: Dict[str, List[Dict[str, int]]] = {}
+    for test_id, answers in iter_results(path, start, end):
+        layout = _LAYOUTS.get(test_id)
+        if layout is None or not answers:
+            statistics.skip(str(test_id))
+            continue
+        chunk = pending.setdefault(test_id, [])
+        chunk.append(answers)
+        if len(chunk) >= chunk_size:
+            statistics.add_results(layout, chunk)
+            pending[test_id] = []
+    for test_id, chunk in pending.items():
+        if chunk:
+            statistics.add_results(_LAYOUTS[test_id], chunk)
+    return statistics
+
+
+def collect(paths: List[str], layouts: Dict[str, TestLayout], jobs: int = 1,
+            chunk_size: int = DEFAULT_CHUNK_SIZE) -> ReliabilityStatistics:
+    work = plan_work(paths, jobs)
+    statistics = ReliabilityStatistics()
+    if jobs <= 1 or len(work) <= 1:
+        _init_worker(layouts)
+        parts = (process_range(path, start, end, chunk_size) for path, start, end in work)
+        for part in parts:
+            statistics.merge(part)
+        return statistics
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(layouts,)) as pool:
+        futures = [pool.submit(process_range, path, start, end, chunk_size) for path, start, end in work]
+        for future in futures:
+            statistics.merge(future.result())
+    return statistics
+
+
+def load_layouts(test_ids: Optional[List[str]] = None) -> Dict[str, TestLayout]:
+    return {test['id']: TestLayout(test) for test in load_tests(test_ids=test_ids)
+            if test['id'] not in MULTI_CHOICE_TESTS}
+
+
+# --- Output ---
+
+def print_report(report: Dict, show_items: bool = False, min_alpha: float = DEFAULT_MIN_ALPHA):
+    for test_id, test in report['tests'].items():
+        print(f"\n📋 {test_id} ({test['results']:,} results)")
+        print(f"   {'scale':<34} {'items':>5} {'n':>9} {'alpha':>7}  lowest item-total r")
+        for scale, stats in test['scales'].items():
+            alpha = stats['alpha']
+            correlations = [(item['item_total_r'], item['question']) for item in stats['questions']
+                            if item['item_total_r'] is not None]
+            lowest = min(correlations) if correlations else None
+            flag = '⚠️ ' if alpha is not None and alpha < min_alpha else '  '
+            print(f" {flag}{scale:<34} {stats['items']:>5} {stats['n']:>9,} "
+                  f"{'-' if alpha is None else f'{alpha:.3f}':>7}  "
+                  f"{'' if lowest is None else f'{lowest[0]:.3f} ({lowest[1]})'}")
+            if show_items:
+                for item in stats['questions']:
+                    print(f"        {item['question']:<12}{' (R)' if item['reversed'] else '    '} "
+                          f"mean {_format(item['mean'], '.2f')}  sd {_format(item['sd'], '.2f')}  "
+                          f"r {_format(item['item_total_r'], '.3f')}  "
+                          f"alpha w/o {_format(item['alpha_if_deleted'], '.3f')}")
+    if report['skipped']:
+        print("\n   skipped results: " + ', '.join(f"{test_id} {count:,}" for test_id, count in report['skipped'].items()))
+
+
+def _format(value: Optional[float], spec: str) -> str:
+    return '-' if value is None else format(value, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cronbach's alpha and item-total correlations of answer exports")
+    parser.add_argument('exports', nargs='*', help="JSONL / JSON / CSV answer exports")
+    parser.add_argument('--merge', nargs='+', default=[], metavar='STATE', help="Add saved statistics (--save-state files)")
+    parser.add_argument('--save-state', metavar='PATH', help="Write the merged sufficient statistics for a later --merge")
+    parser.add_argument('--test', dest='tests', action='append', help="Only this test (repeatable)")
+    parser.add_argument('-j', '--jobs', type=int, default=1, help="Worker processes")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Results per test encoded at once")
+    parser.add_argument('--format', choices=('text', 'json'), default='text')
+    parser.add_argument('--items', action='store_true', help="Per-item statistics in the text report")
+    parser.add_argument('--min-alpha', type=float, default=DEFAULT_MIN_ALPHA, help="Flag scales below this alpha")
+    args = parser.parse_args()
+    if not args.exports and not args.merge:
+        parser.error("pass export files or --merge STATE")
+
+    layouts = load_layouts(args.tests)
+    started = time.perf_counter()
+    statistics = collect(args.exports, layouts, args.jobs, args.chunk_size) if args.exports else ReliabilityStatistics()
+    for path in args.merge:
+        with open(path, 'r', encoding='utf-8') as f:
+            statistics.merge(ReliabilityStatistics.from_json(json.load(f)))
+    elapsed = time.perf_counter() - started
+
+    if args.save_state:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save_state)), exist_ok=True)
+        with open(args.save_state, 'w', encoding='utf-8') as f:
+            json.dump(statistics.to_json(), f, separators=(',', ':'))
+
+    try:
+        report = statistics.report(layouts)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.format == 'json':
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return
+    print_report(report, args.items, args.min_alpha)
+    total = sum(statistics.results.values())
+    print(f"\n📊 {total:,} results of {len(report['tests'])} tests in {elapsed:.2f} s"
+          f" ({total / elapsed if elapsed else 0:,.0f} results/s)")
+    if args.save_state:
+        print(f"   statistics saved to {args.save_state}")
+
+
+if __name__ == '__main__':
+    # Run through the module so pickled statistics resolve to `reliability`, not `__main__`
+    import reliability
+    reliability.main()
@@ -2,89 +2,67 @@
 """
 Remove invalid scale references from disc_personality_weights.dart
 
-This script removes all references to scales that don't exist in hierarchical_scales.dart
+This script removes all references to scales that are not registered in
+hierarchical_scales.dart or personality_type_scales.dart (the same registry
+validate_tests.py checks against). The valid ids are read from those files
+instead of a hard-coded list of invalid ones.
+
+DISC weight files (disc_*_weights.dart) can be passed as files, directories
+or globs instead of the default; they are processed in parallel, --dry-run
+prints the diffs only. Other weight files are skipped: their unregistered
+ids are per-test scales that TestService still scores.
+
+Usage:
+    python tools/remove_invalid_disc_scales.py [targets ...] [--dry-run] [-j N]
 """
 
-import re
+import argparse
+import fnmatch
+import os
+import sys
+import time
+
+from dart_weights import (
+    DEFAULT_WEIGHTS_DIR, WeightFile, add_batch_arguments, edit_weight_files, print_edit_report, weight_file_paths,
+)
+from weight_matrix import load_scale_registry
 
-# List of 46 invalid scales to remove
-INVALID_SCALES = {
-    'aggression',
-    'agreeableness',
-    'attention_seeking',
-    'autonomy',
-    'carefulness',
-    'cautiousness',
-    'change_resistance',
-    'conscientiousness',
-    'conservatism',
-    'cooperation',
-    'courage',
-    'cynicism',
-    'determination',
-    'diplomacy',
-    'emotional_awareness',
-    'emotional_expressiveness',
-    'emotional_stability',
-    'energy',
-    'enthusiasm',
-    'extraversion',
-    'feeling',
-    'flexibility',
-    'independence',
-    'inspiration',
-    'introversion',
-    'judging',
-    'leadership',
-    'logical_reasoning',
-    'objectivity',
-    'openness',
-    'openness_to_emotions',
-    'optimism',
-    'orderliness',
-    'peacefulness',
-    'perceiving',
-    'persuasiveness',
-    'planning',
-    'precision',
-    'reliability',
-    'routine_preference',
-    'self_confidence',
-    'sensing',
-    'skepticism',
-    'social_awareness',
-    'talkativeness',
-    'thinking',
-}
+DEFAULT_TARGET = os.path.join(DEFAULT_WEIGHTS_DIR, 'disc_personality_weights.dart')
+DISC_FILE_PATTERN = 'disc_*_weights.dart'
 
-def remove_invalid_scales(file_path):
-    """Remove lines containing invalid scale references"""
-    with open(file_path, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
+# Scales a weight may reference: hierarchical_scales.dart + personality_type_scales.dart
+REGISTERED_SCALES = frozenset(load_scale_registry())
 
-    new_lines = []
+def remove_invalid_scales(weight_file: WeightFile) -> int:
+    """Remove axisWeights / axisDirections items that reference unregistered scales"""
     removed_count = 0
 
-    for line in lines:
-        # Check if line contains any invalid scale
-        # Pattern: 'scale_name': weight,
-        match = re.search(r"'([a-z_]+)':\s*-?\d+\.?\d*,?\s*(?://.*)?$", line)
-        if match:
-            scale_name = match.group(1)
-            if scale_name in INVALID_SCALES:
-                removed_count += 1
-                print(f"Removing: {line.strip()}")
-                continue
+    for entry in weight_file.entries:
+        for scale_name in [s for s in entry.axis_weights if s not in REGISTERED_SCALES]:
+            print(f"Removing: {entry.key} '{scale_name}': {entry.axis_weights[scale_name]}")
+            weight_file.remove_axis_weight(entry, scale_name)
+            removed_count += 1
+        for scale_name in [s for s in (entry.axis_directions or {}) if s not in REGISTERED_SCALES]:
+            weight_file.remove_axis_direction(entry, scale_name)
+            removed_count += 1
 
-        new_lines.append(line)
+    if removed_count:
+        print(f"✅ Removed {removed_count} lines with invalid scales from {weight_file.path}")
+    return removed_count
 
-    # Write back
-    with open(file_path, 'w', encoding='utf-8') as f:
-        f.writelines(new_lines)
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Remove invalid scale references from weight files")
+    add_batch_arguments(parser, default_targets=[DEFAULT_TARGET])
+    args = parser.parse_args()
 
-    print(f"\n✅ Removed {removed_count} lines with invalid scales")
-    print(f"✅ File updated: {file_path}")
+    paths = weight_file_paths(args.targets)
+    disc_paths = [path for path in paths if fnmatch.fnmatch(os.path.basename(path), DISC_FILE_PATTERN)]
+    if len(disc_paths) < len(paths):
+        print(f"⚠️  Skipping {len(paths) - len(disc_paths)} files that are not DISC weight files ({DISC_FILE_PATTERN})")
+    if not disc_paths:
+        sys.exit(1)
 
-if __name__ == '__main__':
-    file_path = 'lib/config/summary/question_weights/disc_personality_weights.dart'
-    remove_invalid_scales(file_path)
+    started = time.perf_counter()
+    results = edit_weight_files(remove_invalid_scales, disc_paths, args.jobs, args.dry_run)
+    if not print_edit_report(results, args.dry_run, time.perf_counter() - started):
+        sys.exit(1)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Load test for scoring_server.py: requests per second and latency percentiles.
+
+Opens --concurrency keep-alive connections (asyncio, standard library) and
+sends --requests requests spread over them. The request mix is set with
+--mix (weights of the test-scales, personality-type and bipolar-dimensions
+endpoints); bodies are random stored answers of the tests in assets/tests
+(test-scales requests only for tests the server reports in /v1/tests),
+generated before the clock starts.
+
+Usage:
+    python tools/scoring_load_test.py --spawn [--workers 2] [--requests 20000] [--concurrency 64]
+    python tools/scoring_load_test.py --url http://127.0.0.1:8765 --mix 1,1,0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+import numpy as np
+
+from batch_scoring import REVERSED_STORAGE_TESTS
+from scoring_server import DEFAULT_HOST, DEFAULT_PORT
+from simulate_respondents import load_tests
+
+ENDPOINTS = ('scales', 'personality-type', 'bipolar-dimensions')
+
+
+def random_answers(test: Dict, rng: random.Random) -> Dict[str, int]:
+    answers = {}
+    for question in test['questions']:
+        if not question['answers']:
+            continue
+        score = rng.choice(question['answers'])['score']
+        if question.get('is_reversed') and test['id'] in REVERSED_STORAGE_TESTS:
+            score = 6 - score
+        answers[question['id']] = score
+    return answers
+
+
+def build_requests(count: int, mix: List[float], scored_tests: List[str], seed: int = 0) -> List[Tuple[str, str, bytes]]:
+    """(endpoint kind, path, body) of every request; test-scales requests only go to scored_tests"""
+    rng = random.Random(seed)
+    tests = load_tests()
+    scored = [test for test in tests if test['id'] in scored_tests]
+    requests = []
+    for _ in range(count):
+        kind = rng.choices(ENDPOINTS, weights=mix)[0]
+        if kind == 'scales':
+            test = rng.choice(scored)
+            path = f"/v1/tests/{test['id']}/scales"
+            body = {'answers': random_answers(test, rng)}
+        else:
+            path = f"/v1/{kind}"
+            taken = rng.sample(tests, rng.randint(1, 6))
+            body = {'results': [{'testId': test['id'], 'userAnswers': random_answers(test, rng)} for test in taken]}
+        requests.append((kind, path, json.dumps(body).encode('utf-8')))
+    return requests
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str,
+                   path: str, body: bytes, method: str = 'POST') -> Tuple[int, bytes]:
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.strip().lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def run_load(host: str, port: int, requests: List[Tuple[str, str, bytes]], concurrency: int) -> Dict:
+    latencies: Dict[str, List[float]] = {kind: [] for kind in ENDPOINTS}
+    errors = 0
+    queue = iter(requests)
+
+    async def worker():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for kind, path, body in queue:
+                started = time.perf_counter()
+                status, _ = await _request(reader, writer, host, path, body)
+                latencies[kind].append(time.perf_counter() - started)
+                if status != 200:
+                    errors += 1
+        finally:
+            writer.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {'elapsed': elapsed, 'latencies': latencies, 'errors': errors}
+
+
+def print_report(result: Dict, requests: int):
+    elapsed = result['elapsed']
+    print(f"✅ {requests:,} requests in {elapsed:.2f} s: {requests / elapsed:,.0f} req/s, {result['errors']} errors")
+    print(f"   {'endpoint':<20} {'count':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    everything = [latency for values in result['latencies'].values() for latency in values]
+    for kind, values in list(result['latencies'].items()) + [('all', everything)]:
+        if not values:
+            continue
+        p50, p90, p99 = np.percentile(np.array(values) * 1000, [50, 90, 99])
+        print(f"   {kind:<20} {len(values):>7,} {p50:8.2f} {p90:8.2f} {p99:8.2f} {max(values) * 1000:8.2f}")
+
+
+async def _scored_tests(host: str, port: int, timeout: float = 60.0) -> List[str]:
+    """Tests the server scores, waiting for it to come up"""
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            break
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+    try:
+        _, body = await _request(reader, writer, host, '/v1/tests', b'', method='GET')
+    finally:
+        writer.close()
+    return list(json.loads(body)['tests'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the scoring service")
+    parser.add_argument('--url', default=f"http://{DEFAULT_HOST}:{DEFAULT_PORT}")
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--mix', default='2,1,1',
+                        help="Relative weights of the test-scales, personality-type and bipolar-dimensions requests")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', action='store_true', help="Start scoring_server.py for the run")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes of the spawned server")
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    host, port = url.hostname or DEFAULT_HOST, url.port or DEFAULT_PORT
+    mix = [float(weight) for weight in args.mix.split(',')]
+    if len(mix) != len(ENDPOINTS) or not any(mix):
+        parser.error(f"--mix needs {len(ENDPOINTS)} weights")
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scoring_server.py'),
+                                   '--host', host, '--port', str(port), '--workers', str(args.workers)],
+                                  start_new_session=True)
+    try:
+        requests = build_requests(args.requests, mix, asyncio.run(_scored_tests(host, port)), args.seed)
+        result = asyncio.run(run_load(host, port, requests, args.concurrency))
+    finally:
+        if server is not None:
+            # The server and its worker processes form their own process group
+            os.killpg(server.pid, signal.SIGTERM)
+            server.wait()
+    print_report(result, len(requests))
+    if result['errors']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
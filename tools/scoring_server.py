@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Local HTTP scoring service with the SummaryService / TestService rules.
+
+Standard library only (asyncio streams, HTTP/1.1 with keep-alive). The
+compiled weight matrices are memory-mapped from their weight_store.py
+stores at startup; with --workers N the parent brings the stores up to
+date and N processes serve the port (SO_REUSEPORT), sharing the mapped
+pages instead of each holding a parsed copy. Requests are then
+collected into micro-batches (up to --max-batch requests or --max-delay-ms
+after the first one) and scored together with the NumPy models of
+batch_scoring, so a burst of requests costs one matrix product instead
+of one Python loop each.
+
+Endpoints (JSON in, JSON out):
+
+    GET  /health                     weights hashes and batching counters
+    GET  /v1/tests                   tests with hierarchical scales
+    POST /v1/tests/<id>/scales       {"answers": {questionId: stored score}}
+                                     -> {"testId", "scaleScores"}   (TestScaleModel)
+    POST /v1/personality-type        {"results": [{"testId", "userAnswers"}, ...]}
+                                     -> {"personalityType", "bipolarPercentages", "typeScales"}
+    POST /v1/bipolar-dimensions      same body -> {"personalityType", "bipolarScores"} shaped
+                                     like calculateAveragedPersonalityType's bipolarScores
+
+Answers are the stored userAnswers values (6 - score for reversed
+ipip_big_five / love_profile questions, factor_<id> counts for
+conflict_communication_style_v1), as in the app's TestResult.
+
+Usage:
+    python tools/scoring_server.py [--port 8765] [--workers 1] [--max-batch 256] [--max-delay-ms 2]
+    python tools/scoring_load_test.py --spawn --requests 20000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from batch_scoring import DIMENSIONS, ScoringModel, TestScaleModel
+from simulate_respondents import load_tests
+from weight_matrix import TEST_SCALES_OUTPUT, config_map_names
+from weight_store import DEFAULT_STORE, TEST_SCALES_STORE, WeightStore, compiled_weight_store
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_DELAY_MS = 2.0
+MAX_BODY_BYTES = 1024 * 1024
+# BipolarDimensionScore in calculateAveragedPersonalityType
+BIPOLAR_MAX_SCORE = 40
+
+REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class MicroBatcher:
+    """Collects submitted items and scores them in one call of score_batch"""
+
+    def __init__(self, score_batch: Callable[[List], List], max_batch: int = DEFAULT_MAX_BATCH,
+                 max_delay: float = DEFAULT_MAX_DELAY_MS / 1000):
+        self.score_batch = score_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._items: List = []
+        self._futures: List[asyncio.Future] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append(item)
+        self._futures.append(future)
+        if len(self._items) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, futures = self._items, self._futures
+        self._items, self._futures = [], []
+        if not items:
+            return
+        self.batches += 1
+        self.items += len(items)
+        try:
+            results = self.score_batch(items)
+        except Exception as e:  # one bad batch must not take the server down
+            for future in futures:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in zip(futures, results):
+            if not future.done():
+                future.set_result(result)
+
+
+def _dart_round(value: float) -> int:
+    """num.round(): halves away from zero"""
+    return int(math.floor(abs(value) + 0.5)) * (1 if value >= 0 else -1)
+
+
+def bipolar_scores(percentages: Dict[str, float]) -> Dict[str, Dict]:
+    """bipolarScores of calculateAveragedPersonalityType"""
+    scores = {}
+    for dimension, _, _, positive_letter, negative_letter in DIMENSIONS:
+        percentage = percentages[dimension]
+        positive_dominant = percentage > 50
+        major = _dart_round(percentage / 100 * BIPOLAR_MAX_SCORE)
+        minor = _dart_round((100 - percentage) / 100 * (BIPOLAR_MAX_SCORE // 2))
+        dimension_id = f"personality_type_{dimension.lower()}"
+        scores[dimension_id] = {
+            'dimensionId': dimension_id,
+            'positiveScore': major if positive_dominant else minor,
+            'negativeScore': minor if positive_dominant else major,
+            'positiveMaxScore': BIPOLAR_MAX_SCORE,
+            'negativeMaxScore': BIPOLAR_MAX_SCORE,
+            'dominantPole': positive_letter if positive_dominant else negative_letter,
+            'normalizedScore': percentage,
+        }
+    return scores
+
+
+class ScoringService:
+    """Models loaded once, one micro-batcher per scoring surface"""
+
+    def __init__(self, max_batch: int = DEFAULT_MAX_BATCH, max_delay_ms: float = DEFAULT_MAX_DELAY_MS,
+                 type_store: str = DEFAULT_STORE, scale_store: str = TEST_SCALES_STORE):
+        started = time.perf_counter()
+        type_matrix = WeightStore(type_store)
+        scale_matrix = WeightStore(scale_store)
+        self.weights = {'type': type_matrix.source_hash, 'test_scales': scale_matrix.source_hash}
+        self.type_model = ScoringModel(type_matrix)
+        self.test_models: Dict[str, TestScaleModel] = {}
+        for test in load_tests():
+            model = TestScaleModel(scale_matrix, test)
+            if model.scales:
+                self.test_models[test['id']] = model
+        self.load_seconds = time.perf_counter() - started
+
+        max_delay = max_delay_ms / 1000
+        self.type_batcher = MicroBatcher(self.type_model.score_users, max_batch, max_delay)
+        self.test_batchers = {
+            test_id: MicroBatcher(self._test_scorer(model), max_batch, max_delay)
+            for test_id, model in self.test_models.items()
+        }
+        self.requests = 0
+
+    @staticmethod
+    def _test_scorer(model: TestScaleModel) -> Callable[[List[Dict]], List[Dict]]:
+        def score(answer_maps: List[Dict]) -> List[Dict]:
+            rows = model.score(model.encode(answer_maps))
+            return [{scale: value for scale, value in zip(model.scales, row) if value == value}
+                    for row in rows.tolist()]
+        return score
+
+    # --- Endpoints ---
+
+    def health(self) -> Dict:
+        batchers = [self.type_batcher] + list(self.test_batchers.values())
+        batches = sum(batcher.batches for batcher in batchers)
+        items = sum(batcher.items for batcher in batchers)
+        return {
+            'status': 'ok',
+            'worker': os.getpid(),
+            'weights': self.weights,
+            'tests': len(self.test_models),
+            'load_seconds': round(self.load_seconds, 3),
+            'requests': self.requests,
+            'batches': batches,
+            'mean_batch_size': round(items / batches, 2) if batches else 0.0,
+        }
+
+    async def test_scales(self, test_id: str, body: Dict) -> Dict:
+        batcher = self.test_batchers.get(test_id)
+        if batcher is None:
+            raise HTTPError(404, f"Unknown test or test without scales: {test_id}")
+        answers = body.get('answers', body.get('userAnswers'))
+        if not isinstance(answers, dict):
+            raise HTTPError(400, "Expected {\"answers\": {questionId: score}}")
+        return {'testId': test_id, 'scaleScores': await batcher.submit(_checked_answers(answers))}
+
+    async def personality_type(self, body: Dict) -> Dict:
+        results = body.get('results')
+        if not isinstance(results, list):
+            raise HTTPError(400, "Expected {\"results\": [{\"testId\", \"userAnswers\"}, ...]}")
+        checked = []
+        for result in results:
+            if not isinstance(result, dict) or not isinstance(result.get('testId'), str):
+                raise HTTPError(400, "Every result needs a testId")
+            checked.append({'testId': result['testId'], 'userAnswers': _checked_answers(result.get('userAnswers') or {})})
+        scored = await self.type_batcher.submit({'results': checked})
+        scored.pop('userId', None)
+        return scored
+
+    async def bipolar_dimensions(self, body: Dict) -> Dict:
+        scored = await self.personality_type(body)
+        return {'personalityType': scored['personalityType'],
+                'bipolarScores': bipolar_scores(scored['bipolarPercentages'])}
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> Dict:
+        self.requests += 1
+        if path == '/health':
+            _require(method, 'GET')
+            return self.health()
+        if path == '/v1/tests':
+            _require(method, 'GET')
+            return {'tests': {test_id: model.scales for test_id, model in sorted(self.test_models.items())}}
+
+        payload = _json_body(body)
+        if path == '/v1/personality-type':
+            _require(method, 'POST')
+            return await self.personality_type(payload)
+        if path == '/v1/bipolar-dimensions':
+            _require(method, 'POST')
+            return await self.bipolar_dimensions(payload)
+        parts = path.strip('/').split('/')
+        if len(parts) == 4 and parts[:2] == ['v1', 'tests'] and parts[3] == 'scales':
+            _require(method, 'POST')
+            return await self.test_scales(parts[2], payload)
+        raise HTTPError(404, f"No route for {path}")
+
+
+def _require(method: str, expected: str):
+    if method != expected:
+        raise HTTPError(405, f"Use {expected}")
+
+
+def _json_body(body: bytes) -> Dict:
+    try:
+        payload = json.loads(body or b'{}')
+    except ValueError:
+        raise HTTPError(400, "Body is not valid JSON")
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "Body must be a JSON object")
+    return payload
+
+
+def _checked_answers(answers: Dict) -> Dict[str, float]:
+    if not isinstance(answers, dict):
+        raise HTTPError(400, "userAnswers must be an object")
+    for question_id, score in answers.items():
+        if isinstance(score, bool) or not isinstance(score, (int, float)):
+            raise HTTPError(400, f"Answer {question_id} must be a number")
+        if isinstance(score, float) and not math.isfinite(score):
+            # json.loads accepts NaN / Infinity, which would poison the vectorized sums
+            raise HTTPError(400, f"Answer {question_id} must be a finite number")
+    return answers
+
+
+# --- HTTP ---
+
+def _response(status: int, payload: Dict, keep_alive: bool) -> bytes:
+    body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Optional[Tuple[str, str, str, Dict[str, str], bytes]]:
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return None
+    try:
+        method, target, version = request_line.decode('latin-1').split()
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+    headers: Dict[str, str] = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    try:
+        length = int(headers.get('content-length', '0'))
+    except ValueError:
+        raise HTTPError(400, "Bad Content-Length")
+    if length < 0:
+        raise HTTPError(400, "Bad Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise HTTPError(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+    body = await reader.readexactly(length) if length else b''
+    return method, target.split('?', 1)[0], version, headers, body
+
+
+def make_handler(service: ScoringService):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await _read_request(reader)
+                except HTTPError as e:
+                    writer.write(_response(e.status, {'error': str(e)}, keep_alive=False))
+                    break
+                if request is None:
+                    break
+                method, path, version, headers, body = request
+                keep_alive = version == 'HTTP/1.1' and headers.get('connection', '').lower() != 'close'
+                try:
+                    status, payload = 200, await service.dispatch(method, path, body)
+                except HTTPError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'error': f"{type(e).__name__}: {e}"}
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(host: str, port: int, service: ScoringService, reuse_port: bool = False):
+    server = await asyncio.start_server(make_handler(service), host, port, backlog=1024, reuse_port=reuse_port)
+    print(f"🚀 Scoring service on http://{host}:{port} (pid {os.getpid()}, "
+          f"{len(service.test_models)} tests, weights loaded in {service.load_seconds:.2f} s)", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+def run_worker(host: str, port: int, max_batch: int, max_delay_ms: float, stores: Tuple[str, str], reuse_port: bool):
+    service = ScoringService(max_batch, max_delay_ms, *stores)
+    try:
+        asyncio.run(serve(host, port, service, reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP scoring service with micro-batched NumPy scoring")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--workers', type=int, default=1, help="Processes serving the port, sharing the mapped weights")
+    parser.add_argument('--max-batch', type=int, default=DEFAULT_MAX_BATCH, help="Requests scored together at most")
+    parser.add_argument('--max-delay-ms', type=float, default=DEFAULT_MAX_DELAY_MS,
+                        help="How long the first request of a batch waits for others")
+    args = parser.parse_args()
+
+    stores = (compiled_weight_store(), compiled_weight_store(TEST_SCALES_OUTPUT, config_map_names()))
+    if args.workers <= 1:
+        run_worker(args.host, args.port, args.max_batch, args.max_delay_ms, stores, reuse_port=False)
+        return
+
+    workers = [
+        multiprocessing.Process(target=run_worker, daemon=True,
+                                args=(args.host, args.port, args.max_batch, args.max_delay_ms, stores, True))
+        for _ in range(args.workers)
+    ]
+    for worker in workers:
+        worker.start()
+    # Installed after the fork, so only the parent turns SIGTERM into stopping its workers
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+
+
+if __name__ == '__main__':
+    # Run through the importable module so worker processes unpickle scoring_server.run_worker
+    import scoring_server
+    scoring_server.main()
@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo simulation of respondents, to see what the weights do to the
+score distributions before a weight change ships.
+
+Every simulated respondent takes each test with probability --completion
+and answers all of its questions. An answer is drawn from the question's
+options sorted by score: uniformly, or from a discretized normal with
+spread --sd around the respondent's position for that test
+(--mean + --respondent-sd * z, mirrored for is_reversed questions).
+Multi-choice tests, whose answer score is a factor index, are always drawn
+uniformly. Drawing goes through inverse-CDF tables quantized to 1024
+levels and 256 respondent positions, so a block of answers costs one
+uint16 draw and two table lookups.
+
+Answers are stored the way TestService stores them (6 - score for reversed
+ipip_big_five / love_profile questions, factor_<id> counts for
+conflict_communication_style_v1) and scored in batches with the math of
+batch_scoring:
+
+    type scales     SummaryService personality type scales, bipolar
+                    percentages and type codes (ScoringModel weights)
+    test scales     with --test-scales, the hierarchical scale scores of every
+                    test (TestScaleModel over the QuestionWeightsConfig maps)
+
+Scores are counted into fixed histograms of 0.1-point bins, so memory does
+not grow with the number of respondents; mean, sd and percentiles 1-99
+are derived from them. The report is written as JSON. --baseline prints
+the shift against an earlier report, and bipolar dimensions whose median
+is more than --max-skew points away from 50 are listed (exit 1 with
+--strict). TestService special cases that bypass the weights (creative_type
+answer weights, factor scores) are not simulated.
+
+Usage:
+    python tools/simulate_respondents.py [--respondents 1000000] [--distribution normal|uniform]
+    python tools/simulate_respondents.py --test-scales --baseline build/simulation/before.json
+    python tools/simulate_respondents.py --respondents 20000 --test-scales --check 500
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from batch_scoring import (
+    DIMENSIONS, FACTOR_MAX, FACTOR_PREFIX, MULTI_CHOICE_TESTS, PERSONALITY_TYPE_SCALES, REVERSED_STORAGE_TESTS,
+    ScoringModel, TestScaleModel, bipolar_percentage, reference_scores, reference_test_scales,
+)
+from dart_weights import REPO_ROOT
+from weight_matrix import TEST_SCALES_OUTPUT, WeightMatrix, compiled_weight_matrix, config_map_names
+
+TESTS_DIR = os.path.join(REPO_ROOT, 'assets', 'tests')
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, 'build', 'simulation', 'simulation.json')
+REPORT_FORMAT = 'respondent_simulation'
+REPORT_VERSION = 1
+
+LEVELS = 1024
+POSITIONS = 256
+BIN_WIDTH = 0.1
+# Type scales are not clamped: an answer of 5 normalized by 4 scores 125
+MAX_SCORE = 200.0
+BINS = int(round(MAX_SCORE / BIN_WIDTH)) + 1
+PERCENTILES = list(range(1, 100))
+
+# TestService stores userAnswers['factor_<id>'] = number of questions answered with the factor
+COUNTED_FACTOR_TESTS = ('conflict_communication_style_v1',)
+TYPE_LETTERS = 3  # positive, negative, X
+
+
+class AnswerSampler:
+    """Quantized inverse-CDF tables: (respondent position, uniform level) -> option index"""
+
+    def __init__(self, distribution: str = 'normal', mean: float = 0.5, sd: float = 0.25,
+                 respondent_sd: float = 0.15):
+        self.distribution = distribution
+        self.mean = mean
+        self.sd = sd
+        self.respondent_sd = respondent_sd if distribution == 'normal' else 0.0
+        spread = 4 * self.respondent_sd
+        self.low = mean - spread
+        self.high = mean + spread
+        positions = POSITIONS if spread > 0 else 1
+        self.centers = self.low + (np.arange(positions) + 0.5) * (self.high - self.low) / positions
+        self._tables: Dict[Tuple[int, bool], np.ndarray] = {}
+
+    def settings(self) -> Dict:
+        return {'distribution': self.distribution, 'mean': self.mean, 'sd': self.sd,
+                'respondent_sd': self.respondent_sd}
+
+    def table(self, options: int, nominal: bool = False) -> np.ndarray:
+        """Flat positions x LEVELS table of option indices for questions with `options` answers"""
+        key = (options, nominal)
+        if key not in self._tables:
+            if nominal or self.distribution == 'uniform' or options == 1:
+                probabilities = np.full((len(self.centers), options), 1.0 / options)
+            else:
+                x = np.linspace(0.0, 1.0, options)
+                probabilities = np.exp(-0.5 * ((x[None, :] - self.centers[:, None]) / self.sd) ** 2)
+                probabilities /= probabilities.sum(axis=1, keepdims=True)
+            cdf = np.cumsum(probabilities, axis=1)
+            levels = (np.arange(LEVELS) + 0.5) / LEVELS
+            table = (levels[None, :, None] >= cdf[:, None, :]).sum(axis=2)
+            self._tables[key] = np.minimum(table, options - 1).astype(np.uint8).ravel()
+        return self._tables[key]
+
+    def offsets(self, z: np.ndarray, reversed_: bool) -> np.ndarray:
+        """Table row offsets of respondents with latent z (a row of LEVELS entries each)"""
+        if len(self.centers) == 1:
+            return np.zeros(len(z), dtype=np.int64)
+        position = self.mean + (-self.respondent_sd if reversed_ else self.respondent_sd) * z
+        index = np.floor((position - self.low) / (self.high - self.low) * len(self.centers)).astype(np.int64)
+        return np.clip(index, 0, len(self.centers) - 1) * LEVELS
+
+
+@dataclass
+class QuestionGroup:
+    """Questions of one test sampled together: same option count and direction"""
+    options: int
+    reversed: bool
+    nominal: bool
+    columns: np.ndarray       # question positions in the test
+    stored: np.ndarray        # questions x options, the value TestService stores per option
+    type_values: np.ndarray   # stored / divisor, 0 for questions without type weights
+    type_weights: np.ndarray  # questions x 8 |weights|
+
+    @property
+    def bases(self) -> np.ndarray:
+        return np.arange(len(self.columns)) * self.options
+
+
+class SimulatedTest:
+    """One test prepared for batch sampling"""
+
+    def __init__(self, test: Dict, type_model: ScoringModel, scale_model: Optional[TestScaleModel] = None,
+                 keep_answers: bool = False):
+        self.test = test
+        self.test_id = test['id']
+        self.question_ids = [question['id'] for question in test['questions']]
+        self.scale_model = scale_model
+        type_rows = type_model.test_rows.get(self.test_id, {})
+        scale_count = len(PERSONALITY_TYPE_SCALES)
+
+        self.counted_factors = list(test.get('factors') or []) if self.test_id in COUNTED_FACTOR_TESTS else []
+        self.factor_weights = np.array([
+            type_model.weights[type_rows[FACTOR_PREFIX + factor]] if FACTOR_PREFIX + factor in type_rows
+            else np.zeros(scale_count)
+            for factor in self.counted_factors
+        ]).reshape(-1, scale_count)
+        # Questions without type weights are only drawn when something else reads them
+        self.answers_needed = keep_answers or scale_model is not None or bool(self.factor_weights.any())
+
+        nominal = self.test_id in MULTI_CHOICE_TESTS
+        members: Dict[Tuple[int, bool], List[Tuple[int, List[float], Optional[int]]]] = {}
+        for column, question in enumerate(test['questions']):
+            row = type_rows.get(question['id'])
+            if not question['answers'] or (row is None and not self.answers_needed):
+                continue
+            scores = [answer['score'] for answer in question['answers']]
+            if not nominal:
+                scores.sort()
+            if question.get('is_reversed') and self.test_id in REVERSED_STORAGE_TESTS:
+                scores = [6 - score for score in scores]
+            reversed_ = bool(question.get('is_reversed')) and not nominal
+            members.setdefault((len(scores), reversed_), []).append((column, scores, row))
+
+        self.groups: List[QuestionGroup] = []
+        for (options, reversed_), questions in sorted(members.items()):
+            stored = np.array([scores for _, scores, _ in questions], dtype=np.float64)
+            rows = [row for _, _, row in questions]
+            divisors = np.array([type_model.divisors[row] if row is not None else 1.0 for row in rows])
+            weights = np.array([type_model.weights[row] if row is not None else np.zeros(scale_count)
+                                for row in rows])
+            has_weights = np.array([row is not None for row in rows])
+            self.groups.append(QuestionGroup(
+                options=options,
+                reversed=reversed_,
+                nominal=nominal,
+                columns=np.array([column for column, _, _ in questions], dtype=np.int64),
+                stored=stored,
+                type_values=np.where(has_weights[:, None], stored / divisors[:, None], 0.0),
+                type_weights=weights,
+            ))
+        # Every drawn question is answered, so the weight total per test is a constant
+        self.type_weight_total = sum((group.type_weights.sum(axis=0) for group in self.groups),
+                                     np.zeros(scale_count)) + self.factor_weights.sum(axis=0)
+
+    @property
+    def has_type_weights(self) -> bool:
+        return bool(self.type_weight_total.any())
+
+    def sample(self, sampler: AnswerSampler, z: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """(type scale sums, stored answers or None) of respondents with latents z"""
+        count = len(z)
+        type_sums = np.zeros((count, len(PERSONALITY_TYPE_SCALES)))
+        answers = np.full((count, len(self.question_ids)), np.nan) if self.answers_needed else None
+        for group in self.groups:
+            table = sampler.table(group.options, group.nominal)
+            levels = rng.integers(0, LEVELS, size=(count, len(group.columns)), dtype=np.uint16)
+            options = table[sampler.offsets(z, group.reversed)[:, None] + levels]
+            flat = group.bases + options
+            type_sums += group.type_values.ravel()[flat] @ group.type_weights
+            if answers is not None:
+                answers[:, group.columns] = group.stored.ravel()[flat]
+        if self.counted_factors:
+            counts = self.factor_counts(answers)
+            type_sums += counts / FACTOR_MAX @ self.factor_weights
+        return type_sums, answers
+
+    def factor_counts(self, answers: np.ndarray) -> np.ndarray:
+        return np.stack([(answers == f).sum(axis=1) for f in range(len(self.counted_factors))],
+                        axis=1).astype(np.float64)
+
+    def user_answers(self, answers: np.ndarray) -> Dict[str, int]:
+        """userAnswers map of one respondent, as TestService saves it"""
+        stored = {question_id: int(value) for question_id, value in zip(self.question_ids, answers.tolist())
+                  if value == value}
+        if self.counted_factors:
+            counts = self.factor_counts(answers[None, :])[0]
+            stored.update({FACTOR_PREFIX + factor: int(c) for factor, c in zip(self.counted_factors, counts)})
+        return stored
+
+
+class ScoreHistogram:
+    """Histograms of several scores with fixed 0.1 bins; memory is independent of the sample"""
+
+    def __init__(self, names: List[str]):
+        self.names = list(names)
+        self.counts = np.zeros((len(self.names), BINS), dtype=np.int64)
+        self.sums = np.zeros(len(self.names))
+        self.squares = np.zeros(len(self.names))
+        self.minimums = np.full(len(self.names), np.inf)
+        self.maximums = np.full(len(self.names), -np.inf)
+
+    def add(self, values: np.ndarray):
+        """Count a respondents x names block; NaN means no score"""
+        valid = ~np.isnan(values)
+        clean = np.where(valid, values, 0.0)
+        bins = np.clip(np.rint(clean / BIN_WIDTH), 0, BINS - 1).astype(np.int64)
+        flat = (bins + np.arange(len(self.names)) * BINS)[valid]
+        self.counts += np.bincount(flat, minlength=self.counts.size).reshape(self.counts.shape)
+        self.sums += clean.sum(axis=0)
+        self.squares += (clean * clean).sum(axis=0)
+        self.minimums = np.minimum(self.minimums, np.where(valid, values, np.inf).min(axis=0))
+        self.maximums = np.maximum(self.maximums, np.where(valid, values, -np.inf).max(axis=0))
+
+    def merge(self, other: 'ScoreHistogram'):
+        if other.names != self.names:
+            raise ValueError("Histograms of different scores cannot be merged")
+        self.counts += other.counts
+        self.sums += other.sums
+        self.squares += other.squares
+        self.minimums = np.minimum(self.minimums, other.minimums)
+        self.maximums = np.maximum(self.maximums, other.maximums)
+
+    def percentiles(self, i: int, points: List[int] = PERCENTILES) -> List[float]:
+        """Percentiles of one score, interpolated inside the 0.1-wide bins"""
+        counts = self.counts[i]
+        cumulative = np.cumsum(counts)
+        total = cumulative[-1]
+        targets = np.asarray(points, dtype=np.float64) / 100 * total
+        bins = np.searchsorted(cumulative, targets, side='left')
+        before = np.where(bins > 0, cumulative[bins - 1], 0)
+        fractions = (targets - before) / np.maximum(counts[bins], 1)
+        values = (bins - 0.5 + fractions) * BIN_WIDTH
+        return np.clip(values, self.minimums[i], self.maximums[i]).tolist()
+
+    def summary(self, i: int) -> Dict:
+        n = int(self.counts[i].sum())
+        if n == 0:
+            return {'n': 0}
+        mean = self.sums[i] / n
+        nonzero = np.flatnonzero(self.counts[i])
+        return {
+            'n': n,
+            'mean': round(float(mean), 4),
+            'sd': round(float(np.sqrt(max(self.squares[i] / n - mean * mean, 0.0))), 4),
+            'min': round(float(self.minimums[i]), 4),
+            'max': round(float(self.maximums[i]), 4),
+            'percentiles': [round(value, 2) for value in self.percentiles(i)],
+            # Trimmed to the occupied bins: bin k of the list covers offset + k, in BIN_WIDTH units
+            'histogram': {'offset': int(nonzero[0]),
+                          'counts': self.counts[i, nonzero[0]:nonzero[-1] + 1].tolist()},
+        }
+
+    def to_json(self) -> Dict[str, Dict]:
+        return {name: self.summary(i) for i, name in enumerate(self.names)}
+
+
+class Simulation:
+    """Respondent generator plus the accumulated statistics"""
+
+    def __init__(self, tests: List[SimulatedTest], sampler: AnswerSampler, completion: float):
+        self.tests = tests
+        self.sampler = sampler
+        self.completion = completion
+        self.respondents = 0
+        self.typed = 0
+        self.type_scales = ScoreHistogram(PERSONALITY_TYPE_SCALES + [dimension[0] for dimension in DIMENSIONS])
+        self.type_codes = np.zeros(TYPE_LETTERS ** len(DIMENSIONS), dtype=np.int64)
+        self.test_scales = {test.test_id: ScoreHistogram(test.scale_model.scales)
+                            for test in tests if test.scale_model is not None and test.scale_model.scales}
+
+    def run_batch(self, count: int, rng: np.random.Generator, keep_answers: bool = False) -> Dict:
+        """Simulate and count one batch; with keep_answers the raw scores and answers are returned"""
+        taken = rng.random((count, len(self.tests))) < self.completion
+        latents = rng.standard_normal((count, len(self.tests)))
+        scale_scores = np.zeros((count, len(PERSONALITY_TYPE_SCALES)))
+        scale_weights = np.zeros((count, len(PERSONALITY_TYPE_SCALES)))
+        kept: Dict = {'taken': taken, 'answers': {}, 'test_scales': {}}
+
+        for t, test in enumerate(self.tests):
+            rows = np.flatnonzero(taken[:, t])
+            if not len(rows):
+                continue
+            type_sums, answers = test.sample(self.sampler, latents[rows, t], rng)
+            scale_scores[rows] += type_sums
+            scale_weights[rows] += test.type_weight_total
+            if test.test_id in self.test_scales:
+                scores = test.scale_model.score(answers)
+                self.test_scales[test.test_id].add(scores)
+                if keep_answers:
+                    kept['test_scales'][test.test_id] = (rows, scores)
+            if keep_answers and answers is not None:
+                kept['answers'][test.test_id] = (rows, answers)
+
+        # Respondents without a single type-weighted answer get no type in the app either
+        typed = scale_weights.any(axis=1)
+        scale_scores = scale_scores[typed]
+        scale_weights = scale_weights[typed]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scales = np.where(scale_weights > 0, scale_scores / scale_weights * 100, 0.0)
+        percentages = np.stack([
+            bipolar_percentage(scales[:, PERSONALITY_TYPE_SCALES.index(positive)],
+                               scales[:, PERSONALITY_TYPE_SCALES.index(negative)])
+            for _, positive, negative, _, _ in DIMENSIONS
+        ], axis=1)
+        letters = np.where(percentages > 50, 0, np.where(percentages < 50, 1, 2))
+        codes = letters @ (TYPE_LETTERS ** np.arange(len(DIMENSIONS))[::-1])
+
+        self.type_scales.add(np.concatenate([scales, percentages], axis=1))
+        self.type_codes += np.bincount(codes, minlength=len(self.type_codes))
+        self.respondents += count
+        self.typed += int(typed.sum())
+        if keep_answers:
+            kept.update(typed=typed, scales=scales, percentages=percentages, codes=codes)
+        return kept
+
+    def type_frequencies(self) -> Dict[str, int]:
+        frequencies = {}
+        for code in np.flatnonzero(self.type_codes):
+            digits = [(code // TYPE_LETTERS ** (len(DIMENSIONS) - 1 - d)) % TYPE_LETTERS for d in range(len(DIMENSIONS))]
+            name = ''.join(dimension[3 + digit] if digit < 2 else 'X' for dimension, digit in zip(DIMENSIONS, digits))
+            frequencies[name] = int(self.type_codes[code])
+        return dict(sorted(frequencies.items(), key=lambda item: -item[1]))
+
+    def skewed_dimensions(self, max_skew: float) -> List[Tuple[str, float]]:
+        """Bipolar dimensions whose median is more than max_skew points from 50"""
+        skewed = []
+        for d, dimension in enumerate(DIMENSIONS):
+            i = len(PERSONALITY_TYPE_SCALES) + d
+            if self.type_scales.counts[i].sum() == 0:
+                continue
+            median = self.type_scales.percentiles(i, [50])[0]
+            if abs(median - 50) > max_skew:
+                skewed.append((dimension[0], median))
+        return skewed
+
+    def to_json(self, settings: Dict) -> Dict:
+        return {
+            'format': REPORT_FORMAT,
+            'version': REPORT_VERSION,
+            'settings': settings,
+            'respondents': self.respondents,
+            'typed_respondents': self.typed,
+            'bin_width': BIN_WIDTH,
+            'percentiles': PERCENTILES,
+            'type_scales': self.type_scales.to_json(),
+            'types': self.type_frequencies(),
+            'test_scales': {test_id: histogram.to_json() for test_id, histogram in self.test_scales.items()},
+        }
+
+
+# --- Loading ---
+
+def load_tests(tests_dir: str = TESTS_DIR, test_ids: Optional[List[str]] = None) -> List[Dict]:
+    tests = []
+    for path in sorted(glob.glob(os.path.join(tests_dir, '*.json'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            test = json.load(f)
+        if not test_ids or test['id'] in test_ids:
+            tests.append(test)
+    return tests
+
+
+def build_simulation(tests: List[Dict], type_matrix: WeightMatrix, scale_matrix: Optional[WeightMatrix],
+                     sampler: AnswerSampler, completion: float, keep_answers: bool = False) -> Simulation:
+    type_model = ScoringModel(type_matrix)
+    simulated = []
+    for test in tests:
+        scale_model = TestScaleModel(scale_matrix, test) if scale_matrix is not None else None
+        if scale_model is not None and not scale_model.scales:
+            scale_model = None
+        candidate = SimulatedTest(test, type_model, scale_model, keep_answers)
+        if candidate.has_type_weights or candidate.scale_model is not None:
+            simulated.append(candidate)
+    return Simulation(simulated, sampler, completion)
+
+
+# --- Checks and reports ---
+
+def check_batch(simulation: Simulation, kept: Dict, type_matrix: WeightMatrix,
+                scale_matrix: Optional[WeightMatrix], tolerance: float = 1e-9) -> int:
+    """Compare a kept batch with the scalar reference ports; returns the number of mismatches"""
+    type_weights = {key: type_matrix.row(key) for key in type_matrix.questions}
+    scale_weights = {key: scale_matrix.row(key) for key in scale_matrix.questions} if scale_matrix else {}
+    count = len(kept['taken'])
+    results: List[List[Dict]] = [[] for _ in range(count)]
+    answer_maps: Dict[str, Dict[int, Dict[str, int]]] = {}
+    for test in simulation.tests:
+        if test.test_id not in kept['answers']:
+            continue
+        rows, answers = kept['answers'][test.test_id]
+        for row, answer_row in zip(rows.tolist(), answers):
+            stored = test.user_answers(answer_row)
+            answer_maps.setdefault(test.test_id, {})[row] = stored
+            results[row].append({'testId': test.test_id, 'userAnswers': stored})
+
+    failures = 0
+    typed_rows = np.flatnonzero(kept['typed'])
+    for i, row in enumerate(typed_rows.tolist()):
+        expected = reference_scores(results[row], type_weights)
+        scales = dict(zip(PERSONALITY_TYPE_SCALES, kept['scales'][i].tolist()))
+        percentages = {dimension[0]: float(kept['percentages'][i, d]) for d, dimension in enumerate(DIMENSIONS)}
+        mismatch = [name for name in PERSONALITY_TYPE_SCALES if abs(scales[name] - expected['typeScales'][name]) > tolerance]
+        mismatch += [name for name in percentages if abs(percentages[name] - expected['bipolarPercentages'][name]) > tolerance]
+        if mismatch:
+            failures += 1
+            if failures <= 5:
+                print(f"❌ respondent {row}: {mismatch} differ from the reference ({expected})")
+
+    for test_id, (rows, scores) in kept['test_scales'].items():
+        test = next(test for test in simulation.tests if test.test_id == test_id)
+        for row, score_row in zip(rows.tolist(), scores):
+            expected = reference_test_scales(test.test, answer_maps[test_id][row], scale_weights)
+            actual = {scale: value for scale, value in zip(test.scale_model.scales, score_row.tolist()) if value == value}
+            if actual.keys() != expected.keys() or any(abs(actual[k] - expected[k]) > tolerance for k in actual):
+                failures += 1
+                if failures <= 5:
+                    print(f"❌ {test_id} respondent {row}: {actual} != {expected}")
+    return failures
+
+
+def print_report(report: Dict, baseline: Optional[Dict] = None):
+    print(f"\n{'scale':<14} {'mean':>7} {'sd':>6} {'p5':>6} {'p50':>6} {'p95':>6}" + ('   Δmean' if baseline else ''))
+    for name, stats in report['type_scales'].items():
+        if not stats['n']:
+            continue
+        p = stats['percentiles']
+        line = f"{name:<14} {stats['mean']:7.2f} {stats['sd']:6.2f} {p[4]:6.1f} {p[49]:6.1f} {p[94]:6.1f}"
+        before = (baseline or {}).get('type_scales', {}).get(name)
+        if before and before.get('n'):
+            line += f" {stats['mean'] - before['mean']:+8.2f}"
+        print(line)
+
+    typed = report['typed_respondents'] or 1
+    before_types = (baseline or {}).get('types', {})
+    before_typed = (baseline or {}).get('typed_respondents') or 1
+    top = list(report['types'].items())[:8]
+    print("\nMost frequent types: " + ', '.join(
+        f"{name} {count / typed:.1%}" + (f" ({(count / typed - before_types.get(name, 0) / before_typed) * 100:+.1f})"
+                                         if baseline else '')
+        for name, count in top))
+
+    if baseline:
+        shifted = []
+        for test_id, scales in report['test_scales'].items():
+            for scale, stats in scales.items():
+                before = baseline.get('test_scales', {}).get(test_id, {}).get(scale)
+                if stats.get('n') and before and before.get('n'):
+                    shifted.append((abs(stats['mean'] - before['mean']), test_id, scale, stats['mean'] - before['mean']))
+        for _, test_id, scale, delta in sorted(shifted, reverse=True)[:10]:
+            if abs(delta) >= 0.5:
+                print(f"   {test_id}.{scale}: mean {delta:+.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate respondents and report the score distributions the weights produce")
+    parser.add_argument('--respondents', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=65_536)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--distribution', choices=('normal', 'uniform'), default='normal')
+    parser.add_argument('--mean', type=float, default=0.5, help="Average answer position, 0 = lowest score, 1 = highest")
+    parser.add_argument('--sd', type=float, default=0.25, help="Answer spread around the respondent's position")
+    parser.add_argument('--respondent-sd', type=float, default=0.15,
+                        help="Spread of the respondent positions (per test; 0 = everyone alike)")
+    parser.add_argument('--completion', type=float, default=0.2, help="Probability that a respondent takes a test")
+    parser.add_argument('--test', dest='tests', action='append', help="Only simulate this test (repeatable)")
+    parser.add_argument('--test-scales', action='store_true',
+                        help="Also simulate the hierarchical scale scores of every test")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', help="Earlier report to compare with")
+    parser.add_argument('--max-skew', type=float, default=10.0,
+                        help="Report bipolar dimensions whose median is further than this from 50")
+    parser.add_argument('--strict', action='store_true', help="Exit 1 if a dimension is skewed")
+    parser.add_argument('--check', type=int, default=0, metavar='N',
+                        help="Compare N extra respondents with the scalar reference implementations")
+    args = parser.parse_args()
+    if args.sd <= 0:
+        parser.error("--sd must be positive")
+    if not 0 < args.completion <= 1:
+        parser.error("--completion must be in (0, 1]")
+
+    started = time.perf_counter()
+    type_matrix = compiled_weight_matrix()
+    scale_matrix = compiled_weight_matrix(TEST_SCALES_OUTPUT, config_map_names()) if args.test_scales else None
+    sampler = AnswerSampler(args.distribution, args.mean, args.sd, args.respondent_sd)
+    simulation = build_simulation(load_tests(test_ids=args.tests), type_matrix, scale_matrix, sampler, args.completion)
+    if not simulation.tests:
+        print("❌ No test has weights to simulate")
+        sys.exit(1)
+    setup_seconds = time.perf_counter() - started
+    print(f"🎲 {len(simulation.tests)} tests, {args.respondents:,} respondents "
+          f"({args.distribution}, completion {args.completion:.0%}; setup {setup_seconds:.2f} s)")
+
+    rng = np.random.default_rng(args.seed)
+    started = time.perf_counter()
+    for offset in range(0, args.respondents, args.batch_size):
+        simulation.run_batch(min(args.batch_size, args.respondents - offset), rng)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Simulated {simulation.respondents:,} respondents in {elapsed:.2f} s "
+          f"({simulation.respondents / elapsed if elapsed else 0:,.0f}/s)")
+
+    settings = dict(sampler.settings(), respondents=args.respondents, seed=args.seed, completion=args.completion,
+                    tests=[test.test_id for test in simulation.tests], test_scales=args.test_scales,
+                    weights=type_matrix.source_hash,
+                    test_scale_weights=scale_matrix.source_hash if scale_matrix else None)
+    report = simulation.to_json(settings)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        # dumps() runs the C encoder; dump() streams through the pure Python one
+        f.write(json.dumps(report, ensure_ascii=False, separators=(',', ':')))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"\n📄 Report written to {os.path.relpath(args.output, REPO_ROOT)}")
+
+    failed = False
+    skewed = simulation.skewed_dimensions(args.max_skew)
+    for dimension, median in skewed:
+        print(f"⚠️  {dimension}: median {median:.1f} is more than {args.max_skew:g} points from 50")
+    failed |= args.strict and bool(skewed)
+
+    if args.check:
+        # A separate simulation that draws and keeps every answer, so the reference ports see all of them
+        check_matrix = scale_matrix or compiled_weight_matrix(TEST_SCALES_OUTPUT, config_map_names())
+        check_simulation = build_simulation(load_tests(test_ids=args.tests), type_matrix, check_matrix,
+                                            sampler, args.completion, keep_answers=True)
+        kept = check_simulation.run_batch(args.check, np.random.default_rng(args.seed + 1), keep_answers=True)
+        failures = check_batch(check_simulation, kept, type_matrix, check_matrix)
+        if failures:
+            print(f"❌ {failures} mismatches with the reference implementations")
+            failed = True
+        else:
+            print(f"✅ Parity with the reference implementations on {args.check} respondents")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
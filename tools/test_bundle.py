@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+Compact bundle format for test JSON: shared answer sets and texts stored once.
+
+In assets/tests/*.json every question repeats its full answer block with
+ru/en texts, although a test usually has one or two distinct answer sets.
+A bundle interns them:
+
+    {
+      "format": "test_bundle", "version": 1,
+      "texts": [{"ru": ..., "en": ...}, ...],          localized strings
+      "answer_sets": [[{"id": "a1", "text": 0, "score": 1}, ...], ...],
+      "test": {... "disclaimer": 3,
+               "questions": [{"id": "q1", "text": 5, ..., "answers": 0}, ...]}
+    }
+
+Question and answer `text` and the test `disclaimer` become indices into
+`texts`, question `answers` an index into `answer_sets`. Everything else is
+unchanged, and expand_bundle() gives back the original test JSON.
+
+The packed binary variant (little-endian) stores the same data in
+columns, so a reader can slice arrays without parsing text:
+
+    header      '<4sHH'  b'TSTB', version, 0
+    strings     u32 count, u32 offsets[count + 1], UTF-8 blob
+    texts       u32 count, u32 offsets[count + 1], u32 (language, string) pairs
+    answer_sets u32 count, u32 offsets[count + 1], u32 ids[n], u32 texts[n], i32 scores[n]
+    questions   u32 count, u32 columns id, text, answer_set, factor, bipolar_pole,
+                bipolar_dimension, target_scale, u8 flags (bit 0: is_reversed),
+                u32 axis_offsets[count + 1], u32 axis_scales[m], f64 axis_weights[m]
+    meta        u32 string: the test fields as compact JSON, questions null
+
+Optional string columns use 0xFFFFFFFF for "absent".
+
+convert_tests.py --bundle-dir writes <test id>.bundle.json and .bundle.bin
+(to build/tests by default).
+Run this module to compare sizes and parse times of the three formats:
+
+Usage:
+    python tools/test_bundle.py [--repeat 200] [--json] [tests ...]
+"""
+
+import argparse
+import glob
+import json
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(TOOLS_DIR)
+TESTS_DIR = os.path.join(ROOT_DIR, 'assets', 'tests')
+
+BUNDLE_FORMAT = 'test_bundle'
+BUNDLE_VERSION = 1
+MAGIC = b'TSTB'
+HEADER = struct.Struct('<4sHH')
+NONE = 0xFFFFFFFF
+
+# Question fields in QuestionModel.toJson() order; the binary layout has a column for each
+QUESTION_FIELDS = ('id', 'text', 'factor', 'is_reversed', 'axis_weights',
+                   'bipolar_pole', 'bipolar_dimension', 'target_scale', 'answers')
+OPTIONAL_STRING_FIELDS = ('factor', 'bipolar_pole', 'bipolar_dimension', 'target_scale')
+REVERSED_FLAG = 1
+
+
+class Interner:
+    """Values in first-seen order with their index; keys must be hashable"""
+
+    def __init__(self):
+        self.values: List[Any] = []
+        self.index: Dict[Any, int] = {}
+
+    def add(self, key, value=None) -> int:
+        position = self.index.get(key)
+        if position is None:
+            position = self.index[key] = len(self.values)
+            self.values.append(key if value is None else value)
+        return position
+
+
+def _text_key(text: Dict[str, str]) -> Tuple:
+    return tuple(text.items())
+
+
+def _answers_key(answers: List[Dict]) -> Tuple:
+    return tuple((answer['id'], _text_key(answer['text']), answer['score']) for answer in answers)
+
+
+# --- JSON bundle ---
+
+def build_bundle(test: Dict) -> Dict:
+    """Bundle of one test JSON (as written by convert_tests.py)"""
+    texts = Interner()
+    answer_sets = Interner()
+
+    def text_ref(text: Dict[str, str]) -> int:
+        return texts.add(_text_key(text), text)
+
+    def answer_set_ref(answers: List[Dict]) -> int:
+        key = _answers_key(answers)
+        if key in answer_sets.index:
+            return answer_sets.index[key]
+        interned = [{'id': a['id'], 'text': text_ref(a['text']), 'score': a['score']} for a in answers]
+        return answer_sets.add(key, interned)
+
+    questions = []
+    for question in test['questions']:
+        interned = dict(question)
+        interned['text'] = text_ref(question['text'])
+        interned['answers'] = answer_set_ref(question['answers'])
+        questions.append(interned)
+
+    bundled = {}
+    for key, value in test.items():
+        if key == 'questions':
+            bundled[key] = questions
+        elif key == 'disclaimer':
+            bundled[key] = text_ref(value)
+        else:
+            bundled[key] = value
+    return {
+        'format': BUNDLE_FORMAT,
+        'version': BUNDLE_VERSION,
+        'texts': texts.values,
+        'answer_sets': answer_sets.values,
+        'test': bundled,
+    }
+
+
+def expand_bundle(bundle: Dict) -> Dict:
+    """Original test JSON of a bundle"""
+    if bundle.get('format') != BUNDLE_FORMAT or bundle.get('version') != BUNDLE_VERSION:
+        raise ValueError(f"not a {BUNDLE_FORMAT} v{BUNDLE_VERSION} bundle")
+    texts = bundle['texts']
+    answer_sets = [
+        [{'id': a['id'], 'text': texts[a['text']], 'score': a['score']} for a in answers]
+        for answers in bundle['answer_sets']
+    ]
+    test = {}
+    for key, value in bundle['test'].items():
+        if key == 'questions':
+            questions = []
+            for question in value:
+                expanded = dict(question)
+                expanded['text'] = texts[question['text']]
+                # Copies, so callers may edit one question without touching the others
+                expanded['answers'] = [dict(answer) for answer in answer_sets[question['answers']]]
+                questions.append(expanded)
+            test[key] = questions
+        elif key == 'disclaimer':
+            test[key] = texts[value]
+        else:
+            test[key] = value
+    return test
+
+
+def dump_bundle_json(bundle: Dict) -> bytes:
+    return json.dumps(bundle, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+# --- Packed binary ---
+
+def _le(values: array) -> bytes:
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _read_array(typecode: str, data: memoryview, offset: int, count: int) -> Tuple[array, int]:
+    values = array(typecode)
+    end = offset + count * values.itemsize
+    values.frombytes(data[offset:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values, end
+
+
+def pack_bundle(bundle: Dict) -> bytes:
+    """Binary form of a JSON bundle"""
+    strings = Interner()
+
+    def string_ref(value: Optional[str]) -> int:
+        return NONE if value is None else strings.add(value)
+
+    text_offsets = array('I', [0])
+    text_pairs = array('I')
+    for text in bundle['texts']:
+        for language, value in text.items():
+            text_pairs.extend((string_ref(language), string_ref(value)))
+        text_offsets.append(len(text_pairs) // 2)
+
+    set_offsets = array('I', [0])
+    answer_ids, answer_texts, answer_scores = array('I'), array('I'), array('i')
+    for answers in bundle['answer_sets']:
+        for answer in answers:
+            answer_ids.append(string_ref(answer['id']))
+            answer_texts.append(answer['text'])
+            answer_scores.append(answer['score'])
+        set_offsets.append(len(answer_ids))
+
+    test = bundle['test']
+    questions = test['questions']
+    columns = {name: array('I') for name in ('id', 'text', 'answers') + OPTIONAL_STRING_FIELDS}
+    flags = array('B')
+    axis_offsets, axis_scales, axis_weights = array('I', [0]), array('I'), array('d')
+    for question in questions:
+        unknown = set(question) - set(QUESTION_FIELDS)
+        if unknown:
+            raise ValueError(f"question {question['id']}: no binary column for {sorted(unknown)}")
+        columns['id'].append(string_ref(question['id']))
+        columns['text'].append(question['text'])
+        columns['answers'].append(question['answers'])
+        for name in OPTIONAL_STRING_FIELDS:
+            columns[name].append(string_ref(question.get(name)))
+        flags.append(REVERSED_FLAG if question.get('is_reversed') else 0)
+        for scale, weight in (question.get('axis_weights') or {}).items():
+            axis_scales.append(string_ref(scale))
+            axis_weights.append(weight)
+        axis_offsets.append(len(axis_scales))
+
+    # Keeps 'questions' as a null placeholder so the field order survives
+    meta = {key: None if key == 'questions' else value for key, value in test.items()}
+    meta_ref = string_ref(json.dumps(meta, ensure_ascii=False, separators=(',', ':')))
+
+    encoded = [value.encode('utf-8') for value in strings.values]
+    string_offsets = array('I', [0])
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    u32 = struct.Struct('<I')
+    parts = [HEADER.pack(MAGIC, BUNDLE_VERSION, 0),
+             u32.pack(len(encoded)), _le(string_offsets), b''.join(encoded),
+             u32.pack(len(bundle['texts'])), _le(text_offsets), _le(text_pairs),
+             u32.pack(len(bundle['answer_sets'])), _le(set_offsets),
+             _le(answer_ids), _le(answer_texts), _le(answer_scores),
+             u32.pack(len(questions))]
+    parts.extend(_le(columns[name]) for name in ('id', 'text', 'answers') + OPTIONAL_STRING_FIELDS)
+    parts.extend((flags.tobytes(), _le(axis_offsets), _le(axis_scales), _le(axis_weights), u32.pack(meta_ref)))
+    return b''.join(parts)
+
+
+def unpack_bundle(data: bytes) -> Dict:
+    """JSON bundle of a binary bundle"""
+    view = memoryview(data)
+    magic, version, _ = HEADER.unpack_from(view, 0)
+    if magic != MAGIC or version != BUNDLE_VERSION:
+        raise ValueError(f"not a {BUNDLE_FORMAT} v{BUNDLE_VERSION} binary bundle")
+    offset = HEADER.size
+
+    def count() -> int:
+        nonlocal offset
+        (value,) = struct.unpack_from('<I', view, offset)
+        offset += 4
+        return value
+
+    size = count()
+    string_offsets, offset = _read_array('I', view, offset, size + 1)
+    blob = bytes(view[offset:offset + string_offsets[-1]])
+    offset += string_offsets[-1]
+    strings = [blob[string_offsets[i]:string_offsets[i + 1]].decode('utf-8') for i in range(size)]
+
+    size = count()
+    text_offsets, offset = _read_array('I', view, offset, size + 1)
+    text_pairs, offset = _read_array('I', view, offset, 2 * text_offsets[-1])
+    texts = [
+        {strings[text_pairs[2 * k]]: strings[text_pairs[2 * k + 1]] for k in range(text_offsets[i], text_offsets[i + 1])}
+        for i in range(size)
+    ]
+
+    size = count()
+    set_offsets, offset = _read_array('I', view, offset, size + 1)
+    answers_total = set_offsets[-1]
+    answer_ids, offset = _read_array('I', view, offset, answers_total)
+    answer_texts, offset = _read_array('I', view, offset, answers_total)
+    answer_scores, offset = _read_array('i', view, offset, answers_total)
+    answer_sets = [
+        [{'id': strings[answer_ids[k]], 'text': answer_texts[k], 'score': answer_scores[k]}
+         for k in range(set_offsets[i], set_offsets[i + 1])]
+        for i in range(size)
+    ]
+
+    size = count()
+    columns = {}
+    for name in ('id', 'text', 'answers') + OPTIONAL_STRING_FIELDS:
+        columns[name], offset = _read_array('I', view, offset, size)
+    flags = bytes(view[offset:offset + size])
+    offset += size
+    axis_offsets, offset = _read_array('I', view, offset, size + 1)
+    axis_scales, offset = _read_array('I', view, offset, axis_offsets[-1])
+    axis_weights, offset = _read_array('d', view, offset, axis_offsets[-1])
+    meta = json.loads(strings[count()])
+
+    questions = []
+    for i in range(size):
+        question = {'id': strings[columns['id'][i]], 'text': columns['text'][i]}
+        if columns['factor'][i] != NONE:
+            question['factor'] = strings[columns['factor'][i]]
+        if flags[i] & REVERSED_FLAG:
+            question['is_reversed'] = True
+        if axis_offsets[i + 1] > axis_offsets[i]:
+            question['axis_weights'] = {strings[axis_scales[k]]: axis_weights[k]
+                                        for k in range(axis_offsets[i], axis_offsets[i + 1])}
+        for name in OPTIONAL_STRING_FIELDS[1:]:
+            if columns[name][i] != NONE:
+                question[name] = strings[columns[name][i]]
+        question['answers'] = columns['answers'][i]
+        questions.append(question)
+
+    test = meta
+    test['questions'] = questions
+    return {'format': BUNDLE_FORMAT, 'version': BUNDLE_VERSION, 'texts': texts,
+            'answer_sets': answer_sets, 'test': test}
+
+
+def bundle_files(test: Dict) -> Dict[str, bytes]:
+    """Contents of <test id>.bundle.json / .bundle.bin, by file name"""
+    bundle = build_bundle(test)
+    return {
+        f"{test['id']}.bundle.json": dump_bundle_json(bundle),
+        f"{test['id']}.bundle.bin": pack_bundle(bundle),
+    }
+
+
+# --- Report ---
+
+def _best_time(function, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def measure(path: str, repeat: int) -> Dict:
+    """Sizes and best-of-repeat parse times of one test in all three formats"""
+    with open(path, 'rb') as f:
+        original = f.read()
+    test = json.loads(original)
+    bundle = build_bundle(test)
+    bundle_json = dump_bundle_json(bundle)
+    bundle_bin = pack_bundle(bundle)
+
+    if expand_bundle(json.loads(bundle_json)) != test or expand_bundle(unpack_bundle(bundle_bin)) != test:
+        raise ValueError(f"{path}: bundle does not round-trip")
+
+    return {
+        'test': test['id'],
+        'questions': len(test['questions']),
+        'answer_sets': len(bundle['answer_sets']),
+        'texts': len(bundle['texts']),
+        'json_bytes': len(original),
+        'bundle_json_bytes': len(bundle_json),
+        'bundle_bin_bytes': len(bundle_bin),
+        'json_parse_s': _best_time(lambda: json.loads(original), repeat),
+        'bundle_json_parse_s': _best_time(lambda: json.loads(bundle_json), repeat),
+        'bundle_bin_parse_s': _best_time(lambda: unpack_bundle(bundle_bin), repeat),
+        'bundle_json_expand_s': _best_time(lambda: expand_bundle(json.loads(bundle_json)), repeat),
+    }
+
+
+def _saving(before: float, after: float) -> str:
+    return f"{(1 - after / before) * 100:5.1f}%" if before else '    -'
+
+
+def print_report(rows: List[Dict]):
+    print(f"{'test':<42} {'q':>3} {'sets':>4} {'json KB':>8} {'bundle':>7} {'bin':>7} "
+          f"{'json µs':>8} {'bundle':>7} {'bin':>7} {'+expand':>8}")
+    for row in rows:
+        print(f"{row['test']:<42} {row['questions']:>3} {row['answer_sets']:>4} "
+              f"{row['json_bytes'] / 1024:>8.1f} {row['bundle_json_bytes'] / 1024:>7.1f} {row['bundle_bin_bytes'] / 1024:>7.1f} "
+              f"{row['json_parse_s'] * 1e6:>8.0f} {row['bundle_json_parse_s'] * 1e6:>7.0f} "
+              f"{row['bundle_bin_parse_s'] * 1e6:>7.0f} {row['bundle_json_expand_s'] * 1e6:>8.0f}")
+    totals = {key: sum(row[key] for row in rows) for key in rows[0] if key.endswith(('_bytes', '_s'))}
+    print(f"\n📊 {len(rows)} tests")
+    print(f"   size:  json {totals['json_bytes'] / 1024:.0f} KB, "
+          f"bundle.json {totals['bundle_json_bytes'] / 1024:.0f} KB ({_saving(totals['json_bytes'], totals['bundle_json_bytes']).strip()} smaller), "
+          f"bundle.bin {totals['bundle_bin_bytes'] / 1024:.0f} KB ({_saving(totals['json_bytes'], totals['bundle_bin_bytes']).strip()} smaller)")
+    print(f"   parse: json {totals['json_parse_s'] * 1e3:.1f} ms, "
+          f"bundle.json {totals['bundle_json_parse_s'] * 1e3:.1f} ms ({_saving(totals['json_parse_s'], totals['bundle_json_parse_s']).strip()} faster), "
+          f"bundle.bin {totals['bundle_bin_parse_s'] * 1e3:.1f} ms ({_saving(totals['json_parse_s'], totals['bundle_bin_parse_s']).strip()} faster)")
+    print(f"   bundle.json parse + expand to the full test JSON: {totals['bundle_json_expand_s'] * 1e3:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare test JSON with the bundle formats")
+    parser.add_argument('tests', nargs='*', help="Test JSON files (default: assets/tests/*.json)")
+    parser.add_argument('--repeat', type=int, default=200, help="Parse repetitions per test (best time is kept)")
+    parser.add_argument('--json', action='store_true', help="Print the measurements as JSON")
+    args = parser.parse_args()
+
+    paths = args.tests or sorted(glob.glob(os.path.join(TESTS_DIR, '*.json')))
+    if not paths:
+        parser.error("no test JSON files found")
+    rows = [measure(path, args.repeat) for path in paths]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_report(rows)
+
+
+if __name__ == '__main__':
+    main()
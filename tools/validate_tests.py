@@ -0,0 +1,397 @@
+#!/usr/bin/env python3
+"""
+Validate every test JSON and every question weights file in one pass.
+
+The scale registry (hierarchical_scales.dart + personality_type_scales.dart)
+is loaded once into a scale index. Each file is then checked on its own in
+a process pool, and the cross-file checks (weight coverage, registration)
+run on the collected results:
+
+    weights files   unknown_scale, bad_weight (zero, non-finite or |w| > --max-weight),
+                    negative_pole_weight, bad_direction, direction_without_weight,
+                    conflicting_direction, redundant_direction, duplicate_key,
+                    key_mismatch, personality_suffix
+    test JSON       duplicate_question, bad_answers, unknown_factor (warning)
+    coverage        missing_weight (question without a weight; for tests weighted per
+                    factor, factor_<id> without a weight), orphan_weight (weight for
+                    a question or factor the test does not have), untested_weights
+                    (weights of a test without JSON), unspread_map (map not merged in
+                    SummaryService / QuestionWeightsConfig)
+    registration    missing_stub, unregistered_stub, question_count_mismatch,
+                    missing_loader_case, missing_summary_screen_case, missing_test_service
+
+Test JSON comes from convert_tests.py, so run it first after editing
+lib/data. The report is JSON on stdout (--format text for people); the
+exit code is 1 if there is any error. Warnings never fail the run.
+
+Usage:
+    python tools/validate_tests.py [--test ID ...] [--format json|text] [-j N] [--max-weight 1.5]
+    bash tools/validate_test.sh your_test_id
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from dart_weights import DEFAULT_CACHE_DIR, REPO_ROOT, load_weight_file, weight_file_paths
+from weight_matrix import (
+    HIERARCHICAL_SCALES_PATH, PERSONALITY_TYPE_SCALES_PATH, SUMMARY_CONFIG_PATH, SUMMARY_SERVICE_PATH,
+    load_scale_registry,
+)
+
+TESTS_DIR = os.path.join(REPO_ROOT, 'assets', 'tests')
+STUBS_DIR = os.path.join(REPO_ROOT, 'lib', 'data', 'tests')
+TEST_REGISTRY_PATH = os.path.join(REPO_ROOT, 'lib', 'data', 'test_registry.dart')
+TEST_LOADER_PATH = os.path.join(REPO_ROOT, 'lib', 'services', 'test_loader_service.dart')
+TEST_SERVICE_PATH = os.path.join(REPO_ROOT, 'lib', 'services', 'test_service.dart')
+SUMMARY_SCREEN_PATH = os.path.join(REPO_ROOT, 'lib', 'screens', 'summary_screen.dart')
+
+FACTOR_PREFIX = 'factor_'
+# Largest |weight| in the tree; the guides recommend 0.5-1.0
+DEFAULT_MAX_WEIGHT = 1.5
+
+STUB_ID_PATTERN = re.compile(r"class (\w+) extends TestStub.*?String get id => '([^']+)'", re.DOTALL)
+STUB_QUESTION_COUNT_PATTERN = re.compile(r"int get questionCount => (\d+);")
+STUB_ASSET_PATH_PATTERN = re.compile(r"String get assetPath => '([^']*)'")
+
+
+def issue(severity: str, check: str, message: str, file: Optional[str] = None, line: Optional[int] = None,
+          test: Optional[str] = None, key: Optional[str] = None, scale: Optional[str] = None) -> Dict:
+    result = {'severity': severity, 'check': check, 'message': message}
+    if file is not None:
+        result['file'] = os.path.relpath(file, REPO_ROOT)
+    for name, value in (('line', line), ('test', test), ('key', key), ('scale', scale)):
+        if value is not None:
+            result[name] = value
+    return result
+
+
+class ScaleIndex:
+    """Registered scale ids; the personality type poles are tracked separately"""
+
+    def __init__(self, hierarchical: List[str], poles: List[str]):
+        self.scales: Dict[str, int] = {scale: i for i, scale in enumerate(hierarchical + poles)}
+        self.poles: Set[str] = set(poles)
+
+    @classmethod
+    def load(cls) -> 'ScaleIndex':
+        return cls(load_scale_registry([HIERARCHICAL_SCALES_PATH]), load_scale_registry([PERSONALITY_TYPE_SCALES_PATH]))
+
+    def __contains__(self, scale: str) -> bool:
+        return scale in self.scales
+
+
+# --- Per-file checks (run in the worker processes) ---
+
+def validate_weight_file(path: str, scale_index: ScaleIndex, max_weight: float,
+                         cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> Dict:
+    """Issues of one weights file plus its question keys and map names"""
+    weight_file = load_weight_file(path, cache_dir)
+    content = weight_file.content
+    issues = []
+    keys: Dict[str, int] = {}
+    seen: Dict[Tuple[Optional[str], str], int] = {}
+
+    for entry in weight_file.entries:
+        line = content.count('\n', 0, entry.start) + 1
+        where = {'file': path, 'line': line, 'test': entry.test_id, 'key': entry.key}
+
+        map_key = (entry.map_name, entry.key)
+        if map_key in seen:
+            issues.append(issue('error', 'duplicate_key', f"{entry.key} already defined on line {seen[map_key]}", **where))
+        seen[map_key] = line
+        if entry.key.endswith(':personality'):
+            issues.append(issue('error', 'personality_suffix',
+                                "bipolar weights belong in the axisWeights of the question itself", **where))
+        elif entry.key != f"{entry.test_id}:{entry.question_id}":
+            issues.append(issue('error', 'key_mismatch',
+                                f"key does not match testId '{entry.test_id}' / questionId '{entry.question_id}'", **where))
+        keys.setdefault(f"{entry.test_id}:{entry.question_id}", line)
+
+        for scale, weight in entry.axis_weights.items():
+            if scale not in scale_index:
+                issues.append(issue('error', 'unknown_scale', f"'{scale}' is not in the scale registry",
+                                    scale=scale, **where))
+            if not math.isfinite(weight) or weight == 0 or abs(weight) > max_weight:
+                issues.append(issue('error', 'bad_weight', f"weight {weight} outside 0 < |w| <= {max_weight}",
+                                    scale=scale, **where))
+            elif weight < 0 and scale in scale_index.poles:
+                issues.append(issue('error', 'negative_pole_weight',
+                                    f"negative weight {weight} on personality type pole; weight the opposite pole",
+                                    scale=scale, **where))
+
+        for scale, direction in (entry.axis_directions or {}).items():
+            weight = entry.axis_weights.get(scale)
+            if direction not in (1, -1):
+                issues.append(issue('error', 'bad_direction', f"direction {direction} is not 1 or -1",
+                                    scale=scale, **where))
+            elif weight is None:
+                issues.append(issue('error', 'direction_without_weight', "direction for a scale without a weight",
+                                    scale=scale, **where))
+            elif (weight < 0) != (direction < 0):
+                issues.append(issue('error', 'conflicting_direction',
+                                    f"direction {direction} overrides the sign of weight {weight}", scale=scale, **where))
+            else:
+                issues.append(issue('warning', 'redundant_direction', "direction follows from the weight sign",
+                                    scale=scale, **where))
+
+    return {'path': path, 'issues': issues, 'keys': keys, 'maps': weight_file.maps}
+
+
+def validate_test_file(path: str) -> Dict:
+    """Issues of one test JSON plus its question ids"""
+    issues = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            test = json.load(f)
+        test_id = test['id']
+        questions = test['questions']
+    except (ValueError, KeyError, TypeError) as e:
+        return {'path': path, 'test': None, 'questions': [], 'factors': [],
+                'issues': [issue('error', 'bad_test_json', f"cannot read test JSON: {e}", file=path)]}
+
+    factors = set(test.get('factors') or [])
+    question_ids = []
+    for question in questions:
+        question_id = question.get('id')
+        where = {'file': path, 'test': test_id, 'key': f"{test_id}:{question_id}"}
+        if question_id in question_ids:
+            issues.append(issue('error', 'duplicate_question', f"question id {question_id} is used twice", **where))
+        question_ids.append(question_id)
+        answers = question.get('answers') or []
+        scores = [answer.get('score') for answer in answers]
+        if not answers:
+            issues.append(issue('error', 'bad_answers', "question has no answers", **where))
+        elif any(not isinstance(score, int) or isinstance(score, bool) or score < 0 for score in scores):
+            issues.append(issue('error', 'bad_answers', f"answer scores must be non-negative ints: {scores}", **where))
+        factor = question.get('factor')
+        if factor is not None and factors and factor not in factors:
+            # Multiple-choice tests use markers such as 'multi_choice' here
+            issues.append(issue('warning', 'unknown_factor', f"factor '{factor}' is not in the test's factors", **where))
+
+    return {'path': path, 'test': test_id, 'questions': question_ids, 'factors': sorted(factors), 'issues': issues}
+
+
+_SCALE_INDEX: Optional[ScaleIndex] = None
+
+
+def _init_worker(scale_index: ScaleIndex):
+    global _SCALE_INDEX
+    _SCALE_INDEX = scale_index
+
+
+def _validate_file(kind: str, path: str, max_weight: float) -> Dict:
+    try:
+        if kind == 'weights':
+            return validate_weight_file(path, _SCALE_INDEX, max_weight)
+        return validate_test_file(path)
+    except Exception as e:
+        return {'path': path, 'issues': [issue('error', 'unreadable', f"{type(e).__name__}: {e}", file=path)],
+                'keys': {}, 'maps': [], 'test': None, 'questions': [], 'factors': []}
+
+
+# --- Cross-file checks ---
+
+def _read(path: str) -> str:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except FileNotFoundError:
+        return ''
+
+
+def check_coverage(tests: Dict[str, Dict], weights: List[Dict]) -> List[Dict]:
+    """Questions without weights, weights without questions, maps nobody merges"""
+    issues = []
+    weighted: Dict[str, Dict[str, Tuple[str, int]]] = {}
+    for result in weights:
+        for key, line in result['keys'].items():
+            test_id, question_id = key.split(':', 1)
+            weighted.setdefault(test_id, {})[question_id] = (result['path'], line)
+
+    for test_id, test in tests.items():
+        test_weights = weighted.get(test_id, {})
+        # Tests scored per factor (answer = factor count) weight 'factor_<id>' instead of questions
+        if any(question_id.startswith(FACTOR_PREFIX) for question_id in test_weights):
+            expected = [FACTOR_PREFIX + factor for factor in test['factors']]
+        else:
+            expected = test['questions']
+        for question_id in expected:
+            if question_id not in test_weights:
+                issues.append(issue('error', 'missing_weight', "no QuestionWeight for this key",
+                                    file=test['path'], test=test_id, key=f"{test_id}:{question_id}"))
+        known = set(expected)
+        for question_id, (path, line) in test_weights.items():
+            if question_id not in known:
+                issues.append(issue('error', 'orphan_weight', f"test {test_id} has no question or factor {question_id}",
+                                    file=path, line=line, test=test_id, key=f"{test_id}:{question_id}"))
+
+    for test_id in sorted(set(weighted) - set(tests)):
+        path, line = next(iter(weighted[test_id].values()))
+        issues.append(issue('warning', 'untested_weights',
+                            f"{len(weighted[test_id])} weights for a test without JSON (special test or not converted)",
+                            file=path, line=line, test=test_id))
+
+    service = _read(SUMMARY_SERVICE_PATH)
+    config = _read(SUMMARY_CONFIG_PATH)
+    for result in weights:
+        for map_name in result['maps']:
+            spread = re.compile(r"\.\.\." + re.escape(map_name) + r"\b")
+            missing = [os.path.basename(path) for path, text in ((SUMMARY_SERVICE_PATH, service), (SUMMARY_CONFIG_PATH, config))
+                       if not spread.search(text)]
+            if missing:
+                issues.append(issue('warning', 'unspread_map', f"...{map_name} is not merged in {', '.join(missing)}",
+                                    file=result['path']))
+    return issues
+
+
+def check_registration(tests: Dict[str, Dict]) -> List[Dict]:
+    """Stub, registry and service wiring of each test (what validate_test.sh grepped per test)"""
+    issues = []
+    stubs: Dict[str, Tuple[str, str, str]] = {}
+    for path in sorted(glob.glob(os.path.join(STUBS_DIR, '*.dart'))):
+        content = _read(path)
+        for match in STUB_ID_PATTERN.finditer(content):
+            stubs[match.group(2)] = (path, match.group(1), content)
+
+    registry = _read(TEST_REGISTRY_PATH)
+    loader = _read(TEST_LOADER_PATH)
+    service = _read(TEST_SERVICE_PATH)
+    screen = _read(SUMMARY_SCREEN_PATH)
+
+    for test_id, test in tests.items():
+        stub = stubs.get(test_id)
+        if stub is None:
+            issues.append(issue('error', 'missing_stub', f"no TestStub in lib/data/tests with id '{test_id}'",
+                                file=test['path'], test=test_id))
+            continue
+        path, class_name, content = stub
+        if not re.search(r"\b" + class_name + r"\(\)", registry):
+            issues.append(issue('error', 'unregistered_stub', f"{class_name}() is not in test_registry.dart",
+                                file=path, test=test_id))
+        count = STUB_QUESTION_COUNT_PATTERN.search(content)
+        if count and int(count.group(1)) != len(test['questions']):
+            issues.append(issue('warning', 'question_count_mismatch',
+                                f"questionCount is {count.group(1)}, the test has {len(test['questions'])} questions",
+                                file=path, test=test_id))
+        asset = STUB_ASSET_PATH_PATTERN.search(content)
+        case = f"case '{test_id}':"
+        if (asset is None or not asset.group(1)) and case not in loader:
+            issues.append(issue('error', 'missing_loader_case',
+                                f"empty assetPath and no {case} in test_loader_service.dart", file=path, test=test_id))
+        if screen.count(case) < 2:
+            issues.append(issue('warning', 'missing_summary_screen_case',
+                                f"{case} found {screen.count(case)} times in summary_screen.dart (expected 2)",
+                                file=path, test=test_id))
+        if f"test.id == '{test_id}'" not in service and f"testResult.testId == '{test_id}'" not in service:
+            issues.append(issue('warning', 'missing_test_service', "test is not handled in test_service.dart",
+                                file=path, test=test_id))
+    return issues
+
+
+# --- Driver ---
+
+def validate(test_paths: Iterable[str], weight_paths: Iterable[str], jobs: int = 0,
+             max_weight: float = DEFAULT_MAX_WEIGHT, only_tests: Iterable[str] = ()) -> Dict:
+    """Run all checks; returns the report (summary + issues)"""
+    started = time.perf_counter()
+    scale_index = ScaleIndex.load()
+    work = [('tests', path) for path in test_paths] + [('weights', path) for path in weight_paths]
+    worker = partial(_validate_file, max_weight=max_weight)
+    jobs = min(jobs or os.cpu_count() or 1, len(work)) or 1
+    if jobs <= 1:
+        _init_worker(scale_index)
+        results = [worker(kind, path) for kind, path in work]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(scale_index,)) as pool:
+            results = list(pool.map(worker, *zip(*work)))
+
+    test_results = results[:len(work) - sum(1 for kind, _ in work if kind == 'weights')]
+    weight_results = results[len(test_results):]
+    tests = {result['test']: result for result in test_results if result.get('test')}
+
+    issues = [item for result in results for item in result['issues']]
+    issues += check_coverage(tests, weight_results)
+    issues += check_registration(tests)
+
+    only_tests = set(only_tests)
+    if only_tests:
+        issues = [item for item in issues if item.get('test') in only_tests]
+    issues.sort(key=lambda item: (item['severity'] != 'error', item.get('file', ''), item.get('line', 0), item['check']))
+
+    by_check: Dict[str, int] = {}
+    for item in issues:
+        by_check[item['check']] = by_check.get(item['check'], 0) + 1
+    return {
+        'summary': {
+            'tests': len(tests) if not only_tests else len(only_tests & set(tests)),
+            'weight_files': len(weight_results),
+            'weights': sum(len(result['keys']) for result in weight_results),
+            'registered_scales': len(scale_index.scales),
+            'errors': sum(1 for item in issues if item['severity'] == 'error'),
+            'warnings': sum(1 for item in issues if item['severity'] == 'warning'),
+            'by_check': dict(sorted(by_check.items())),
+            'seconds': round(time.perf_counter() - started, 3),
+        },
+        'issues': issues,
+    }
+
+
+def print_text_report(report: Dict, limit: int):
+    shown: Dict[str, int] = {}
+    for item in report['issues']:
+        shown[item['check']] = shown.get(item['check'], 0) + 1
+        if limit and shown[item['check']] > limit:
+            continue
+        location = item.get('file', '')
+        if 'line' in item:
+            location += f":{item['line']}"
+        mark = '❌' if item['severity'] == 'error' else '⚠️ '
+        subject = item.get('key') or item.get('test') or ''
+        print(f"{mark} [{item['check']}] {location} {subject}: {item['message']}")
+    summary = report['summary']
+    hidden = sum(max(count - limit, 0) for count in shown.values()) if limit else 0
+    if hidden:
+        print(f"... {hidden} more (raise --limit or use --format json)")
+    print(f"\n📊 {summary['tests']} tests, {summary['weight_files']} weight files, {summary['weights']} weights, "
+          f"{summary['registered_scales']} registered scales ({summary['seconds']:.2f} s)")
+    for check, count in summary['by_check'].items():
+        print(f"   {check:<30}{count:>6}")
+    status = '✅' if not summary['errors'] else '❌'
+    print(f"{status} {summary['errors']} errors, {summary['warnings']} warnings")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate test JSON and question weights")
+    parser.add_argument('--test', action='append', default=[], dest='tests', metavar='ID',
+                        help="Only report issues of this test id (repeatable)")
+    parser.add_argument('--tests-dir', default=TESTS_DIR, help="Directory with the converted test JSON")
+    parser.add_argument('--weights', nargs='*', default=[], help="Weight files, directories or globs (default: all)")
+    parser.add_argument('--format', choices=('json', 'text'), default='json', help="Report format (default: json)")
+    parser.add_argument('--limit', type=int, default=20, help="Issues shown per check in text format (0: all)")
+    parser.add_argument('--max-weight', type=float, default=DEFAULT_MAX_WEIGHT, help="Largest allowed |weight|")
+    parser.add_argument('-j', '--jobs', type=int, default=0, help="Worker processes (default: one per core)")
+    args = parser.parse_args()
+
+    test_paths = sorted(glob.glob(os.path.join(args.tests_dir, '*.json')))
+    report = validate(test_paths, weight_file_paths(args.weights), args.jobs, args.max_weight, args.tests)
+    if args.format == 'json':
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+    else:
+        print_text_report(report, args.limit)
+    sys.exit(1 if report['summary']['errors'] else 0)
+
+
+if __name__ == '__main__':
+    # Run through the importable modules so cached IR refers to dart_weights.* classes
+    import validate_tests
+    validate_tests.main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Compile all question weights into a sparse question x scale matrix.
+
+SummaryService merges the `*Weights.weights` maps into one Map on every
+scoring call and then scans each question's axisWeights. This build step
+does that merge once, offline, and stores the result in CSR form:
+
+    questions[r]                      'test_id:question_id' of row r
+    indptr[r] .. indptr[r + 1]        slice of row r in indices / data
+    indices[k]                        interned scale id (position in `scales`)
+    data[k]                           axis weight as written in the Dart file
+
+plus the reverse index (CSC of the same matrix): for every scale the rows
+that weight it, so "which questions feed extraversion" is one slice. Both
+are stored in the artifact, so loading it does no index work.
+
+Scale ids are interned in registry order: hierarchical_scales.dart first,
+then personality_type_scales.dart. Ids that are used by weights but are not
+registered are appended after them and reported.
+
+By default the merged maps are exactly the ones spread in
+SummaryService._calculatePersonalityTypeScalesFromAllTests, in the same
+order (later maps override earlier ones, as with Dart spreads).
+
+Usage:
+    python tools/weight_matrix.py [--all-maps] [--output build/weights/question_weights_matrix.json] [--check]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dart_weights import DEFAULT_CACHE_DIR, REPO_ROOT, content_hash, load_weight_files, weight_file_paths
+
+FORMAT_VERSION = 2
+
+HIERARCHICAL_SCALES_PATH = os.path.join(REPO_ROOT, 'lib', 'config', 'summary', 'hierarchical_scales.dart')
+PERSONALITY_TYPE_SCALES_PATH = os.path.join(REPO_ROOT, 'lib', 'config', 'summary', 'personality_type_scales.dart')
+SCALE_PATHS = (HIERARCHICAL_SCALES_PATH, PERSONALITY_TYPE_SCALES_PATH)
+SUMMARY_SERVICE_PATH = os.path.join(REPO_ROOT, 'lib', 'services', 'summary_service.dart')
+SUMMARY_CONFIG_PATH = os.path.join(REPO_ROOT, 'lib', 'config', 'summary_config.dart')
+DEFAULT_OUTPUT = os.path.join(REPO_ROOT, 'build', 'weights', 'question_weights_matrix.json')
+# Maps of QuestionWeightsConfig, which TestService scores each test's scales with
+TEST_SCALES_OUTPUT = os.path.join(REPO_ROOT, 'build', 'weights', 'test_scale_weights_matrix.json')
+
+SCORING_FUNCTION = '_calculatePersonalityTypeScalesFromAllTests'
+CONFIG_WEIGHTS_DECLARATION = 'static final Map<String, QuestionWeight> _weights = {'
+SCALE_ID_PATTERN = re.compile(r"^\s*id: '([^']+)'", re.MULTILINE)
+SPREAD_PATTERN = re.compile(r"\.\.\.([A-Za-z_]\w*(?:\.weights)?),")
+
+
+def load_scale_registry(paths: Iterable[str] = SCALE_PATHS) -> List[str]:
+    """Registered scale ids in declaration order (hierarchical scales first)"""
+    scale_ids: List[str] = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            scale_ids.extend(SCALE_ID_PATTERN.findall(f.read()))
+    return list(dict.fromkeys(scale_ids))
+
+
+def scoring_map_names(service_path: str = SUMMARY_SERVICE_PATH) -> List[str]:
+    """Weight maps merged by the SummaryService scoring function, in spread order"""
+    with open(service_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    start = content.find(f"{SCORING_FUNCTION}(List")
+    if start < 0:
+        raise ValueError(f"{SCORING_FUNCTION} not found in {service_path}")
+    body_end = content.find('};', start)
+    return SPREAD_PATTERN.findall(content[start:body_end])
+
+
+def config_map_names(config_path: str = SUMMARY_CONFIG_PATH) -> List[str]:
+    """Weight maps merged into QuestionWeightsConfig._weights, in spread order"""
+    with open(config_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    start = content.find(CONFIG_WEIGHTS_DECLARATION)
+    if start < 0:
+        raise ValueError(f"QuestionWeightsConfig._weights not found in {config_path}")
+    body_end = content.find('};', start)
+    return SPREAD_PATTERN.findall(content[start:body_end])
+
+
+class WeightMatrix:
+    """Question x scale weights in CSR form with a CSC reverse index"""
+
+    def __init__(
+        self,
+        scales: List[str],
+        registered_scales: int,
+        questions: List[str],
+        indptr: array,
+        indices: array,
+        data: array,
+        maps: List[str],
+        source_hash: str,
+        reverse_index: Optional[Tuple] = None,
+    ):
+        self.scales = scales
+        self.registered_scales = registered_scales
+        self.questions = questions
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.maps = maps
+        self.source_hash = source_hash
+        self.scale_index: Dict[str, int] = {scale: i for i, scale in enumerate(scales)}
+        self.question_index: Dict[str, int] = {key: i for i, key in enumerate(questions)}
+        # (scale_indptr, scale_rows, scale_data) when the caller already has it (weight_store.py)
+        self.scale_indptr, self.scale_rows, self.scale_data = reverse_index or self._reverse_index()
+
+    @property
+    def nnz(self) -> int:
+        return len(self.data)
+
+    @property
+    def unregistered_scales(self) -> List[str]:
+        return self.scales[self.registered_scales:]
+
+    def _reverse_index(self) -> Tuple[array, array, array]:
+        """Counting sort of the CSR entries by column: O(nnz + scales)"""
+        counts = [0] * (len(self.scales) + 1)
+        for column in self.indices:
+            counts[column + 1] += 1
+        for i in range(len(self.scales)):
+            counts[i + 1] += counts[i]
+        scale_indptr = array('l', counts)
+
+        fill = counts[:-1]
+        scale_rows = array('l', bytes(array('l').itemsize * self.nnz))
+        scale_data = array('d', bytes(array('d').itemsize * self.nnz))
+        for row in range(len(self.questions)):
+            for k in range(self.indptr[row], self.indptr[row + 1]):
+                column = self.indices[k]
+                position = fill[column]
+                scale_rows[position] = row
+                scale_data[position] = self.data[k]
+                fill[column] = position + 1
+        return scale_indptr, scale_rows, scale_data
+
+    def row(self, key: str) -> Dict[str, float]:
+        """axisWeights of one question ({} if it has no weights)"""
+        row = self.question_index.get(key)
+        if row is None:
+            return {}
+        return {self.scales[self.indices[k]]: self.data[k] for k in range(self.indptr[row], self.indptr[row + 1])}
+
+    def column(self, scale_id: str) -> Dict[str, float]:
+        """Questions that weight a scale, with their weights"""
+        column = self.scale_index.get(scale_id)
+        if column is None:
+            return {}
+        return {
+            self.questions[self.scale_rows[k]]: self.scale_data[k]
+            for k in range(self.scale_indptr[column], self.scale_indptr[column + 1])
+        }
+
+    def to_json(self) -> Dict:
+        return {
+            'format_version': FORMAT_VERSION,
+            'source_hash': self.source_hash,
+            'maps': self.maps,
+            'scales': self.scales,
+            'registered_scales': self.registered_scales,
+            'questions': self.questions,
+            'indptr': list(self.indptr),
+            'indices': list(self.indices),
+            'data': list(self.data),
+            'scale_indptr': list(self.scale_indptr),
+            'scale_rows': list(self.scale_rows),
+            'scale_data': list(self.scale_data),
+        }
+
+    @classmethod
+    def from_json(cls, payload: Dict) -> 'WeightMatrix':
+        if payload.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported weight matrix format: {payload.get('format_version')}")
+        return cls(
+            scales=payload['scales'],
+            registered_scales=payload['registered_scales'],
+            questions=payload['questions'],
+            indptr=array('l', payload['indptr']),
+            indices=array('l', payload['indices']),
+            data=array('d', payload['data']),
+            maps=payload['maps'],
+            source_hash=payload['source_hash'],
+            reverse_index=(array('l', payload['scale_indptr']), array('l', payload['scale_rows']),
+                           array('d', payload['scale_data'])),
+        )
+
+    def save_json(self, path: str = DEFAULT_OUTPUT):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, ensure_ascii=False, separators=(',', ':'))
+
+
+def source_hash(weight_hashes: Iterable[str], maps: List[str], scale_paths: Iterable[str]) -> str:
+    """Hash of everything the matrix is built from, used to detect a stale artifact"""
+    digest = hashlib.sha256(f"{FORMAT_VERSION}\0{','.join(maps)}".encode('utf-8'))
+    for weight_hash in sorted(weight_hashes):
+        digest.update(weight_hash.encode('ascii'))
+    for path in scale_paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def current_source_hash(maps: List[str], targets: Iterable[str] = ()) -> str:
+    """source_hash of build_weight_matrix(targets, maps), without parsing the weight files"""
+    weight_hashes = []
+    for path in weight_file_paths(targets):
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            weight_hashes.append(content_hash(f.read()))
+    return source_hash(weight_hashes, list(maps), SCALE_PATHS)
+
+
+def build_weight_matrix(
+    targets: Iterable[str] = (),
+    maps: Optional[List[str]] = None,
+    cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+) -> WeightMatrix:
+    """
+    Merge the given weight maps (default: the SummaryService scoring maps,
+    None for every map in the weight files) into a WeightMatrix.
+    """
+    files = load_weight_files(targets, cache_dir)
+    entries_by_map: Dict[str, list] = {}
+    for weight_file in files:
+        for entry in weight_file.entries:
+            entries_by_map.setdefault(entry.map_name, []).append(entry)
+
+    if maps is None:
+        maps = [name for weight_file in files for name in weight_file.maps]
+    missing = [name for name in maps if name not in entries_by_map]
+    if missing:
+        raise ValueError(f"Weight maps not found in weight files: {', '.join(missing)}")
+
+    merged: Dict[str, Dict[str, float]] = {}
+    for name in maps:
+        for entry in entries_by_map[name]:
+            merged[entry.key] = entry.axis_weights
+
+    scales = load_scale_registry(SCALE_PATHS)
+    registered = len(scales)
+    scale_index = {scale: i for i, scale in enumerate(scales)}
+
+    indptr = array('l', [0])
+    indices = array('l')
+    data = array('d')
+    for axis_weights in merged.values():
+        for scale_id, weight in axis_weights.items():
+            column = scale_index.get(scale_id)
+            if column is None:
+                column = scale_index[scale_id] = len(scales)
+                scales.append(scale_id)
+            indices.append(column)
+            data.append(weight)
+        indptr.append(len(data))
+
+    return WeightMatrix(
+        scales=scales,
+        registered_scales=registered,
+        questions=list(merged),
+        indptr=indptr,
+        indices=indices,
+        data=data,
+        maps=list(maps),
+        source_hash=source_hash((f.content_hash for f in files), list(maps), SCALE_PATHS),
+    )
+
+
+def load_weight_matrix(path: str = DEFAULT_OUTPUT) -> WeightMatrix:
+    with open(path, 'r', encoding='utf-8') as f:
+        return WeightMatrix.from_json(json.load(f))
+
+
+def compiled_weight_matrix(path: str = DEFAULT_OUTPUT, maps: Optional[List[str]] = None) -> WeightMatrix:
+    """
+    The scoring matrix from the artifact, rebuilding it when missing or stale.
+
+    maps defaults to the SummaryService scoring maps; pass config_map_names()
+    (with TEST_SCALES_OUTPUT) for the weights TestService scores tests with.
+    """
+    maps = maps if maps is not None else scoring_map_names()
+    try:
+        cached = load_weight_matrix(path)
+    except (OSError, ValueError, KeyError):
+        cached = None
+    if cached is not None and cached.source_hash == current_source_hash(maps):
+        return cached
+    matrix = build_weight_matrix(maps=maps)
+    matrix.save_json(path)
+    return matrix
+
+
+def check_matrix(matrix: WeightMatrix, targets: Iterable[str] = ()) -> int:
+    """Compare every row and column with the merged Dart maps; returns the number of mismatches"""
+    by_map: Dict[str, Dict[str, Dict[str, float]]] = {}
+    for weight_file in load_weight_files(targets):
+        for entry in weight_file.entries:
+            by_map.setdefault(entry.map_name, {})[entry.key] = entry.axis_weights
+    merged: Dict[str, Dict[str, float]] = {}
+    for name in matrix.maps:
+        merged.update(by_map[name])
+
+    failures = 0
+    if list(merged) != matrix.questions:
+        failures += 1
+        print("❌ Question order differs from the merged maps")
+    for key, axis_weights in merged.items():
+        if matrix.row(key) != axis_weights:
+            failures += 1
+            print(f"❌ Row mismatch: {key}")
+    for scale_id in matrix.scales:
+        expected = {key: w[scale_id] for key, w in merged.items() if scale_id in w}
+        if matrix.column(scale_id) != expected:
+            failures += 1
+            print(f"❌ Column mismatch: {scale_id}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile question weights into a sparse question x scale matrix")
+    parser.add_argument('targets', nargs='*', help="Weight files, directories or globs (default: question_weights/)")
+    parser.add_argument('--all-maps', action='store_true',
+                        help="Merge every weights map, not only the ones SummaryService scores with")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="JSON artifact path")
+    parser.add_argument('--check', action='store_true', help="Verify rows and reverse index against the Dart maps")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    matrix = build_weight_matrix(args.targets, maps=None if args.all_maps else scoring_map_names())
+    build_seconds = time.perf_counter() - started
+    matrix.save_json(args.output)
+
+    print(f"✅ {len(matrix.questions)} questions x {len(matrix.scales)} scales, {matrix.nnz} weights "
+          f"from {len(matrix.maps)} maps in {build_seconds * 1000:.1f} ms")
+    print(f"   density: {matrix.nnz / max(len(matrix.questions) * len(matrix.scales), 1):.2%}, "
+          f"artifact: {os.path.getsize(args.output) / 1024:.0f} KB -> {args.output}")
+    unregistered = matrix.unregistered_scales
+    if unregistered:
+        print(f"⚠️  {len(unregistered)} scale ids are not in the scale registry, e.g. {', '.join(unregistered[:8])}")
+
+    if args.check:
+        failures = check_matrix(matrix, args.targets)
+        reloaded = load_weight_matrix(args.output)
+        if reloaded.to_json() != matrix.to_json():
+            failures += 1
+            print("❌ Artifact does not round-trip")
+        if failures:
+            sys.exit(1)
+        print("✅ Rows, reverse index and artifact match the Dart maps")
+
+
+if __name__ == '__main__':
+    # Run through the importable modules so cached IR refers to dart_weights.* classes
+    import weight_matrix
+    weight_matrix.main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped binary store of a compiled weight matrix.
+
+The JSON artifact of weight_matrix.py has to be parsed (and its reverse
+index rebuilt) by every process that scores. The store holds the same
+matrix as flat little-endian arrays, so a worker opens it with mmap and
+reads it through NumPy views without parsing or copying; N workers that
+open the same file share one copy of its pages in the OS page cache.
+
+    header      '<4sHHII64s'  b'QWMS', version, 0, registered_scales,
+                section count, source hash (hex)
+    offsets     '<QQ' (offset, length) per section, in SECTIONS order
+    maps        string table: u32 count, u32 offsets[count + 1], UTF-8 blob
+    scales      string table: interned scale ids, registry order first
+    questions   string table: 'test_id:question_id' of every row
+    indptr      u32[questions + 1]  CSR row offsets
+    indices     u32[nnz]            interned scale id of each weight
+    data        f32[nnz]            weights
+    scale_indptr, scale_rows, scale_data: the CSC reverse index, same types
+
+Sections start on 8-byte boundaries. Weights are stored as float32: the
+Dart literals have at most a few significant digits, pack_weight_matrix()
+checks that each one reads back exactly as the shortest float32 decimal,
+and WeightStore.row() / column() return those decimals, so rows are
+identical to the JSON artifact.
+
+The store sits next to its JSON artifact (question_weights_matrix.bin,
+test_scale_weights_matrix.bin) and carries its source hash:
+compiled_weight_store() rebuilds it when stale, WeightStore(path) only maps it.
+
+Usage:
+    python tools/weight_store.py [--check] [--workers 4]
+"""
+
+import argparse
+import mmap
+import multiprocessing
+import os
+import struct
+import sys
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from weight_matrix import (
+    DEFAULT_OUTPUT, TEST_SCALES_OUTPUT, WeightMatrix, compiled_weight_matrix, config_map_names,
+    current_source_hash, load_weight_matrix, scoring_map_names,
+)
+
+MAGIC = b'QWMS'
+STORE_VERSION = 1
+HEADER = struct.Struct('<4sHHII64s')
+SECTION = struct.Struct('<QQ')
+ALIGNMENT = 8
+STRING_SECTIONS = ('maps', 'scales', 'questions')
+ARRAY_SECTIONS = (
+    ('indptr', '<u4'), ('indices', '<u4'), ('data', '<f4'),
+    ('scale_indptr', '<u4'), ('scale_rows', '<u4'), ('scale_data', '<f4'),
+)
+SECTIONS = STRING_SECTIONS + tuple(name for name, _ in ARRAY_SECTIONS)
+
+
+def store_path(matrix_path: str) -> str:
+    """Store file of a JSON matrix artifact"""
+    return os.path.splitext(matrix_path)[0] + '.bin'
+
+
+DEFAULT_STORE = store_path(DEFAULT_OUTPUT)
+TEST_SCALES_STORE = store_path(TEST_SCALES_OUTPUT)
+
+
+def _pack_strings(values: List[str]) -> bytes:
+    encoded = [value.encode('utf-8') for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    offsets[1:] = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+    return struct.pack('<I', len(encoded)) + offsets.tobytes() + b''.join(encoded)
+
+
+def _unpack_strings(view: memoryview) -> List[str]:
+    (count,) = struct.unpack_from('<I', view, 0)
+    offsets = np.frombuffer(view, dtype='<u4', count=count + 1, offset=4).tolist()
+    blob = view[4 * (count + 2):]
+    return [str(blob[offsets[i]:offsets[i + 1]], 'utf-8') for i in range(count)]
+
+
+def _float32(weights: Iterable[float]) -> np.ndarray:
+    values = np.asarray(list(weights), dtype=np.float64)
+    lossy = [weight for weight in set(values.tolist()) if float(str(np.float32(weight))) != weight]
+    if lossy:
+        raise ValueError(f"Weights do not survive float32: {', '.join(map(repr, sorted(lossy)[:8]))}")
+    return values.astype('<f4')
+
+
+def pack_weight_matrix(matrix: WeightMatrix) -> bytes:
+    sections = [_pack_strings(matrix.maps), _pack_strings(matrix.scales), _pack_strings(matrix.questions)]
+    for name, dtype in ARRAY_SECTIONS:
+        values = getattr(matrix, name)
+        sections.append((_float32(values) if dtype == '<f4' else np.asarray(values, dtype=dtype)).tobytes())
+
+    offset = HEADER.size + SECTION.size * len(sections)
+    table, body = [], []
+    for section in sections:
+        padding = -offset % ALIGNMENT
+        body.append(b'\0' * padding)
+        offset += padding
+        table.append(SECTION.pack(offset, len(section)))
+        body.append(section)
+        offset += len(section)
+    header = HEADER.pack(MAGIC, STORE_VERSION, 0, matrix.registered_scales, len(sections),
+                         matrix.source_hash.encode('ascii'))
+    return b''.join([header] + table + body)
+
+
+def write_weight_store(matrix: WeightMatrix, path: str = DEFAULT_STORE):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(pack_weight_matrix(matrix))
+    # A new inode instead of rewriting in place: workers that have the old file mapped keep valid pages
+    os.replace(temporary, path)
+
+
+def read_store_hash(path: str) -> Optional[str]:
+    """Source hash in a store header, None if the file is missing or not a store"""
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+    except OSError:
+        return None
+    if len(header) != HEADER.size:
+        return None
+    magic, version, _, _, _, digest = HEADER.unpack(header)
+    if magic != MAGIC or version != STORE_VERSION:
+        return None
+    return digest.decode('ascii')
+
+
+class WeightStore(WeightMatrix):
+    """WeightMatrix over a mapped store: the arrays are read-only NumPy views of the file"""
+
+    def __init__(self, path: str = DEFAULT_STORE):
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self.mmap)
+        magic, version, _, registered, count, digest = HEADER.unpack_from(view, 0)
+        if magic != MAGIC or version != STORE_VERSION or count != len(SECTIONS):
+            raise ValueError(f"Not a weight store v{STORE_VERSION}: {path}")
+        sections = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = SECTION.unpack_from(view, HEADER.size + i * SECTION.size)
+            sections[name] = view[offset:offset + length]
+        arrays = {name: np.frombuffer(sections[name], dtype=dtype) for name, dtype in ARRAY_SECTIONS}
+
+        super().__init__(
+            scales=_unpack_strings(sections['scales']),
+            registered_scales=registered,
+            questions=_unpack_strings(sections['questions']),
+            indptr=arrays['indptr'],
+            indices=arrays['indices'],
+            data=arrays['data'],
+            maps=_unpack_strings(sections['maps']),
+            source_hash=digest.decode('ascii'),
+            reverse_index=(arrays['scale_indptr'], arrays['scale_rows'], arrays['scale_data']),
+        )
+        self.path = path
+        # float32 weight -> the decimal written in the Dart file (a few dozen distinct values)
+        self.decimals: Dict[float, float] = {
+            weight: float(str(np.float32(weight))) for weight in np.unique(self.data).tolist()
+        }
+
+    def row(self, key: str) -> Dict[str, float]:
+        row = self.question_index.get(key)
+        if row is None:
+            return {}
+        start, end = int(self.indptr[row]), int(self.indptr[row + 1])
+        return {self.scales[column]: self.decimals[weight]
+                for column, weight in zip(self.indices[start:end].tolist(), self.data[start:end].tolist())}
+
+    def column(self, scale_id: str) -> Dict[str, float]:
+        column = self.scale_index.get(scale_id)
+        if column is None:
+            return {}
+        start, end = int(self.scale_indptr[column]), int(self.scale_indptr[column + 1])
+        return {self.questions[row]: self.decimals[weight]
+                for row, weight in zip(self.scale_rows[start:end].tolist(), self.scale_data[start:end].tolist())}
+
+    def to_json(self) -> Dict:
+        payload = super().to_json()
+        for name in ('indptr', 'indices', 'scale_indptr', 'scale_rows'):
+            payload[name] = getattr(self, name).tolist()
+        payload['data'] = [self.decimals[weight] for weight in self.data.tolist()]
+        payload['scale_data'] = [self.decimals[weight] for weight in self.scale_data.tolist()]
+        return payload
+
+
+def compiled_weight_store(matrix_path: str = DEFAULT_OUTPUT, maps: Optional[List[str]] = None) -> str:
+    """
+    Path of the store of a compiled matrix, (re)written when missing or stale.
+
+    Call it once in the parent process; workers then open the returned path
+    with WeightStore, which neither parses the Dart maps nor checks hashes.
+    """
+    maps = maps if maps is not None else scoring_map_names()
+    path = store_path(matrix_path)
+    if read_store_hash(path) != current_source_hash(maps):
+        write_weight_store(compiled_weight_matrix(matrix_path, maps), path)
+    return path
+
+
+# --- Report ---
+
+def mapped_memory(path: str) -> Dict[str, int]:
+    """Rss / Pss / Shared_Clean (KB) of this process's mappings of a file (Linux /proc/self/smaps)"""
+    target = os.path.realpath(path)
+    totals = {'Rss': 0, 'Pss': 0, 'Shared_Clean': 0}
+    inside = False
+    try:
+        with open('/proc/self/smaps', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if '-' in fields[0] and not fields[0].endswith(':'):
+                    inside = len(fields) >= 6 and fields[-1] == target
+                elif inside and fields[0].rstrip(':') in totals:
+                    totals[fields[0].rstrip(':')] += int(fields[1])
+    except OSError:
+        pass
+    return totals
+
+
+def _worker(paths: List[str], barrier, results):
+    started = time.perf_counter()
+    stores = [WeightStore(path) for path in paths]
+    open_ms = (time.perf_counter() - started) * 1000
+    for store in stores:
+        # Fault in every page of the file, as scoring eventually does
+        np.frombuffer(store.mmap, dtype=np.uint8).sum()
+    barrier.wait()
+    memory = [mapped_memory(path) for path in paths]
+    barrier.wait()
+    results.put((os.getpid(), open_ms, memory))
+
+
+def measure_workers(paths: List[str], workers: int) -> List:
+    """Open the stores in `workers` processes at once; per worker (pid, open ms, mapped memory per store)"""
+    barrier = multiprocessing.Barrier(workers)
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_worker, args=(paths, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    measured = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return measured
+
+
+def _best_ms(function, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the memory-mapped weight stores and compare their load time")
+    parser.add_argument('--check', action='store_true', help="Verify that each store reads back as its JSON artifact")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="Open the stores in this many processes at once and report their shared memory")
+    args = parser.parse_args()
+
+    matrices = [(DEFAULT_OUTPUT, None), (TEST_SCALES_OUTPUT, config_map_names())]
+    failures = 0
+    paths = []
+    for matrix_path, maps in matrices:
+        path = compiled_weight_store(matrix_path, maps)
+        paths.append(path)
+        json_ms = _best_ms(lambda: load_weight_matrix(matrix_path))
+        store_ms = _best_ms(lambda: WeightStore(path))
+        store = WeightStore(path)
+        print(f"✅ {os.path.basename(path)}: {len(store.questions)} questions x {len(store.scales)} scales, "
+              f"{store.nnz} weights, {os.path.getsize(path) / 1024:.0f} KB "
+              f"(JSON {os.path.getsize(matrix_path) / 1024:.0f} KB)")
+        print(f"   load: JSON {json_ms:.1f} ms -> store {store_ms:.2f} ms")
+        if args.check:
+            if store.to_json() != load_weight_matrix(matrix_path).to_json():
+                failures += 1
+                print(f"❌ {path} does not read back as {matrix_path}")
+
+    if args.workers > 0:
+        print(f"   {args.workers} workers, mapped memory per worker (Rss / Pss KB):")
+        for pid, open_ms, memory in measure_workers(paths, args.workers):
+            usage = ', '.join(f"{os.path.basename(path)} {m['Rss']} / {m['Pss']}" for path, m in zip(paths, memory))
+            print(f"   pid {pid}: opened in {open_ms:.2f} ms, {usage}")
+
+    if failures:
+        sys.exit(1)
+    if args.check:
+        print("✅ Stores match the JSON artifacts")
+
+
+if __name__ == '__main__':
+    # Run through the importable module so worker processes unpickle the same functions
+    import weight_store
+    weight_store.main()